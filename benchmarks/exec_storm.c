@@ -0,0 +1,142 @@
+/*
+ * Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+ * Ivannikov Institute for System Programming of the Russian Academy of Sciences
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Fork/exec storm: each process executes FANOUT copies of itself one after
+ * another with DEPTH - 1, until DEPTH is 0. Each child appends time passed
+ * since its parent started to execute it (in nanoseconds) to LATENCY_FILE.
+ *
+ * Usage: clade-storm METHOD DEPTH FANOUT LATENCY_FILE [START_NS]
+ *
+ * METHOD is one of execve, execvp or posix_spawn. Executable is always
+ * searched in PATH, so it can be intercepted by wrappers.
+ */
+
+#define _GNU_SOURCE
+
+#include <fcntl.h>
+#include <limits.h>
+#include <spawn.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+#define STORM_NAME "clade-storm"
+
+extern char **environ;
+
+static unsigned long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000000ULL + ts.tv_nsec;
+}
+
+static void write_latency(const char *latency_file, const char *start_ns) {
+    char buf[32];
+    unsigned long long latency = now_ns() - strtoull(start_ns, NULL, 10);
+    int len = snprintf(buf, sizeof(buf), "%llu\n", latency);
+
+    // Single small write to the file opened with O_APPEND is atomic
+    int fd = open(latency_file, O_WRONLY | O_APPEND | O_CREAT, 0644);
+    if (fd == -1 || write(fd, buf, len) != len) {
+        perror(latency_file);
+        exit(EXIT_FAILURE);
+    }
+
+    close(fd);
+}
+
+static int find_in_path(char *path) {
+    char *env_path = getenv("PATH");
+    if (!env_path)
+        return 0;
+
+    char *dirs = strdup(env_path);
+    for (char *dir = strtok(dirs, ":"); dir; dir = strtok(NULL, ":")) {
+        snprintf(path, PATH_MAX, "%s/%s", dir, STORM_NAME);
+
+        if (!access(path, X_OK)) {
+            free(dirs);
+            return 1;
+        }
+    }
+
+    free(dirs);
+    return 0;
+}
+
+static pid_t spawn(const char *method, const char *path, char **argv) {
+    pid_t pid;
+
+    if (!strcmp(method, "posix_spawn"))
+        return posix_spawn(&pid, path, NULL, NULL, argv, environ) ? -1 : pid;
+
+    pid = fork();
+    if (pid)
+        return pid;
+
+    if (!strcmp(method, "execvp"))
+        execvp(STORM_NAME, argv);
+    else
+        execve(path, argv, environ);
+
+    _exit(127);
+}
+
+int main(int argc, char **argv) {
+    if (argc < 5) {
+        fprintf(stderr, "Usage: %s METHOD DEPTH FANOUT LATENCY_FILE [START_NS]\n", argv[0]);
+        return EXIT_FAILURE;
+    }
+
+    if (argc > 5)
+        write_latency(argv[4], argv[5]);
+
+    int depth = atoi(argv[2]);
+    int fanout = atoi(argv[3]);
+
+    if (depth <= 0)
+        return EXIT_SUCCESS;
+
+    char path[PATH_MAX];
+    if (!find_in_path(path)) {
+        fprintf(stderr, "%s is not found in PATH\n", STORM_NAME);
+        return EXIT_FAILURE;
+    }
+
+    char child_depth[16], start_ns[32];
+    snprintf(child_depth, sizeof(child_depth), "%d", depth - 1);
+
+    char *child_argv[] = {STORM_NAME, argv[1], child_depth, argv[3], argv[4], start_ns, NULL};
+
+    for (int i = 0; i < fanout; i++) {
+        int status;
+
+        snprintf(start_ns, sizeof(start_ns), "%llu", now_ns());
+        pid_t pid = spawn(argv[1], path, child_argv);
+
+        if (pid == -1 || waitpid(pid, &status, 0) == -1 || !WIFEXITED(status) || WEXITSTATUS(status)) {
+            fprintf(stderr, "%s failed\n", STORM_NAME);
+            return EXIT_FAILURE;
+        }
+    }
+
+    return EXIT_SUCCESS;
+}
@@ -0,0 +1,233 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure latency of exec calls under each interception mode.
+
+Small C program (exec_storm.c) recursively executes copies of itself:
+each process executes "fanout" children one after another, down to
+"depth" levels, using execve, execvp or posix_spawn. A number of such
+trees are executed in parallel. Each child records time passed since its
+parent started to execute it, so the latency includes fork, exec, loading
+of the interception library or execution of the wrapper, and logging of
+the command.
+
+For each interception mode and exec method the script prints percentiles
+of the latency, slowdown of the whole run relative to the run without
+interception, and the number of bytes written to cmds.txt.
+
+Usage: python -m benchmarks.exec_storm [-d 3] [-f 8] [-j 4] [--methods execve]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.intercept import MODES, run
+
+METHODS = ["execve", "execvp", "posix_spawn"]
+
+STORM_NAME = "clade-storm"
+STORM_SRC = os.path.join(os.path.dirname(__file__), "exec_storm.c")
+
+
+def build_storm(storm_dir):
+    """Compile the program that executes copies of itself."""
+    os.makedirs(storm_dir, exist_ok=True)
+    storm = os.path.join(storm_dir, STORM_NAME)
+
+    subprocess.check_call(["cc", "-O2", "-o", storm, STORM_SRC])
+
+    return storm
+
+
+def get_number_of_execs(depth, fanout, parallel):
+    """Get number of processes that are executed by the storm."""
+    return parallel * sum(fanout**level for level in range(1, depth + 1))
+
+
+def percentile(values, q):
+    """Get q-th percentile of the sorted list by the nearest-rank method."""
+    if not values:
+        return 0
+
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def measure(work_dir, method, depth, fanout, parallel, modes):
+    """Execute the storm without interception and under each mode.
+
+    Returns:
+        List of dictionaries with results, the first one is for the run
+        without interception
+    """
+    storm_dir = os.path.join(work_dir, "bin")
+    build_storm(storm_dir)
+
+    latency_file = os.path.join(work_dir, "latency.txt")
+    command = [
+        "sh",
+        "-c",
+        "for i in $(seq {}); do {} {} {} {} {} & done; wait".format(
+            parallel, STORM_NAME, method, depth, fanout, latency_file
+        ),
+    ]
+
+    # Storm is searched in PATH, so it can be intercepted by wrappers,
+    # which are created for executables from PATH before the build
+    old_path = os.environ["PATH"]
+    os.environ["PATH"] = storm_dir + os.pathsep + old_path
+
+    results = []
+    try:
+        for mode in [None] + list(modes):
+            if os.path.exists(latency_file):
+                os.remove(latency_file)
+
+            delta, cmds = run(work_dir, command, mode)
+            output = os.path.join(work_dir, "cmds.txt")
+
+            # Root processes are executed by sh and do not record latency
+            with open(latency_file) as fh:
+                latencies = sorted(int(line) / 1000 for line in fh)
+
+            results.append(
+                {
+                    "mode": mode if mode else "none",
+                    "time": delta,
+                    "execs": len(latencies),
+                    "cmds": cmds,
+                    "bytes": os.path.getsize(output) if mode else 0,
+                    "p50": percentile(latencies, 50),
+                    "p90": percentile(latencies, 90),
+                    "p99": percentile(latencies, 99),
+                    "max": latencies[-1] if latencies else 0,
+                }
+            )
+    finally:
+        os.environ["PATH"] = old_path
+
+    return results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Measure latency of exec calls under each interception mode."
+    )
+
+    parser.add_argument(
+        "-d",
+        "--depth",
+        help="number of levels of nested processes",
+        type=int,
+        default=3,
+    )
+
+    parser.add_argument(
+        "-f",
+        "--fanout",
+        help="number of children executed by each process one after another",
+        type=int,
+        default=8,
+    )
+
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        help="number of process trees that are executed in parallel",
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        "--methods",
+        help="functions that are used to execute processes",
+        nargs="+",
+        choices=METHODS,
+        default=METHODS,
+    )
+
+    parser.add_argument(
+        "-m",
+        "--modes",
+        help="interception modes to compare",
+        nargs="+",
+        choices=MODES,
+        default=MODES,
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    if not shutil.which("cc"):
+        sys.exit("C compiler is not installed")
+
+    print(
+        "Depth: {}, fanout: {}, parallel: {}, execs: {}".format(
+            args.depth,
+            args.fanout,
+            args.parallel,
+            get_number_of_execs(args.depth, args.fanout, args.parallel),
+        )
+    )
+
+    for method in args.methods:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = measure(
+                work_dir, method, args.depth, args.fanout, args.parallel, args.modes
+            )
+
+        print()
+        print(
+            "{:>14}  {:>8}  {:>8}  {:>8}  {:>8}  {:>8}  {:>8}  {:>8}  {:>10}".format(
+                method,
+                "time, s",
+                "slowdown",
+                "p50, us",
+                "p90, us",
+                "p99, us",
+                "max, us",
+                "commands",
+                "logged, KB",
+            )
+        )
+
+        for r in results:
+            print(
+                "{:>14}  {:>8.2f}  {:>8.2f}  {:>8.1f}  {:>8.1f}  {:>8.1f}  {:>8.1f}"
+                "  {:>8}  {:>10.1f}".format(
+                    r["mode"],
+                    r["time"],
+                    r["time"] / results[0]["time"],
+                    r["p50"],
+                    r["p90"],
+                    r["p99"],
+                    r["max"],
+                    r["cmds"],
+                    r["bytes"] / 1024,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure scheduling overhead of Extension.execute_in_parallel().
+
+Commands from a synthetic cmds.txt file are processed by a function
+that does nothing, so the measured time is spent on reading the file,
+pickling commands and passing them between processes.
+
+Usage: python -m benchmarks.execute_in_parallel [-n 200000] [-b 1 100 auto]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from clade.cmds import iter_cmds, join_cmd
+from clade.extensions.pid_graph import PidGraph
+
+
+def generate_cmds_file(cmds_file, number_of_cmds):
+    with open(cmds_file, "w") as fh:
+        for i in range(number_of_cmds):
+            cmd = {
+                "cwd": "/build/dir{}".format(i % 100),
+                "pid": i,
+                "which": "/usr/bin/gcc",
+                "command": [
+                    "gcc",
+                    "-c",
+                    "-O2",
+                    "-Iinclude",
+                    "-DNUMBER={}".format(i),
+                    "file{}.c".format(i),
+                    "-o",
+                    "file{}.o".format(i),
+                ],
+            }
+            fh.write(join_cmd(cmd) + "\n")
+
+
+def process_cmd(self, cmd):
+    pass
+
+
+def run(work_dir, cmds_file, number_of_cmds, batch_size, cpu_count):
+    conf = {"log_level": "ERROR", "cpu_count": cpu_count, "batch_size": batch_size}
+    ext = PidGraph(work_dir, conf)
+
+    time_start = time.time()
+    ext.execute_in_parallel(
+        iter_cmds(cmds_file), process_cmd, total_objs=number_of_cmds
+    )
+    return time.time() - time_start
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Measure scheduling overhead of Extension.execute_in_parallel()."
+    )
+
+    parser.add_argument(
+        "-n",
+        "--number",
+        help="number of commands in the synthetic cmds.txt file",
+        type=int,
+        default=200000,
+    )
+
+    parser.add_argument(
+        "-b",
+        "--batch-sizes",
+        help="batch sizes to compare ('auto' means default heuristic)",
+        nargs="+",
+        default=["1", "100", "auto"],
+    )
+
+    parser.add_argument(
+        "-j",
+        "--cpu-count",
+        help="number of worker processes",
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    # Benchmark is meaningless without multiprocessing
+    os.environ.pop("CLADE_DEBUG", None)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cmds_file = os.path.join(work_dir, "cmds.txt")
+        generate_cmds_file(cmds_file, args.number)
+
+        time_start = time.time()
+        for _ in iter_cmds(cmds_file):
+            pass
+        read_time = time.time() - time_start
+
+        print("Commands: {}, workers: {}".format(args.number, args.cpu_count))
+        print("{:>10}  {:>10}  {:>14}".format("batch", "time, s", "overhead, us"))
+        print("{:>10}  {:>10.2f}  {:>14}".format("read only", read_time, "-"))
+
+        for batch_size in args.batch_sizes:
+            delta = run(
+                work_dir,
+                cmds_file,
+                args.number,
+                None if batch_size == "auto" else int(batch_size),
+                args.cpu_count,
+            )
+
+            overhead = (delta - read_time) / args.number * 10**6
+            print("{:>10}  {:>10.2f}  {:>14.1f}".format(batch_size, delta, overhead))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure throughput and memory usage of extensions on a synthetic build.
+
+The build is generated by benchmarks.generator, and then extensions are
+executed one by one with the "profile" option. Results can be saved to
+a json file to compare them between revisions.
+
+Usage: python -m benchmarks.extensions [-n 1000] [-e SrcGraph] [--json FILE]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import orjson
+
+from benchmarks.generator import add_generator_args, get_generator
+from clade import Clade
+from clade.utils import load
+
+# Number of objects processed by each extension
+OBJECTS = {
+    "PidGraph": lambda s: s["cmds"],
+    "CmdClassifier": lambda s: s["cmds"],
+    "CC": lambda s: s["CC"],
+    "LD": lambda s: s["LD"],
+    "LN": lambda s: s["LN"],
+    "Install": lambda s: s["Install"],
+    "Alternatives": lambda s: s["LN"] + s["Install"],
+    "CmdGraph": lambda s: s["CC"] + s["LD"] + s["LN"] + s["Install"],
+    "SrcGraph": lambda s: s["CC"],
+    "Storage": lambda s: s["files"],
+}
+
+
+def run(build_dir, args):
+    generator = get_generator(build_dir, args)
+    stats = generator.generate()
+
+    work_dir = os.path.join(build_dir, "clade")
+    conf = {
+        "log_level": "ERROR",
+        "profile": True,
+        "parallel_extensions": False,
+        "cpu_count": args.cpu_count,
+        "Compiler.get_deps": not args.no_deps,
+        "Compiler.store_deps": not args.no_deps,
+        "Storage.files_to_add": [generator.src_dir, generator.include_dir],
+        "Alternatives.requires": ["LN", "Install"],
+        "CmdGraph.requires": ["CC", "LD", "LN", "Install"],
+        "SrcGraph.requires": ["CC"],
+    }
+
+    c = Clade(work_dir, generator.cmds_file, conf=conf)
+    c.parse_list(args.extensions)
+
+    meta = load(os.path.join(work_dir, "meta.json"))
+
+    results = dict()
+    for ext_name, objects in OBJECTS.items():
+        profile = meta.get(ext_name, dict()).get("profile")
+
+        if not profile:
+            continue
+
+        results[ext_name] = dict(profile)
+        results[ext_name]["objects"] = objects(stats)
+        results[ext_name]["throughput"] = objects(stats) / max(
+            profile["wall_time"], 1e-6
+        )
+
+    return stats, results
+
+
+def print_results(stats, results):
+    mb = 1024 * 1024
+
+    print(
+        "Commands: {}, compilation commands: {}, files: {}".format(
+            stats["cmds"], stats["CC"], stats["files"]
+        )
+    )
+    print(
+        "{:<14}  {:>8}  {:>8}  {:>10}  {:>8}  {:>11}".format(
+            "extension", "objects", "wall, s", "objects/s", "rss, MB", "workers, MB"
+        )
+    )
+
+    for ext_name, result in results.items():
+        print(
+            "{:<14}  {:>8}  {:>8.2f}  {:>10.0f}  {:>8.0f}  {:>11.0f}".format(
+                ext_name,
+                result["objects"],
+                result["wall_time"],
+                result["throughput"],
+                result["peak_rss"] / mb,
+                result["workers_peak_rss"] / mb,
+            )
+        )
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Measure throughput and memory usage of extensions on a synthetic build."
+    )
+
+    add_generator_args(parser)
+
+    parser.add_argument(
+        "-e",
+        "--extensions",
+        help="extensions to execute, with all their requirements",
+        nargs="+",
+        default=["CmdGraph", "SrcGraph"],
+    )
+
+    parser.add_argument(
+        "--no-deps",
+        help="do not collect dependencies of compilation commands",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--cpu-count",
+        help="number of worker processes",
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="directory where the build will be generated and kept (temporary by default)",
+        metavar="DIR",
+    )
+
+    parser.add_argument(
+        "--json",
+        help="path to the json file to save results",
+        metavar="FILE",
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    # Benchmark is meaningless without multiprocessing
+    os.environ.pop("CLADE_DEBUG", None)
+
+    if args.output:
+        stats, results = run(args.output, args)
+    else:
+        with tempfile.TemporaryDirectory() as build_dir:
+            stats, results = run(build_dir, args)
+
+    print_results(stats, results)
+
+    if args.json:
+        with open(args.json, "wb") as fh:
+            fh.write(
+                orjson.dumps(
+                    {"build": stats, "extensions": results}, option=orjson.OPT_INDENT_2
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generate a synthetic build: a source tree and a matching cmds.txt file.
+
+The build consists of a chain of nested make commands, compilation
+commands (each of them with a child assembler command), link commands that
+combine object files into libraries, and ln and install commands that copy
+header files. Source files include a random subset of header files.
+
+Usage: python -m benchmarks.generator -o DIR [-n 1000] [-m 10] [-c 100]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+
+from clade.cmds import join_cmd
+
+
+class BuildGenerator:
+    def __init__(
+        self,
+        path,
+        compile_cmds=1000,
+        link_cmds=10,
+        copies=100,
+        headers=100,
+        includes=10,
+        pid_depth=5,
+        seed=0,
+    ):
+        self.path = os.path.abspath(path)
+        self.cmds_file = os.path.join(self.path, "cmds.txt")
+
+        self.compile_cmds = compile_cmds
+        self.link_cmds = max(1, min(link_cmds, compile_cmds))
+        self.copies = min(copies, headers)
+        self.headers = max(1, headers)
+        self.includes = min(includes, self.headers)
+        self.pid_depth = max(1, pid_depth)
+
+        self.random = random.Random(seed)
+
+        self.src_dir = os.path.join(self.path, "src")
+        self.include_dir = os.path.join(self.path, "include")
+        self.obj_dir = os.path.join(self.path, "obj")
+        self.lib_dir = os.path.join(self.path, "lib")
+        self.copies_dir = os.path.join(self.path, "copies")
+
+        self.__last_id = 0
+        self.__cmds_fh = None
+
+    @staticmethod
+    def __which(program):
+        return shutil.which(program) or os.path.join("/usr/bin", program)
+
+    def generate(self):
+        """Generate source tree and cmds.txt file, and return number of
+        commands of each type."""
+        for path in (
+            self.src_dir,
+            self.include_dir,
+            self.obj_dir,
+            self.lib_dir,
+            self.copies_dir,
+        ):
+            os.makedirs(path, exist_ok=True)
+
+        self.__generate_headers()
+        self.__generate_sources()
+
+        with open(self.cmds_file, "w") as self.__cmds_fh:
+            make_id = self.__generate_makes()
+            obj_files = self.__generate_compile_cmds(make_id)
+            self.__generate_link_cmds(make_id, obj_files)
+            self.__generate_copy_cmds(make_id)
+
+        return {
+            "cmds": self.__last_id,
+            "make": self.pid_depth,
+            "CC": self.compile_cmds,
+            "AS": self.compile_cmds,
+            "LD": self.link_cmds,
+            "LN": self.copies // 2,
+            "Install": self.copies - self.copies // 2,
+            "files": self.headers + self.compile_cmds,
+        }
+
+    def __add_cmd(self, pid, which, command, cwd=None):
+        self.__last_id += 1
+
+        cmd = {
+            "cwd": cwd if cwd else self.path,
+            "pid": pid,
+            "which": which,
+            "command": command,
+        }
+        self.__cmds_fh.write(join_cmd(cmd) + "\n")
+
+        return self.__last_id
+
+    def __generate_headers(self):
+        for i in range(self.headers):
+            with open(os.path.join(self.include_dir, "h{}.h".format(i)), "w") as fh:
+                fh.write("#ifndef H{0}_H\n#define H{0}_H\n".format(i))
+                fh.write("int h{}(int x);\n".format(i))
+                fh.write("#endif\n")
+
+    def __generate_sources(self):
+        for i in range(self.compile_cmds):
+            headers = self.random.sample(range(self.headers), self.includes)
+
+            with open(os.path.join(self.src_dir, "f{}.c".format(i)), "w") as fh:
+                for h in headers:
+                    fh.write('#include "h{}.h"\n'.format(h))
+
+                fh.write("\nint f{}(int x)\n{{\n    return x + {};\n}}\n".format(i, i))
+
+    def __generate_makes(self):
+        make = self.__which("make")
+        pid = 0
+
+        # Deep chain of nested make commands
+        for i in range(self.pid_depth):
+            pid = self.__add_cmd(pid, make, ["make", "-C", "level{}".format(i)])
+
+        return pid
+
+    def __generate_compile_cmds(self, make_id):
+        gcc = self.__which("gcc")
+        assembler = self.__which("as")
+        obj_files = []
+
+        for i in range(self.compile_cmds):
+            src_file = os.path.join("src", "f{}.c".format(i))
+            obj_file = os.path.join("obj", "f{}.o".format(i))
+            obj_files.append(obj_file)
+
+            gcc_id = self.__add_cmd(
+                make_id,
+                gcc,
+                ["gcc", "-c", "-O2", "-Iinclude", "-DN={}".format(i), src_file]
+                + ["-o", obj_file],
+            )
+
+            # Child commands of parsed commands are filtered out by PidGraph
+            self.__add_cmd(
+                gcc_id,
+                assembler,
+                ["as", "--64", "-o", obj_file, "/tmp/cc{}.s".format(i)],
+            )
+
+        return obj_files
+
+    def __generate_link_cmds(self, make_id, obj_files):
+        ld = self.__which("ld")
+        chunk = -(-len(obj_files) // self.link_cmds)
+
+        for i in range(self.link_cmds):
+            lib_file = os.path.join("lib", "lib{}.so".format(i))
+            self.__add_cmd(
+                make_id,
+                ld,
+                ["ld", "-shared", "-o", lib_file]
+                + obj_files[i * chunk : (i + 1) * chunk],
+            )
+
+    def __generate_copy_cmds(self, make_id):
+        ln = self.__which("ln")
+        install = self.__which("install")
+
+        for i in range(self.copies):
+            header = os.path.join(self.include_dir, "h{}.h".format(i))
+            copy = os.path.join(self.copies_dir, "h{}.h".format(i))
+
+            if os.path.lexists(copy):
+                os.remove(copy)
+
+            # Alternatives extension checks that copies are identical
+            if i % 2:
+                shutil.copy(header, copy)
+                self.__add_cmd(make_id, install, ["install", "-m", "644", header, copy])
+            else:
+                os.symlink(header, copy)
+                self.__add_cmd(make_id, ln, ["ln", "-s", header, copy])
+
+
+def add_generator_args(parser):
+    parser.add_argument(
+        "-n",
+        "--compile-cmds",
+        help="number of compilation commands",
+        type=int,
+        default=1000,
+    )
+    parser.add_argument(
+        "-m",
+        "--link-cmds",
+        help="number of link commands",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "-c",
+        "--copies",
+        help="number of header files copied by ln and install commands",
+        type=int,
+        default=100,
+    )
+    parser.add_argument(
+        "--headers",
+        help="number of header files",
+        type=int,
+        default=100,
+    )
+    parser.add_argument(
+        "--includes",
+        help="number of header files included by each source file",
+        type=int,
+        default=10,
+    )
+    parser.add_argument(
+        "--pid-depth",
+        help="depth of the chain of nested make commands",
+        type=int,
+        default=5,
+    )
+
+
+def get_generator(path, args):
+    return BuildGenerator(
+        path,
+        compile_cmds=args.compile_cmds,
+        link_cmds=args.link_cmds,
+        copies=args.copies,
+        headers=args.headers,
+        includes=args.includes,
+        pid_depth=args.pid_depth,
+    )
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic source tree and a matching cmds.txt file."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="directory where the build will be generated",
+        metavar="DIR",
+        required=True,
+    )
+    add_generator_args(parser)
+    args = parser.parse_args(args)
+
+    stats = get_generator(args.output, args).generate()
+
+    print("Generated {!r}:".format(os.path.join(args.output, "cmds.txt")))
+    for key, value in stats.items():
+        print("  {}: {}".format(key, value))
+
+
+if __name__ == "__main__":
+    main()
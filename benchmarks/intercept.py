@@ -0,0 +1,260 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure overhead of intercepting exec calls at high parallelism.
+
+make executes a synthetic Makefile with many targets in parallel, and each
+target executes a number of trivial commands. The build is executed without
+interception and under each interception mode, and the difference between
+their durations is divided by the number of executed commands.
+
+Time needed to set up wrappers is measured separately: for all executables
+from PATH and only for the ones that match "which_list" options, both when
+the directory with wrappers is created and when it is reused from the cache.
+
+Compression of logs is measured by intercepting the build together with
+environment variables and open() calls, with and without
+"Intercept.compress_logs" option: build time, total size of cmds.txt,
+envs.txt and open.txt files, and time of reading all of them.
+
+Usage: python -m benchmarks.intercept [-j 128] [-n 100] [-m libinterceptor wrappers]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from clade.cmds import iter_cmds, number_of_cmds
+from clade.compression import open_file
+from clade.envs import iter_envs
+from clade.intercept import intercept
+from clade.utils import merge_preset_to_conf
+
+MODES = ["libinterceptor", "wrappers", "preprocess"]
+
+
+def generate_makefile(makefile, jobs, number_of_cmds):
+    with open(makefile, "w") as fh:
+        fh.write("all: {}\n".format(" ".join("t{}".format(i) for i in range(jobs))))
+
+        for i in range(jobs):
+            fh.write("t{}:\n".format(i))
+
+            for j in range(number_of_cmds):
+                # Commands are searched in PATH, so wrappers can intercept them
+                fh.write("\ttrue {} {}\n".format(i, j))
+
+
+def run(work_dir, command, mode):
+    if not mode:
+        time_start = time.time()
+        subprocess.check_call(command, cwd=work_dir)
+        return time.time() - time_start, 0
+
+    output = os.path.join(work_dir, "cmds.txt")
+    conf = {
+        "log_level": "ERROR",
+        "Intercept.preprocess": mode == "preprocess",
+        # Trivial commands are not matched by "which_list" options
+        "Wrapper.filter_path_wrappers": False,
+    }
+
+    time_start = time.time()
+    intercept(
+        command,
+        cwd=work_dir,
+        output=output,
+        conf=conf,
+        use_wrappers=mode == "wrappers",
+    )
+    delta = time.time() - time_start
+
+    return delta, number_of_cmds(output)
+
+
+def measure_wrappers_setup(work_dir):
+    """Measure time of a build that executes a single command with wrappers."""
+    output = os.path.join(work_dir, "cmds.txt")
+    results = []
+
+    for filtered in [False, True]:
+        cache_dir = os.path.join(work_dir, "cache-{}".format(filtered))
+        conf = merge_preset_to_conf("base", {"log_level": "ERROR"})
+        conf["Wrapper.filter_path_wrappers"] = filtered
+        conf["Wrapper.cache_dir"] = cache_dir
+
+        times = []
+        for _ in range(2):
+            time_start = time.time()
+            intercept(["true"], cwd=work_dir, output=output, conf=conf)
+            times.append(time.time() - time_start)
+
+        wrappers_dir = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        results.append(
+            ("filtered" if filtered else "all", len(os.listdir(wrappers_dir)), *times)
+        )
+
+    return results
+
+
+def measure_compression(work_dir, command):
+    """Measure build time, size and reading time of plain and compressed logs."""
+    results = []
+
+    for compress in [False, True]:
+        output_dir = os.path.join(work_dir, "compress-{}".format(compress))
+        os.makedirs(output_dir)
+        output = os.path.join(output_dir, "cmds.txt")
+        files = [os.path.join(output_dir, f) for f in ("envs.txt", "open.txt")]
+
+        time_start = time.time()
+        intercept(
+            command,
+            cwd=work_dir,
+            output=output,
+            conf={"log_level": "ERROR", "Intercept.compress_logs": compress},
+            use_wrappers=False,
+            intercept_open=True,
+            intercept_envs=True,
+        )
+        build_time = time.time() - time_start
+
+        # Trivial commands may not open any files
+        files = [f for f in files if os.path.exists(f)]
+        size = sum(os.path.getsize(f) for f in [output] + files)
+
+        time_start = time.time()
+        for _ in iter_cmds(output):
+            pass
+        for _ in iter_envs(files[0]):
+            pass
+        for f in files[1:]:
+            with open_file(f) as fh:
+                for _ in fh:
+                    pass
+        read_time = time.time() - time_start
+
+        results.append(("zlib" if compress else "plain", build_time, size, read_time))
+
+    return results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Measure overhead of intercepting exec calls at high parallelism."
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of targets that are executed in parallel",
+        type=int,
+        default=os.cpu_count() * 4,
+    )
+
+    parser.add_argument(
+        "-n",
+        "--number",
+        help="number of commands executed by each target",
+        type=int,
+        default=100,
+    )
+
+    parser.add_argument(
+        "-m",
+        "--modes",
+        help="interception modes to compare",
+        nargs="+",
+        choices=MODES,
+        default=MODES,
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    if not shutil.which("make"):
+        sys.exit("make is not installed")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        generate_makefile(os.path.join(work_dir, "Makefile"), args.jobs, args.number)
+        command = ["make", "-s", "-j{}".format(args.jobs)]
+
+        base_time, _ = run(work_dir, command, None)
+
+        print("Jobs: {}, commands: {}".format(args.jobs, args.jobs * args.number))
+        print(
+            "{:>14}  {:>10}  {:>10}  {:>14}".format(
+                "mode", "time, s", "commands", "overhead, us"
+            )
+        )
+        print("{:>14}  {:>10.2f}  {:>10}  {:>14}".format("none", base_time, "-", "-"))
+
+        for mode in args.modes:
+            delta, cmds = run(work_dir, command, mode)
+            overhead = (delta - base_time) / max(cmds, 1) * 10**6
+
+            print(
+                "{:>14}  {:>10.2f}  {:>10}  {:>14.1f}".format(
+                    mode, delta, cmds, overhead
+                )
+            )
+
+        if "libinterceptor" in args.modes:
+            print()
+            print(
+                "{:>14}  {:>10}  {:>12}  {:>12}".format(
+                    "logs", "time, s", "size, KB", "read, s"
+                )
+            )
+
+            for name, build_time, size, read_time in measure_compression(
+                work_dir, command
+            ):
+                print(
+                    "{:>14}  {:>10.2f}  {:>12.1f}  {:>12.2f}".format(
+                        name, build_time, size / 1024, read_time
+                    )
+                )
+
+        if "wrappers" in args.modes:
+            print()
+            print(
+                "{:>14}  {:>10}  {:>12}  {:>12}".format(
+                    "wrappers", "number", "create, ms", "reuse, ms"
+                )
+            )
+
+            for name, number, create_time, reuse_time in measure_wrappers_setup(
+                work_dir
+            ):
+                print(
+                    "{:>14}  {:>10}  {:>12.1f}  {:>12.1f}".format(
+                        name, number, create_time * 1000, reuse_time * 1000
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
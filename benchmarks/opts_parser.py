@@ -0,0 +1,229 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare parsing of command options by option tables and by regexes.
+
+A corpus of synthetic commands, similar to the ones from Linux kernel builds
+(compilation, assembler and linker commands), is parsed by option tables
+from clade.extensions.opts and by the previous implementation, which tested
+membership in per-type lists and matched arguments by regexes. Options
+of compilation commands are also filtered for clang both ways. Results of
+both implementations are compared, and time per command is printed.
+
+Usage: python -m benchmarks.opts_parser [-n 1000000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from clade.extensions.opts import (
+    clang_supported_opts,
+    filter_opts_for_clang,
+    get_option_table,
+    include_opts,
+    requires_mult_values,
+    requires_value,
+)
+
+# Number of distinct commands, which are repeated to get the whole corpus
+DISTINCT_CMDS = 20000
+
+
+def generate_cmds(number, seed=0):
+    """Generate list of distinct commands with their types."""
+    rnd = random.Random(seed)
+    cmds = []
+
+    for i in range(number):
+        src = "drivers/dir{}/file{}".format(i % 97, i)
+        kind = rnd.random()
+
+        if kind < 0.8:
+            cmd_type = "CC"
+            command = ["gcc", "-Wp,-MMD,{}.o.d".format(src), "-nostdinc"]
+            command += ["-isystem", "/usr/lib/gcc/x86_64-linux-gnu/12/include"]
+            command += ["-I./arch/x86/include", "-I./include", "-I", "./usr/include"]
+            command += ["-include", "./include/linux/kconfig.h"]
+            command += ["-D__KERNEL__", "-DMODULE", "-std=gnu11", "-O2", "-m64"]
+            command += ["-fno-strict-aliasing", "-fno-common", "-mcmodel=kernel"]
+            command += ["-W" + w for w in rnd.sample(["all", "extra", "undef"], 2)]
+            command += ["-DKBUILD_BASENAME=file{}".format(i), "-c"]
+            command += ["-o", src + ".o", src + ".c"]
+        elif kind < 0.9:
+            cmd_type = "AS"
+            command = ["as", "--64", "-I", "./include", "-o", src + ".o", src + ".s"]
+        else:
+            cmd_type = "LD"
+            command = ["ld", "-m", "elf_x86_64", "-z", "max-page-size=0x200000"]
+            command += ["-r", "-o", src + ".a"]
+            command += ["{}.o".format(src[:-1] + str(j)) for j in range(10)]
+
+        cmds.append((cmd_type, command))
+
+    return cmds
+
+
+def legacy_parse(args, cmd_type):
+    """Parse options like Common.parse_cmd did before option tables."""
+    parsed = {"in": [], "out": [], "opts": []}
+
+    if cmd_type not in requires_value:
+        raise RuntimeError("Command type '{}' is not supported".format(cmd_type))
+
+    opts = iter(args)
+
+    for opt in opts:
+        if opt in requires_mult_values[cmd_type].keys():
+            vals = []
+            for _ in range(requires_mult_values[cmd_type][opt]):
+                vals.append(next(opts))
+            parsed["opts"].extend([opt] + vals)
+        elif opt in requires_value[cmd_type]:
+            val = next(opts)
+            if opt == "-o":
+                parsed["out"].append(os.path.normpath(val))
+            else:
+                parsed["opts"].extend([opt, val])
+        elif re.search(r"^-", opt):
+            parsed["opts"].append(opt)
+        else:
+            parsed["in"].append(opt)
+
+    return parsed
+
+
+legacy_i_regex = re.compile("(" + "|".join(include_opts) + ")=?(.*)")
+legacy_clang_s_regex = re.compile("|".join(clang_supported_opts))
+
+
+def legacy_filter_opts_for_clang(opts, get_storage_path=None):
+    """Filter options like filter_opts_for_clang() did before option tables."""
+    filtered_opts = []
+
+    is_isysroot = any(opt.startswith("-isysroot") for opt in opts)
+
+    opts = iter(opts)
+    for opt in opts:
+        if not legacy_clang_s_regex.match(opt):
+            continue
+
+        m = legacy_i_regex.match(opt)
+
+        if not m:
+            filtered_opts.append(opt)
+
+            if opt in requires_value["CC"]:
+                filtered_opts.append(next(opts))
+
+            continue
+
+        name = m.group(1)
+        path = m.group(2)
+
+        if path:
+            if (
+                get_storage_path
+                and os.path.isabs(path)
+                and (not is_isysroot or name == "-isysroot")
+            ):
+                opt = opt.replace(path, get_storage_path(path))
+
+            filtered_opts.append(opt)
+        elif opt in requires_value["CC"]:
+            filtered_opts.append(opt)
+            path = next(opts)
+
+            if (
+                get_storage_path
+                and os.path.isabs(path)
+                and (not is_isysroot or name == "-isysroot")
+            ):
+                path = get_storage_path(path)
+
+            filtered_opts.append(path)
+        else:
+            raise RuntimeError("Can't process CIF options")
+
+    return filtered_opts
+
+
+def measure(total, parse, filter_opts):
+    """Parse and filter options of the whole corpus, and get time in seconds."""
+    cmds = generate_cmds(min(total, DISTINCT_CMDS))
+    results = []
+
+    start = time.perf_counter()
+    for i in range(total):
+        cmd_type, command = cmds[i % len(cmds)]
+        parsed = parse(command[1:], cmd_type)
+
+        if cmd_type == "CC":
+            parsed["clang"] = filter_opts(parsed["opts"])
+
+        if i < len(cmds):
+            results.append(parsed)
+
+    return time.perf_counter() - start, results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Compare parsing of command options by option tables and by regexes."
+    )
+
+    parser.add_argument(
+        "-n",
+        "--number",
+        help="number of commands in the corpus",
+        type=int,
+        default=1000000,
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    legacy_time, legacy_results = measure(
+        args.number, legacy_parse, legacy_filter_opts_for_clang
+    )
+    table_time, table_results = measure(
+        args.number,
+        lambda command, cmd_type: get_option_table(cmd_type).parse(command),
+        filter_opts_for_clang,
+    )
+
+    if legacy_results != table_results:
+        sys.exit("Results of parsers are different")
+
+    print("Commands: {}".format(args.number))
+    print("{:>10}  {:>8}  {:>12}".format("parser", "time, s", "per cmd, us"))
+
+    for name, t in [("regex", legacy_time), ("table", table_time)]:
+        print("{:>10}  {:>8.2f}  {:>12.2f}".format(name, t, t / args.number * 1e6))
+
+    print("Speedup: {:.2f}".format(legacy_time / table_time))
+
+
+if __name__ == "__main__":
+    main()
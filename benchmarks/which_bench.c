@@ -0,0 +1,64 @@
+/*
+ * Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+ * Ivannikov Institute for System Programming of the Russian Academy of Sciences
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Resolve executables in PATH by which() from the interceptor ITERATIONS
+ * times and print mean time of a single resolution in nanoseconds for
+ * each of them. Cache is used if CLADE_WHICH_CACHE is set.
+ *
+ * Usage: which_bench ITERATIONS NAME...
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#include "which.h"
+
+static double now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1e9 + ts.tv_nsec;
+}
+
+int main(int argc, char **argv) {
+    if (argc < 3) {
+        fprintf(stderr, "Usage: %s ITERATIONS NAME...\n", argv[0]);
+        return EXIT_FAILURE;
+    }
+
+    int iterations = atoi(argv[1]);
+
+    for (int i = 2; i < argc; i++) {
+        double start = now_ns();
+
+        for (int j = 0; j < iterations; j++) {
+            char *file = which(argv[i]);
+
+            if (!file) {
+                fprintf(stderr, "%s is not found in PATH\n", argv[i]);
+                return EXIT_FAILURE;
+            }
+
+            free(file);
+        }
+
+        printf("%s %.1f\n", argv[i], (now_ns() - start) / iterations);
+    }
+
+    return EXIT_SUCCESS;
+}
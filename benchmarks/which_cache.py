@@ -0,0 +1,161 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure cost of searching executables in PATH by the interceptor.
+
+Small C program (which_bench.c) is compiled together with which.c from
+the interceptor, and resolves each executable many times, with and without
+the cache of resolved paths. Empty directories can be added to the
+beginning of PATH to simulate environments with long PATH.
+
+Usage: python -m benchmarks.which_cache [-n 10000] [--extra-dirs 20] [gcc make]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from clade.abstract import WHICH_CACHE_SLOT_SIZE, WHICH_CACHE_SLOTS
+
+UNIX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "clade", "intercept", "unix"
+)
+BENCH_SRC = os.path.join(os.path.dirname(__file__), "which_bench.c")
+
+
+def build_bench(work_dir):
+    """Compile the program that resolves executables by which() from the interceptor."""
+    bench = os.path.join(work_dir, "which_bench")
+
+    subprocess.check_call(
+        [
+            "cc",
+            "-O2",
+            "-I",
+            UNIX_DIR,
+            "-o",
+            bench,
+            BENCH_SRC,
+            os.path.join(UNIX_DIR, "which.c"),
+        ]
+    )
+
+    return bench
+
+
+def measure(work_dir, names, iterations, extra_dirs):
+    """Get mean time of resolving each executable with and without the cache.
+
+    Returns:
+        Dictionary with names of executables as keys and pairs of times
+        in nanoseconds as values
+    """
+    bench = build_bench(work_dir)
+
+    dirs = [os.path.join(work_dir, "empty{}".format(i)) for i in range(extra_dirs)]
+    for d in dirs:
+        os.makedirs(d)
+
+    env = dict(os.environ)
+    env.pop("CLADE_WHICH_CACHE", None)
+    env["PATH"] = os.pathsep.join(dirs + [env.get("PATH", "")])
+
+    cache_file = os.path.join(work_dir, "which.cache")
+    with open(cache_file, "wb") as fh:
+        fh.truncate(WHICH_CACHE_SLOTS * WHICH_CACHE_SLOT_SIZE)
+
+    results = {name: [] for name in names}
+
+    for cache in [False, True]:
+        if cache:
+            env["CLADE_WHICH_CACHE"] = cache_file
+
+        output = subprocess.check_output(
+            [bench, str(iterations)] + names, env=env, universal_newlines=True
+        )
+
+        for line in output.splitlines():
+            name, ns = line.split()
+            results[name].append(float(ns))
+
+    return results
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description="Measure cost of searching executables in PATH by the interceptor."
+    )
+
+    parser.add_argument(
+        "names",
+        help="names of executables to search",
+        nargs="*",
+        default=["gcc", "make", "sh", "as", "ld"],
+    )
+
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        help="number of times each executable is searched",
+        type=int,
+        default=10000,
+    )
+
+    parser.add_argument(
+        "--extra-dirs",
+        help="number of empty directories added to the beginning of PATH",
+        type=int,
+        default=0,
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    if not args:
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    if not shutil.which("cc"):
+        sys.exit("C compiler is not installed")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = measure(work_dir, args.names, args.iterations, args.extra_dirs)
+
+    print(
+        "PATH directories: {}".format(
+            len(os.environ["PATH"].split(os.pathsep)) + args.extra_dirs
+        )
+    )
+    print(
+        "{:>14}  {:>12}  {:>12}  {:>8}".format(
+            "name", "which, ns", "cached, ns", "speedup"
+        )
+    )
+
+    for name, (uncached, cached) in results.items():
+        print(
+            "{:>14}  {:>12.1f}  {:>12.1f}  {:>8.1f}".format(
+                name, uncached, cached, uncached / cached
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,14 +17,18 @@ import json
 import os
 import shutil
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List
 
 from clade.utils import get_logger, merge_preset_to_conf
 from clade.intercept import intercept
 from clade.extensions.abstract import Extension
+from clade.extensions.utils import CPUBudget
+from clade.live import LiveParser
 from clade.types.nested_dict import nested_dict, traverse
-from clade.cmds import iter_cmds, iter_cmds_by_which
-from clade.envs import iter_envs
+from clade.cmds import get_cmd_by_id, iter_cmds, iter_cmds_by_which
+from clade.envs import get_envs_index, iter_envs
+from clade.fingerprints import get_changed_ids
 
 
 class Clade:
@@ -157,6 +161,7 @@ class Clade:
         use_wrappers=False,
         intercept_open=False,
         intercept_envs=False,
+        live_extensions=None,
     ):
         """Execute intercepting of build commands.
 
@@ -165,6 +170,8 @@ class Clade:
             cwd: A path to the directory where build command will be executed
             append: A boolean allowing to append intercepted commands to already existing file with commands
             use_wrappers: A boolean enabling intercepting mode based on wrappers
+            live_extensions: A list of extensions that will be executed after the build.
+                If it is specified, commands are parsed while the build is still running
 
         Returns:
             0 if everything went successful and error code otherwise
@@ -174,16 +181,40 @@ class Clade:
 
         self.conf["build_command"] = command
         self.conf["use_wrappers"] = use_wrappers
-        self.conf["build_exit_code"] = intercept(
-            command=command,
-            cwd=cwd,
-            output=self.cmds_file,
-            append=append,
-            use_wrappers=use_wrappers,
-            intercept_open=intercept_open,
-            intercept_envs=intercept_envs,
-            conf=self.conf,
-        )
+
+        intercept_conf = self.conf
+        live_parser = None
+
+        if live_extensions:
+            self.__prepare_to_parse()
+            live_parser = LiveParser(self, live_extensions, append=append)
+
+            # Intercepted commands must be written to the cmds file during the build
+            intercept_conf = dict(self.conf)
+            if not intercept_conf.get("Intercept.collect_interval"):
+                intercept_conf["Intercept.collect_interval"] = LiveParser.interval
+
+        try:
+            if live_parser:
+                live_parser.start()
+
+            self.conf["build_exit_code"] = intercept(
+                command=command,
+                cwd=cwd,
+                output=self.cmds_file,
+                append=append,
+                use_wrappers=use_wrappers,
+                intercept_open=intercept_open,
+                intercept_envs=intercept_envs,
+                conf=intercept_conf,
+            )
+        finally:
+            if live_parser:
+                live_parser.stop()
+
+                # Working directory was cleaned during initialization, and now
+                # it contains results of parsing during the build
+                self.conf["force"] = False
 
         return self.conf["build_exit_code"]
 
@@ -242,6 +273,10 @@ class Clade:
 
         # Get list of extension objects to parse, including implicitly required ones
         ext_objs = self.__get_ext_obj_list(ext_names)
+        ext_objs_to_parse = []
+
+        # Names of extensions whose results will be changed by new commands
+        outdated_ext_names = set()
 
         for ext_obj in ext_objs:
             ext_obj.debug("Extension requirements: {!r}".format(ext_obj.requires))
@@ -255,13 +290,131 @@ class Clade:
             # Check that working directory was creating with the extension of correct version
             ext_obj.check_ext_version()
 
-            if ext_obj.is_parsed():
-                ext_obj.check_conf_consistency()
-            else:
+            if not ext_obj.is_parsed():
+                ext_objs_to_parse.append(ext_obj)
+                continue
+
+            ext_obj.check_conf_consistency()
+
+            # New commands were appended to the cmds file
+            if ext_obj.is_outdated(self.cmds_file):
+                ext_objs_to_parse.append(ext_obj)
+                outdated_ext_names.add(ext_obj.name)
+            elif outdated_ext_names.intersection(ext_obj.requires):
+                ext_obj.warning(
+                    "Results are outdated, since required extensions have parsed "
+                    "new commands. Clean its working directory to parse them again"
+                )
+                outdated_ext_names.add(ext_obj.name)
+
+        if self.conf.get("parallel_extensions") and not os.environ.get("CLADE_DEBUG"):
+            self.__parse_in_parallel(ext_objs_to_parse)
+        else:
+            for ext_obj in ext_objs_to_parse:
                 ext_obj.parse(self.cmds_file)
 
+        if self.conf.get("profile"):
+            self.__print_profile(ext_objs_to_parse)
+
         return [e for e in ext_objs if e.name in ext_names]
 
+    def __print_profile(self, ext_objs):
+        """Print resources used by each executed extension."""
+        header = [
+            "Extension",
+            "Wall, s",
+            "CPU, s",
+            "Subproc CPU, s",
+            "Peak RSS, MB",
+            "Workers RSS, MB",
+            "Files",
+            "Read, MB",
+            "Written, MB",
+        ]
+        rows = []
+        mb = 1024 * 1024
+
+        for ext_obj in ext_objs:
+            profile = ext_obj.ext_meta.get("profile")
+
+            if not profile:
+                continue
+
+            rows.append(
+                [
+                    ext_obj.name,
+                    "{:.1f}".format(profile["wall_time"]),
+                    "{:.1f}".format(profile["cpu_time"]),
+                    "{:.1f}".format(profile["subprocess_cpu_time"]),
+                    "{:.0f}".format(profile["peak_rss"] / mb),
+                    "{:.0f}".format(profile["workers_peak_rss"] / mb),
+                    str(profile["files_created"]),
+                    "{:.1f}".format(profile["bytes_read"] / mb),
+                    "{:.1f}".format(profile["bytes_written"] / mb),
+                ]
+            )
+
+        if not rows:
+            return
+
+        # Sort extensions by wall time, so the slowest ones are on top
+        rows.sort(key=lambda row: float(row[1]), reverse=True)
+
+        widths = [
+            max(len(row[i]) for row in [header] + rows) for i in range(len(header))
+        ]
+
+        self.logger.info("Resources used by extensions:")
+        for row in [header] + rows:
+            self.logger.info(
+                "  ".join(
+                    (cell.ljust if i == 0 else cell.rjust)(widths[i])
+                    for i, cell in enumerate(row)
+                )
+            )
+
+    def __parse_in_parallel(self, ext_objs):
+        """Execute parse() method of extensions that do not depend on each other
+        at the same time.
+
+        Extensions are executed in separate threads, and share the number
+        of CPU cores specified by "cpu_count" option.
+        """
+        cpu_budget = CPUBudget(self.conf.get("cpu_count") or os.cpu_count())
+        not_started = {e.name: e for e in ext_objs}
+        running = dict()
+
+        with ThreadPoolExecutor(max_workers=cpu_budget.total) as p:
+            while not_started or running:
+                for ext_obj in list(not_started.values()):
+                    if any(
+                        r in not_started or r in running.values()
+                        for r in ext_obj.requires
+                    ):
+                        continue
+
+                    ext_obj.debug("All required extensions are parsed")
+                    ext_obj.cpu_budget = cpu_budget
+
+                    f = p.submit(ext_obj.parse, self.cmds_file)
+                    running[f] = ext_obj.name
+                    del not_started[ext_obj.name]
+
+                if not running:
+                    raise RuntimeError(
+                        "Extensions have circular requirements: {}".format(
+                            ", ".join(not_started)
+                        )
+                    )
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for f in done:
+                    del running[f]
+
+                    # Do not start any new extensions if parsing has failed
+                    f.result()
+
     def __get_ext_obj_list(self, ext_names):
         """Return correctly initialized list of extension objects
         for the given list of extension names.
@@ -367,11 +520,7 @@ class Clade:
 
     def get_raw_cmd_by_id(self, cmd_id: int):
         """Get raw command by its identifier."""
-        for cmd in iter_cmds(self.cmds_file):
-            if cmd["id"] == cmd_id:
-                return cmd
-
-        return RuntimeError("No command with id {}".format(cmd_id))
+        return get_cmd_by_id(self.cmds_file, cmd_id)
 
     def get_envs(self):
         """Get an iterator over all environment variables."""
@@ -380,20 +529,28 @@ class Clade:
 
     def get_envs_by_id(self, cmd_id: int):
         """Get environment variables by its intercepted command identifier."""
-        for envs in iter_envs(os.path.join(self.work_dir, "envs.txt")):
-            if envs["id"] == cmd_id:
-                return envs["envs"]
-
-        raise RuntimeError("No envs with id {}".format(cmd_id))
+        index = get_envs_index(os.path.join(self.work_dir, "envs.txt"))
+        return index.get_envs(int(cmd_id))
 
     def get_env_value_by_id(self, cmd_id: int, name: str):
         """Get environment variable by its intercepted command identifier and name."""
-        envs = self.get_envs_by_id(cmd_id)
-        if name in envs:
-            return envs[name]
-        else:
+        index = get_envs_index(os.path.join(self.work_dir, "envs.txt"))
+        value = index.get_env_value(int(cmd_id), name)
+
+        if value is None:
             raise RuntimeError("No envs with id {} and name {}".format(cmd_id, name))
 
+        return value
+
+    def get_changed_cmd_ids(self, old_cmds_file: str):
+        """Get ids of unparsed commands that are new or have changed inputs.
+
+        Commands are compared with the ones from old_cmds_file, which was
+        intercepted during the previous build. Fingerprints of input files
+        must be recorded during both builds ("Intercept.fingerprints" option).
+        """
+        return get_changed_ids(old_cmds_file, self.cmds_file)
+
     def get_cmds(self, with_opts=False, with_raw=False):
         """Get list with all parsed commands."""
         return self.CmdGraph.load_all_cmds(with_opts=with_opts, with_raw=with_raw)
@@ -123,6 +123,16 @@ def parse_args(args):
         "--cif",
         help="name or path of the CIF to use",
     )
+    parser.add_argument(
+        "--profile",
+        help="measure resources used by each extension and print them at the end",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--live",
+        help="parse intercepted commands while the build is still running",
+        action="store_true",
+    )
     parser.add_argument(
         dest="command",
         nargs=argparse.REMAINDER,
@@ -165,6 +175,9 @@ def prepare_conf(args):
 
     conf["Info.cif"] = args.cif if args.cif else conf.get("Info.cif", "cif")
 
+    if args.profile:
+        conf["profile"] = True
+
     return conf
 
 
@@ -198,6 +211,10 @@ def main(sys_args=sys.argv[1:]):
             c.logger.error("Build command is missing")
             sys.exit(-1)
 
+        live_extensions = None
+        if args.live and not args.intercept:
+            live_extensions = args.extension if args.extension else c.conf["extensions"]
+
         c.logger.info("Starting build")
         build_time_start = time.time()
         build_exit_code = c.intercept(
@@ -206,6 +223,7 @@ def main(sys_args=sys.argv[1:]):
             append=args.append,
             intercept_open=args.intercept_open,
             intercept_envs=args.intercept_envs,
+            live_extensions=live_extensions,
         )
 
         build_delta = datetime.timedelta(seconds=(time.time() - build_time_start))
@@ -16,13 +16,27 @@
 import abc
 import os
 import shlex
+import struct
 import subprocess
 import tempfile
+import threading
 
-from clade.cmds import get_last_id
-from clade.utils import get_logger
+from clade.cmds import get_last_id, join_cmd
+from clade.compression import move_to_file
+from clade.fingerprints import (
+    dump_open_fingerprints,
+    get_fingerprints_file,
+    get_open_fingerprints_file,
+)
+from clade.journal import Journal
+from clade.utils import get_logger, get_which_list
 from clade.server import PreprocessServer
 
+# Number and size of slots in the file with cached paths to executables,
+# which must match values from intercept/unix/which.h
+WHICH_CACHE_SLOTS = 4096
+WHICH_CACHE_SLOT_SIZE = 512
+
 
 class Intercept(metaclass=abc.ABCMeta):
     """Object for intercepting and parsing build commands.
@@ -39,6 +53,10 @@ class Intercept(metaclass=abc.ABCMeta):
         RuntimeError: Clade installation is corrupted, or intercepting process failed
     """
 
+    # Intercepted processes write records to journals in arbitrary order,
+    # and they are moved to output files in order of their ids after the build
+    use_journal = True
+
     def __init__(
         self,
         command,
@@ -54,12 +72,18 @@ class Intercept(metaclass=abc.ABCMeta):
         self.output = os.path.abspath(output)
         self.output_open = os.path.join(os.path.dirname(self.output), "open.txt")
         self.output_envs = os.path.join(os.path.dirname(self.output), "envs.txt")
+        self.output_fingerprints = get_fingerprints_file(self.output)
+        self.output_open_fingerprints = get_open_fingerprints_file(self.output)
         self.append = append
         self.intercept_open = intercept_open
         self.intercept_envs = intercept_envs
         self.conf = conf if conf else dict()
+        self.compress = self.conf.get("Intercept.compress_logs")
+        self.fingerprints = self.conf.get("Intercept.fingerprints")
 
         self.clade_if_file = None
+        self.which_cache_file = None
+        self.last_id = 0
         self.logger = get_logger("Intercept", conf=self.conf)
         self.env = self._setup_env()
 
@@ -70,50 +94,231 @@ class Intercept(metaclass=abc.ABCMeta):
                 os.remove(self.output_open)
             if os.path.exists(self.output_envs):
                 os.remove(self.output_envs)
+            if os.path.exists(self.output_fingerprints):
+                os.remove(self.output_fingerprints)
+            if os.path.exists(self.output_open_fingerprints):
+                os.remove(self.output_open_fingerprints)
+
+        self.journals = self.__create_journals()
+        self.__collector = None
+        self.__collector_stop = threading.Event()
+
+    def __create_journals(self):
+        if not self.use_journal:
+            return []
+
+        # Placeholder keeps ids of the following commands if some record is lost
+        placeholder = {"cwd": "", "pid": 0, "which": "", "command": []}
+
+        journals = [
+            Journal(
+                self.__get_journal_file(self.output),
+                self.output,
+                last_id=self.last_id,
+                placeholder=(join_cmd(placeholder) + "\n").encode("utf-8"),
+                compress=self.compress,
+                conf=self.conf,
+            )
+        ]
+
+        if self.intercept_envs:
+            journals.append(
+                Journal(
+                    self.__get_journal_file(self.output_envs),
+                    self.output_envs,
+                    last_id=self.last_id,
+                    terminator=b"\n\n",
+                    placeholder=b"\n",
+                    compress=self.compress,
+                    conf=self.conf,
+                )
+            )
+
+        if self.fingerprints:
+            journals.append(
+                Journal(
+                    self.__get_journal_file(self.output_fingerprints),
+                    self.output_fingerprints,
+                    last_id=self.last_id,
+                    compress=self.compress,
+                    conf=self.conf,
+                )
+            )
+
+        # Journals can be left by a previous interrupted run
+        for path in [j.path for j in journals] + [self.__get_open_file()]:
+            if path != self.output_open and os.path.exists(path):
+                os.remove(path)
+
+        return journals
+
+    def __get_open_file(self):
+        # Order of open() calls is not important, so they are written
+        # to the output file directly, unless it should be compressed
+        if self.compress and self.use_journal:
+            return self.output_open + ".journal"
+
+        return self.output_open
+
+    def __get_journal_file(self, output):
+        if not self.use_journal:
+            return output
+
+        return output + ".journal"
+
+    def _start_collecting_journals(self):
+        """Periodically move records from journals to output files during the build.
+
+        It allows to follow output files while the build is still running.
+        Interval in seconds is specified by "Intercept.collect_interval" option.
+        """
+        interval = self.conf.get("Intercept.collect_interval")
+
+        if not interval or not self.journals:
+            return
+
+        def collect():
+            while not self.__collector_stop.wait(interval):
+                for journal in self.journals:
+                    journal.collect()
+
+        self.__collector = threading.Thread(target=collect, daemon=True)
+        self.__collector.start()
+
+    def _collect_journals(self):
+        """Move records of intercepted commands from journals to output files."""
+        if self.__collector:
+            self.__collector_stop.set()
+            self.__collector.join()
+            self.__collector = None
+
+        for journal in self.journals:
+            journal.close()
+
+        if self.__get_open_file() != self.output_open:
+            move_to_file(
+                self.__get_open_file(), self.output_open, compress=self.compress
+            )
+
+        # Files opened by commands are their inputs as well
+        if self.fingerprints and self.intercept_open:
+            dump_open_fingerprints(self.output)
 
     def _setup_env(self):
         env = dict(os.environ)
 
         self.logger.debug("Set 'CLADE_INTERCEPT' environment variable value")
-        env["CLADE_INTERCEPT"] = str(self.output)
+        env["CLADE_INTERCEPT"] = self.__get_journal_file(str(self.output))
 
         if self.intercept_open:
             self.logger.debug("Set 'CLADE_INTERCEPT_OPEN' environment variable value")
-            env["CLADE_INTERCEPT_OPEN"] = self.output_open
+            env["CLADE_INTERCEPT_OPEN"] = self.__get_open_file()
 
         if self.intercept_envs:
             self.logger.debug("Set 'CLADE_ENV_VARS' environment variable value")
-            env["CLADE_ENV_VARS"] = self.output_envs
+            env["CLADE_ENV_VARS"] = self.__get_journal_file(self.output_envs)
+
+        if self.fingerprints:
+            self.logger.debug("Set 'CLADE_FINGERPRINTS' environment variable value")
+            env["CLADE_FINGERPRINTS"] = self.__get_journal_file(
+                self.output_fingerprints
+            )
+
+        allow_regex, deny_regex = self.__get_filter_regexes()
+
+        if allow_regex:
+            self.logger.debug("Set 'CLADE_FILTER_ALLOW' environment variable value")
+            env["CLADE_FILTER_ALLOW"] = allow_regex
+
+        if deny_regex:
+            self.logger.debug("Set 'CLADE_FILTER_DENY' environment variable value")
+            env["CLADE_FILTER_DENY"] = deny_regex
 
         # Prepare environment variables for PID graph
         if self.append:
-            last_used_id = get_last_id(self.output)
+            self.last_id = int(get_last_id(self.output))
         else:
-            last_used_id = "0"
+            self.last_id = 0
 
-        f = tempfile.NamedTemporaryFile(mode="w", delete=False)
-        f.write(last_used_id)
+        # Last used id is stored as a 64-bit integer, which is mapped into
+        # memory and atomically incremented by intercepted processes
+        f = tempfile.NamedTemporaryFile(mode="wb", delete=False)
+        f.write(struct.pack("=Q", self.last_id))
         f.flush()
 
         self.clade_if_file = f.name
         env["CLADE_ID_FILE"] = self.clade_if_file
         env["CLADE_PARENT_ID"] = "0"
 
+        # Results of searching executables in PATH are shared by intercepted
+        # processes through a table that is mapped into memory
+        if self.conf.get("Intercept.which_cache", True):
+            with tempfile.NamedTemporaryFile(mode="wb", delete=False) as f:
+                f.truncate(WHICH_CACHE_SLOTS * WHICH_CACHE_SLOT_SIZE)
+
+            self.which_cache_file = f.name
+            env["CLADE_WHICH_CACHE"] = self.which_cache_file
+
         return env
 
+    def __get_filter_regexes(self):
+        """Get regexes of executables whose commands are stored completely.
+
+        Other commands are stored as stubs with only the working directory
+        and the id of the parent command. If "Intercept.filter_cmds" is
+        true, only commands that match "which_list" options of extensions
+        or "Intercept.allow_list" are stored completely. Commands that match
+        "Intercept.deny_list" are always stored as stubs.
+        """
+        allow_list = []
+        if self.conf.get("Intercept.filter_cmds"):
+            allow_list = get_which_list(self.conf)
+            allow_list.extend(self.conf.get("Intercept.allow_list", []))
+
+        deny_list = self.conf.get("Intercept.deny_list", [])
+
+        return self.__join_regexes(allow_list), self.__join_regexes(deny_list)
+
+    @staticmethod
+    def __join_regexes(regexes):
+        if not regexes:
+            return ""
+
+        regex = "(" + ")|(".join(regexes) + ")"
+
+        # Regexes are matched by the interceptor as POSIX extended ones
+        for python_class, posix_class in [
+            ("\\d", "[0-9]"),
+            ("\\s", "[[:space:]]"),
+            ("\\w", "[[:alnum:]_]"),
+        ]:
+            regex = regex.replace(python_class, posix_class)
+
+        return regex
+
     @staticmethod
     def preprocess(execute):
         """Decorator for execute() method
 
         It runs build command under socket server allowing preprocessing of intercepted build commands
-        before their execution by a suitable extension.
+        before their execution by a suitable extension. After the build is finished,
+        intercepted commands are collected from journals.
         """
 
         def execute_wrapper(self, *args, **kwargs):
+            self._start_collecting_journals()
+
             if not self.conf.get("Intercept.preprocess"):
-                return execute(self, *args, **kwargs)
+                try:
+                    return execute(self, *args, **kwargs)
+                finally:
+                    self._collect_journals()
 
-            server = PreprocessServer(self.conf, self.output)
+            server = PreprocessServer(
+                self.conf,
+                self.__get_journal_file(self.output),
+                with_ids=self.use_journal,
+            )
 
             # self.env.update(server.env) would be wrong
             server_env = server.env.copy()
@@ -129,8 +334,24 @@ class Intercept(metaclass=abc.ABCMeta):
                 self.logger.debug("Terminate preprocess server")
                 server.terminate()
 
+                # Server writes commands to the journal until it is terminated
+                self._collect_journals()
+                self.__log_server_stats(server.stats)
+
         return execute_wrapper
 
+    def __log_server_stats(self, stats):
+        if not stats or not stats["requests"]:
+            return
+
+        self.logger.debug(
+            "Preprocess server handled {} requests, latency (ms): mean {:.2f}, "
+            "p50 {:.2f}, p95 {:.2f}, p99 {:.2f}, max {:.2f}".format(
+                stats["requests"],
+                *[stats[k] * 1000 for k in ("mean", "p50", "p95", "p99", "max")]
+            )
+        )
+
     def execute(self):
         """Execute intercepting of build commands.
 
@@ -142,7 +363,8 @@ class Intercept(metaclass=abc.ABCMeta):
         self.logger.debug("Execute {!r} command".format(shell_command))
         r = subprocess.call(shell_command, env=self.env, shell=True, cwd=self.cwd)
 
-        if self.clade_if_file and os.path.exists(self.clade_if_file):
-            os.remove(self.clade_if_file)
+        for f in (self.clade_if_file, self.which_cache_file):
+            if f and os.path.exists(f):
+                os.remove(f)
 
         return r
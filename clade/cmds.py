@@ -13,11 +13,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
+import mmap
 import os
 import re
+import threading
+import zlib
+
+from clade.compression import get_size, open_file
+from clade.utils import after_fork_in_child
 
 DELIMITER = "||"
 
+# Each item of the index is an unsigned 64-bit integer
+INDEX_ITEM = "Q"
+assert array.array(INDEX_ITEM).itemsize == 8
+
 
 def open_cmds_file(cmds_file):
     """Open txt file with intercepted commands and return file object.
@@ -25,55 +36,287 @@ def open_cmds_file(cmds_file):
     Raises:
         RuntimeError: Specified file does not exist or empty.
     """
+    _check_cmds_file(cmds_file)
+
+    return open_file(cmds_file)
+
+
+def _check_cmds_file(cmds_file):
     if not os.path.exists(cmds_file):
         raise RuntimeError("Specified {} file does not exist".format(cmds_file))
     if not os.path.getsize(cmds_file):
         raise RuntimeError("Specified {} file is empty".format(cmds_file))
 
-    return open(cmds_file)
 
+class CmdsIndex:
+    """Offsets of all lines in the txt file with intercepted commands.
+
+    The index is stored near the txt file as a plain array of 64-bit
+    integers: the first two items are the size of the indexed part of the
+    txt file and the checksum of its last line, and the rest are offsets of
+    the lines, so the line with identifier N is located at the offset stored
+    in the N-th of them. The index is memory-mapped, and is extended if new
+    commands were appended to the txt file since it was built.
+    """
+
+    def __init__(self, cmds_file):
+        self.cmds_file = cmds_file
+        self.index_file = cmds_file + ".idx"
+
+        self.indexed_size = 0
+        self.checksum = 0
+        self.offsets = array.array(INDEX_ITEM)
+
+        self.__mm = None
+        self.__stat = None
+
+    def update(self):
+        """Load the index or rebuild it if the txt file was changed."""
+        _check_cmds_file(self.cmds_file)
+
+        stat = os.stat(self.cmds_file)
+        if (stat.st_size, stat.st_mtime_ns) == self.__stat:
+            return
+
+        if not self.indexed_size:
+            self.__load()
+
+        # Offsets are positions in uncompressed data if the file is compressed
+        size = get_size(self.cmds_file)
+
+        if self.indexed_size and (size < self.indexed_size or not self.__is_appended()):
+            self.indexed_size = 0
+            self.checksum = 0
+            self.offsets = array.array(INDEX_ITEM)
+
+        if size != self.indexed_size:
+            self.__build()
+
+        self.__stat = (stat.st_size, stat.st_mtime_ns)
+
+    def __load(self):
+        if not os.path.isfile(self.index_file):
+            return
+
+        with open(self.index_file, "rb") as fh:
+            try:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Index file is empty
+                return
+
+        if len(mm) % 8 or len(mm) < 16:
+            mm.close()
+            return
+
+        index = memoryview(mm).cast(INDEX_ITEM)
+
+        self.__mm = mm
+        self.indexed_size = index[0]
+        self.checksum = index[1]
+        self.offsets = index[2:]
+
+    def __get_checksum(self):
+        if not self.offsets:
+            return 0
+
+        with open_file(self.cmds_file, "rb") as fh:
+            fh.seek(self.offsets[-1])
+            return zlib.crc32(fh.read(self.indexed_size - self.offsets[-1]))
+
+    def __is_appended(self):
+        # The last indexed line must be unchanged and complete,
+        # otherwise the txt file was rewritten rather than appended to
+        return self.__get_checksum() == self.checksum and self.__ends_with_newline()
+
+    def __ends_with_newline(self):
+        with open_file(self.cmds_file, "rb") as fh:
+            fh.seek(self.indexed_size - 1)
+            return fh.read(1) == b"\n"
+
+    def __build(self):
+        offsets = array.array(INDEX_ITEM)
+        offsets.frombytes(memoryview(self.offsets).cast("B"))
+        offset = self.indexed_size
+
+        with open_file(self.cmds_file, "rb") as fh:
+            fh.seek(offset)
+
+            for line in fh:
+                offsets.append(offset)
+                offset += len(line)
+
+        self.offsets = offsets
+        self.indexed_size = offset
+        self.checksum = self.__get_checksum()
+        self.__mm = None
+
+        self.__dump()
+
+    def __dump(self):
+        tmp_file = "{}.{}.tmp".format(self.index_file, os.getpid())
+
+        try:
+            with open(tmp_file, "wb") as fh:
+                header = array.array(INDEX_ITEM, [self.indexed_size, self.checksum])
+                header.tofile(fh)
+                self.offsets.tofile(fh)
+
+            os.replace(tmp_file, self.index_file)
+        except OSError:
+            # Directory with the txt file may be read-only,
+            # in which case the index is kept in memory only
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_line(self, cmd_id):
+        """Get line of the txt file by the command identifier."""
+        if cmd_id < 1 or cmd_id > len(self.offsets):
+            raise RuntimeError("No command with id {}".format(cmd_id))
+
+        with open_cmds_file(self.cmds_file) as cmds_fp:
+            # Offsets of lines are valid cookies for utf-8 text files
+            cmds_fp.seek(self.offsets[cmd_id - 1])
+            return cmds_fp.readline()
+
+
+_indexes = dict()
+_indexes_lock = threading.Lock()
+
+
+@after_fork_in_child
+def _reset_indexes_lock():
+    global _indexes_lock
+    _indexes_lock = threading.Lock()
+
+
+def get_cmds_index(cmds_file):
+    """Get up-to-date offset index of the txt file with intercepted commands."""
+    cmds_file = os.path.abspath(cmds_file)
 
-def iter_cmds_by_which(cmds_file, which_list):
+    with _indexes_lock:
+        if cmds_file not in _indexes:
+            _indexes[cmds_file] = CmdsIndex(cmds_file)
+
+        index = _indexes[cmds_file]
+        index.update()
+
+    return index
+
+
+def get_cmd_by_id(cmds_file, cmd_id):
+    """Get intercepted command by its identifier.
+
+    Raises:
+        RuntimeError: There is no command with such identifier.
+    """
+    line = get_cmds_index(cmds_file).get_line(cmd_id)
+
+    cmd = split_cmd(line)
+    cmd["id"] = cmd_id
+    return cmd
+
+
+def number_of_cmds(cmds_file):
+    """Return number of all intercepted commands."""
+    return len(get_cmds_index(cmds_file))
+
+
+def iter_cmds_by_which(cmds_file, which_list, start_id=1):
     """Get an iterator over all intercepted commands filtered by 'which' field.
 
     Args:
         cmds_file: Path to the txt file with intercepted commands.
         which_list: A list of strings to filter command by 'which' field.
+        start_id: Identifier of the first command to iterate over.
     """
-    for cmd in iter_cmds(cmds_file):
+    for cmd in iter_cmds(cmds_file, start_id=start_id):
         for which in which_list:
             if re.search(which, cmd["which"]):
                 yield cmd
                 break
 
 
-def number_of_cmds_by_which(cmds_file, which_list):
+def iter_cmds_by_ids(cmds_file, cmd_ids):
+    """Get an iterator over intercepted commands with specified identifiers.
+
+    Args:
+        cmds_file: Path to the txt file with intercepted commands.
+        cmd_ids: An ascending sequence of command identifiers.
+    """
+    if not cmd_ids:
+        return
+
+    ids = iter(cmd_ids)
+    next_id = next(ids)
+
+    with open_cmds_file(cmds_file) as cmds_fp:
+        for cmd_id, line in enumerate(cmds_fp, start=1):
+            if cmd_id != next_id:
+                continue
+
+            cmd = split_cmd(line)
+            cmd["id"] = cmd_id
+            yield cmd
+
+            next_id = next(ids, None)
+
+            if next_id is None:
+                break
+
+
+def number_of_cmds_by_which(cmds_file, which_list, start_id=1):
     """Return number of all intercepted commands filtered by 'which' field.
 
     Args:
         cmds_file: Path to the txt file with intercepted commands.
         which_list: A list of strings to filter command by 'which' field.
+        start_id: Identifier of the first command to count.
     """
 
     i = 0
 
-    for _ in iter_cmds_by_which(cmds_file, which_list):
+    for _ in iter_cmds_by_which(cmds_file, which_list, start_id=start_id):
         i += 1
 
     return i
 
 
-def iter_cmds(cmds_file):
+def iter_cmds(cmds_file, start_id=1):
     """Get an iterator over all intercepted commands.
 
     Args:
         cmds_file: Path to the txt file with intercepted commands.
+        start_id: Identifier of the first command to iterate over.
+    """
+    # cmd_id should be line number in cmds_fp file
+    for cmd_id, line in enumerate(iter_lines(cmds_file, start_id), start=start_id):
+        cmd = split_cmd(line)
+        cmd["id"] = cmd_id
+        yield cmd
+
+
+def iter_lines(cmds_file, start_id=1):
+    """Get an iterator over lines of the txt file with intercepted commands.
+
+    Args:
+        cmds_file: Path to the txt file with intercepted commands.
+        start_id: Identifier of the command from which to start.
     """
     with open_cmds_file(cmds_file) as cmds_fp:
-        for cmd_id, line in enumerate(cmds_fp):
-            cmd = split_cmd(line)
-            cmd["id"] = cmd_id + 1  # cmd_id should be line number in cmds_fp file
-            yield cmd
+        if start_id > 1:
+            index = get_cmds_index(cmds_file)
+
+            if start_id > len(index):
+                return
+
+            # Offsets of lines are valid cookies for utf-8 text files
+            cmds_fp.seek(index.offsets[start_id - 1])
+
+        yield from cmds_fp
 
 
 def split_cmd(line):
@@ -105,20 +348,13 @@ def get_build_dir(cmds_file) -> str:
 
 def get_last_cmd(cmds_file):
     """Get last intercepted command."""
-    iterable = iter_cmds(cmds_file)
-
-    last_cmd = next(iterable)
-    for last_cmd in iterable:
-        pass
-
-    return last_cmd
+    return get_cmd_by_id(cmds_file, number_of_cmds(cmds_file))
 
 
 def get_last_id(cmds_file, raise_exception=False) -> int:
     """Get last used id."""
     try:
-        last_cmd = get_last_cmd(cmds_file)
-        return last_cmd["id"]
+        return number_of_cmds(cmds_file)
     except RuntimeError:
         if raise_exception:
             raise
@@ -0,0 +1,253 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Block-compressed files with intercepted commands, environments and open() calls.
+
+Compressed file starts with a magic sequence of bytes, followed by blocks.
+Each block is a header with sizes of compressed and uncompressed data
+(two unsigned 32-bit integers) and the data compressed by zlib. Blocks are
+only appended, so the file can be read while it is still written, and
+any position of the uncompressed data can be read by decompressing only
+the block that contains it.
+"""
+
+import bisect
+import io
+import os
+import struct
+import zlib
+
+MAGIC = b"CLADEZ\x00\x01"
+
+BLOCK_HEADER = struct.Struct("=II")
+
+# Size of uncompressed data in each block
+BLOCK_SIZE = 1024 * 1024
+
+# Compression level that is used if it is not specified explicitly
+DEFAULT_LEVEL = 6
+
+
+def is_compressed(path):
+    """Check that the file is block-compressed."""
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def get_level(compress):
+    """Get zlib compression level from the value of the configuration option.
+
+    Returns:
+        None if compression is disabled
+    """
+    if compress is True:
+        return DEFAULT_LEVEL
+
+    if not compress:
+        return None
+
+    return int(compress)
+
+
+def append_to_file(path, data, compress=None):
+    """Append data to the file, compressing it if the file is compressed.
+
+    Format of an already existing non-empty file is preserved, so the
+    compression level affects only new files.
+
+    Args:
+        path: Path to the file
+        data: Bytes to append
+        compress: Value of the "Intercept.compress_logs" option
+    """
+    level = get_level(compress)
+
+    with open(path, "ab") as fh:
+        if fh.tell():
+            if not is_compressed(path):
+                fh.write(data)
+                return
+        elif level is None:
+            fh.write(data)
+            return
+        else:
+            fh.write(MAGIC)
+
+        if level is None:
+            level = DEFAULT_LEVEL
+
+        blocks = []
+        for start in range(0, len(data), BLOCK_SIZE):
+            chunk = data[start : start + BLOCK_SIZE]
+            compressed = zlib.compress(chunk, level)
+            blocks.append(BLOCK_HEADER.pack(len(compressed), len(chunk)))
+            blocks.append(compressed)
+
+        # Readers skip the last block until it is written completely
+        fh.write(b"".join(blocks))
+
+
+def move_to_file(src, dst, compress=None, chunk_size=BLOCK_SIZE):
+    """Append content of the src file to the dst file and remove src."""
+    if not os.path.exists(src):
+        return
+
+    with open(src, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+
+            if not chunk:
+                break
+
+            append_to_file(dst, chunk, compress=compress)
+
+    os.remove(src)
+
+
+class BlockReader(io.RawIOBase):
+    """Seekable stream of uncompressed data of the block-compressed file.
+
+    Positions of blocks are read from their headers on the first use, and
+    are read again for new blocks when the end of the known data is reached.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.__fh = open(path, "rb")
+
+        if self.__fh.read(len(MAGIC)) != MAGIC:
+            self.__fh.close()
+            raise ValueError("{!r} is not a compressed file".format(path))
+
+        # Uncompressed offsets of blocks, and positions of their data
+        self.__starts = []
+        self.__blocks = []
+        self.__size = 0
+        self.__scanned = len(MAGIC)
+
+        self.__pos = 0
+        self.__cached = (None, b"")
+
+        self.__scan()
+
+    def __scan(self):
+        self.__fh.seek(self.__scanned)
+
+        while True:
+            header = self.__fh.read(BLOCK_HEADER.size)
+
+            if len(header) < BLOCK_HEADER.size:
+                break
+
+            csize, usize = BLOCK_HEADER.unpack(header)
+            data_pos = self.__scanned + BLOCK_HEADER.size
+
+            # Last block may be not written completely yet
+            if os.fstat(self.__fh.fileno()).st_size < data_pos + csize:
+                break
+
+            self.__starts.append(self.__size)
+            self.__blocks.append((data_pos, csize))
+            self.__size += usize
+            self.__scanned = data_pos + csize
+            self.__fh.seek(self.__scanned)
+
+    @property
+    def size(self):
+        """Size of uncompressed data."""
+        return self.__size
+
+    def __get_block(self, i):
+        if self.__cached[0] != i:
+            data_pos, csize = self.__blocks[i]
+            self.__fh.seek(data_pos)
+            self.__cached = (i, zlib.decompress(self.__fh.read(csize)))
+
+        return self.__cached[1]
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.__pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.__pos
+        elif whence == io.SEEK_END:
+            self.__scan()
+            offset += self.__size
+
+        if offset < 0:
+            raise ValueError("negative seek position {}".format(offset))
+
+        self.__pos = offset
+        return self.__pos
+
+    def readinto(self, b):
+        if self.__pos >= self.__size:
+            self.__scan()
+
+            if self.__pos >= self.__size:
+                return 0
+
+        i = bisect.bisect_right(self.__starts, self.__pos) - 1
+        block = self.__get_block(i)
+
+        data = block[self.__pos - self.__starts[i] :][: len(b)]
+        b[: len(data)] = data
+        self.__pos += len(data)
+
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.__fh.close()
+
+        super().close()
+
+
+def open_file(path, mode="r", **kwargs):
+    """Open the file for reading, decompressing it if it is compressed.
+
+    Args:
+        path: Path to the file
+        mode: "r" or "rb"
+        kwargs: Arguments of the open() function, like encoding and errors
+    """
+    if not is_compressed(path):
+        return open(path, mode, **kwargs)
+
+    stream = io.BufferedReader(BlockReader(path))
+
+    if "b" in mode:
+        return stream
+
+    return io.TextIOWrapper(stream, **kwargs)
+
+
+def get_size(path):
+    """Get size of the file, or size of uncompressed data if it is compressed."""
+    if not is_compressed(path):
+        return os.path.getsize(path)
+
+    with BlockReader(path) as reader:
+        return reader.size
@@ -23,6 +23,9 @@ LIB64 = os.path.join(os.path.dirname(__file__), "intercept", "lib64")
 
 
 class Debugger(Intercept):
+    # Debugger writes commands to the output file by itself in order of their ids
+    use_journal = False
+
     def __init__(
         self,
         command,
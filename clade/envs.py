@@ -13,7 +13,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
+import collections
+import hashlib
+import mmap
 import os
+import tempfile
+import threading
+
+from clade.compression import open_file
+from clade.utils import after_fork_in_child
+
+# Identifier of the parent command, which is different for almost every command
+PARENT_ID = "CLADE_PARENT_ID"
+
+# Each item of the index is an unsigned 64-bit integer
+INDEX_ITEM = "Q"
+assert array.array(INDEX_ITEM).itemsize == 8
+
+# Number of items in the header of the index file
+HEADER_SIZE = 4
 
 
 def open_envs_file(envs_file):
@@ -22,12 +41,318 @@ def open_envs_file(envs_file):
     Raises:
         RuntimeError: Specified file does not exist or empty.
     """
+    _check_envs_file(envs_file)
+
+    return open_file(envs_file)
+
+
+def _check_envs_file(envs_file):
     if not os.path.exists(envs_file):
         raise RuntimeError("Specified {} file does not exist".format(envs_file))
     if not os.path.getsize(envs_file):
         raise RuntimeError("Specified {} file is empty".format(envs_file))
 
-    return open(envs_file)
+
+def iter_blocks(envs_file):
+    """Get an iterator over raw blocks of the txt file with environment variables.
+
+    Each block is a list of lines without trailing newlines. The first line
+    of a block that is stored as a difference with the environment of the
+    parent command is "=<id of the parent command>".
+    """
+    with open_envs_file(envs_file) as envs_fp:
+        block = []
+        for line in envs_fp:
+            line = line.rstrip("\n")
+
+            if line:
+                block.append(line)
+            else:
+                yield block
+                block = []
+
+
+def apply_block(block, base_envs):
+    """Get environment variables from a raw block of the txt file.
+
+    Args:
+        block: List of lines of the block
+        base_envs: Function that returns environment variables of a command
+            by its identifier. It is used for blocks that are stored as
+            differences with the environment of the parent command.
+    """
+    if block and block[0].startswith("=") and not block[0].startswith("=-"):
+        envs = dict(base_envs(int(block[0][1:])))
+        block = block[1:]
+    else:
+        envs = dict()
+
+    for line in block:
+        if line.startswith("=-"):
+            envs.pop(line[2:], None)
+        else:
+            envs.update(split_env(line))
+
+    return envs
+
+
+class EnvsIndex:
+    """Full environments of all commands from the txt file with environment variables.
+
+    Environments of child commands are stored in the txt file as differences
+    with environments of their parents. The index resolves them and stores
+    each distinct environment only once, so environment of any command can be
+    read without scanning the txt file. The index file contains a header
+    (size and modification time of the indexed txt file, number of commands
+    and offset of the array of offsets), environments in the envs.txt block
+    format, and the array with the offset of environment of each command.
+
+    CLADE_PARENT_ID variable is removed from environments before they are
+    compared, since it is different for almost every command. The lowest bit
+    of the offset is set if it should be restored: its value is equal to the
+    identifier of the command itself.
+    """
+
+    # Number of resolved environments that are kept in memory during the build
+    cache_size = 256
+
+    def __init__(self, envs_file):
+        self.envs_file = envs_file
+        self.index_file = envs_file + ".idx"
+
+        self.offsets = array.array(INDEX_ITEM)
+
+        self.__mm = None
+        self.__stat = None
+
+    def update(self):
+        """Load the index or rebuild it if the txt file was changed."""
+        _check_envs_file(self.envs_file)
+
+        stat = os.stat(self.envs_file)
+        if (stat.st_size, stat.st_mtime_ns) == self.__stat:
+            return
+
+        if not self.__load(stat):
+            self.__build(stat)
+
+        self.__stat = (stat.st_size, stat.st_mtime_ns)
+
+    def __load(self, stat):
+        if not os.path.isfile(self.index_file):
+            return False
+
+        with open(self.index_file, "rb") as fh:
+            try:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Index file is empty
+                return False
+
+        return self.__map(mm, stat)
+
+    def __map(self, mm, stat):
+        if len(mm) % 8 or len(mm) < HEADER_SIZE * 8:
+            mm.close()
+            return False
+
+        header = memoryview(mm)[: HEADER_SIZE * 8].cast(INDEX_ITEM)
+        size, mtime, number, offsets_pos = header.tolist()
+        header.release()
+
+        if (size, mtime) != (stat.st_size, stat.st_mtime_ns) or (
+            offsets_pos + number * 8 != len(mm)
+        ):
+            mm.close()
+            return False
+
+        self.__close()
+        self.__mm = mm
+        self.offsets = memoryview(mm)[offsets_pos:].cast(INDEX_ITEM)
+        return True
+
+    def __close(self):
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+
+        if self.__mm:
+            self.__mm.close()
+
+        self.offsets = array.array(INDEX_ITEM)
+        self.__mm = None
+
+    def __build(self, stat):
+        try:
+            fh = tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(self.index_file), delete=False
+            )
+        except OSError:
+            # Directory with the txt file may be read-only,
+            # in which case the index is kept in a temporary file
+            fh = tempfile.NamedTemporaryFile(delete=False)
+
+        try:
+            with fh, open(fh.name, "rb") as rfh:
+                offsets = self.__write_envs(fh, rfh)
+
+                # Array of offsets is aligned to be cast from the memory map
+                fh.write(b"\0" * (-fh.tell() % 8))
+                offsets_pos = fh.tell()
+                offsets.tofile(fh)
+
+                fh.seek(0)
+                header = [stat.st_size, stat.st_mtime_ns, len(offsets), offsets_pos]
+                array.array(INDEX_ITEM, header).tofile(fh)
+                fh.flush()
+
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                os.replace(fh.name, self.index_file)
+            except OSError:
+                pass
+        finally:
+            if os.path.exists(fh.name):
+                os.remove(fh.name)
+
+        self.__map(mm, stat)
+
+    def __write_envs(self, fh, rfh):
+        fh.write(array.array(INDEX_ITEM, [0] * HEADER_SIZE).tobytes())
+
+        offsets = array.array(INDEX_ITEM)
+        offset_by_digest = dict()
+
+        # Parents usually have many children, so their environments
+        # are cached to resolve differences without reading the index file
+        cache = collections.OrderedDict()
+
+        def add_to_cache(offset, envs):
+            cache[offset] = envs
+
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+        def base_envs(base_id):
+            if base_id < 1 or base_id > len(offsets):
+                return dict()
+
+            offset = offsets[base_id - 1]
+
+            if offset >> 1 in cache:
+                cache.move_to_end(offset >> 1)
+            else:
+                fh.flush()
+                rfh.seek(offset >> 1)
+                add_to_cache(offset >> 1, self.__parse_block(self.__read_block(rfh)))
+
+            return self.__restore_parent_id(cache[offset >> 1], base_id, offset)
+
+        for cmd_id, block in enumerate(iter_blocks(self.envs_file), start=1):
+            envs = apply_block(block, base_envs)
+
+            has_parent_id = envs.get(PARENT_ID) == str(cmd_id)
+            if has_parent_id:
+                del envs[PARENT_ID]
+
+            data = "".join("{}\n".format(join_env({n: v})) for n, v in envs.items())
+            data = (data + "\n").encode("utf-8", errors="surrogateescape")
+            digest = hashlib.sha1(b"\n".join(sorted(data.split(b"\n")))).digest()
+
+            if digest not in offset_by_digest:
+                offset_by_digest[digest] = fh.tell()
+                add_to_cache(fh.tell(), envs)
+                fh.write(data)
+
+            offsets.append(offset_by_digest[digest] << 1 | has_parent_id)
+
+        return offsets
+
+    @staticmethod
+    def __read_block(fh):
+        lines = []
+        for line in fh:
+            if line == b"\n":
+                break
+            lines.append(line)
+
+        return b"".join(lines)
+
+    @staticmethod
+    def __parse_block(data):
+        lines = data.decode("utf-8", errors="surrogateescape").split("\n")
+        return apply_block([line for line in lines if line], None)
+
+    @staticmethod
+    def __restore_parent_id(envs, cmd_id, offset):
+        envs = dict(envs)
+
+        if offset & 1:
+            envs[PARENT_ID] = str(cmd_id)
+
+        return envs
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __get_block(self, cmd_id):
+        if cmd_id < 1 or cmd_id > len(self.offsets):
+            raise RuntimeError("No envs with id {}".format(cmd_id))
+
+        offset = self.offsets[cmd_id - 1]
+        start = offset >> 1
+
+        if self.__mm[start : start + 1] == b"\n":
+            return b"", offset
+
+        return self.__mm[start : self.__mm.find(b"\n\n", start) + 1], offset
+
+    def get_envs(self, cmd_id):
+        """Get environment variables of the command by its identifier."""
+        data, offset = self.__get_block(cmd_id)
+        return self.__restore_parent_id(self.__parse_block(data), cmd_id, offset)
+
+    def get_env_value(self, cmd_id, name):
+        """Get value of the environment variable of the command or None."""
+        data, offset = self.__get_block(cmd_id)
+
+        if name == PARENT_ID and offset & 1:
+            return str(cmd_id)
+
+        prefix = "\n{}=".format(name).encode("utf-8", errors="surrogateescape")
+        pos = (b"\n" + data).find(prefix)
+
+        if pos == -1:
+            return None
+
+        end = data.find(b"\n", pos + len(prefix) - 1)
+        return data[pos + len(prefix) - 1 : end].decode(
+            "utf-8", errors="surrogateescape"
+        )
+
+
+_indexes = dict()
+_indexes_lock = threading.Lock()
+
+
+@after_fork_in_child
+def _reset_indexes_lock():
+    global _indexes_lock
+    _indexes_lock = threading.Lock()
+
+
+def get_envs_index(envs_file):
+    """Get up-to-date index of the txt file with environment variables."""
+    envs_file = os.path.abspath(envs_file)
+
+    with _indexes_lock:
+        if envs_file not in _indexes:
+            _indexes[envs_file] = EnvsIndex(envs_file)
+
+        index = _indexes[envs_file]
+        index.update()
+
+    return index
 
 
 def iter_envs(envs_file):
@@ -36,17 +361,10 @@ def iter_envs(envs_file):
     Args:
         envs_file: Path to the txt file with intercepted environment variables.
     """
-    with open_envs_file(envs_file) as envs_fp:
-        cmd_id = 1
-        envs = {"id": cmd_id, "envs": dict()}
-        for line in envs_fp:
-            if line.strip():
-                e = split_env(line)
-                envs["envs"].update(e)
-            else:
-                yield envs
-                cmd_id += 1
-                envs = {"id": cmd_id, "envs": dict()}
+    index = get_envs_index(envs_file)
+
+    for cmd_id in range(1, len(index) + 1):
+        yield {"id": cmd_id, "envs": index.get_envs(cmd_id)}
 
 
 def split_env(line):
@@ -70,13 +388,12 @@ def get_first_env(envs_file):
 
 def get_last_env(envs_file):
     """Get environment variables for last intercepted command."""
-    iterable = iter_envs(envs_file)
+    index = get_envs_index(envs_file)
 
-    last_env = next(iterable)
-    for last_env in iterable:
-        pass
+    if not len(index):
+        raise RuntimeError("Specified {} file has no envs".format(envs_file))
 
-    return last_env
+    return {"id": len(index), "envs": index.get_envs(len(index))}
 
 
 def get_last_id(envs_file, raise_exception=False) -> str:
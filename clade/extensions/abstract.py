@@ -25,14 +25,22 @@ import os
 import shutil
 import sys
 import tempfile
+import threading
 import time
 import uuid
 
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-from clade.cmds import get_build_dir
-from clade.extensions.utils import yield_chunk
-from clade.utils import get_clade_version, get_program_version, get_logger, load, dump
+from clade.cmds import get_build_dir, get_last_id
+from clade.extensions.utils import Profile, get_usage, get_usage_delta, yield_chunk
+from clade.utils import (
+    after_fork_in_child,
+    get_clade_version,
+    get_program_version,
+    get_logger,
+    load,
+    dump,
+)
 
 
 class Extension(metaclass=abc.ABCMeta):
@@ -49,6 +57,14 @@ class Extension(metaclass=abc.ABCMeta):
 
     __version__ = "4"
 
+    # Extensions can be executed in parallel threads, but there is only one
+    # meta.json file per working directory
+    _meta_lock = threading.RLock()
+
+    # Extensions that can parse only commands appended to the cmds file
+    # since their previous launch, and merge results with existing ones
+    incremental = False
+
     def __init__(self, work_dir, conf=None):
         self.name = self.__class__.__name__
         self.clade_work_dir = os.path.abspath(str(work_dir))
@@ -64,6 +80,16 @@ class Extension(metaclass=abc.ABCMeta):
 
         self.extensions = dict()
 
+        # CPU cores shared with other extensions executed at the same time
+        self.cpu_budget = None
+
+        # Resources used by parse(), collected only if "profile" option is set
+        self.profile = None
+
+        # Identifier of the last command parsed by the previous launch.
+        # It is not 0 only if the extension parses new commands incrementally
+        self.last_id = 0
+
         self.ext_meta = {"version": self.get_ext_version(), "corrupted": False}
         self.global_meta_file = os.path.abspath(
             os.path.join(str(work_dir), "meta.json")
@@ -80,6 +106,23 @@ class Extension(metaclass=abc.ABCMeta):
         """Returns True if build commands are already parsed."""
         return os.path.exists(self.work_dir)
 
+    def get_parsed_id(self):
+        """Get identifier of the last command parsed by the previous launch.
+
+        Returns None for working directories created by older versions of
+        Clade, which do not store it.
+        """
+        return self.load_global_meta().get(self.name, dict()).get("last_id")
+
+    def is_outdated(self, cmds_file):
+        """Returns True if new commands were appended to the cmds file after
+        the extension parsed it, and they can be parsed incrementally."""
+        if not self.incremental or not self.is_parsed():
+            return False
+
+        parsed_id = self.get_parsed_id()
+        return parsed_id is not None and get_last_id(cmds_file) > parsed_id
+
     def preprocess(self, cmd):
         """Preprocess intercepted build command before its execution"""
         return
@@ -94,14 +137,29 @@ class Extension(metaclass=abc.ABCMeta):
 
         def parse_wrapper(self, *args, **kwargs):
             if self.is_parsed():
-                self.log("Build commands are already parsed")
-                return
+                if not self.is_outdated(args[0]):
+                    self.log("Build commands are already parsed")
+                    return
+
+                self.last_id = self.get_parsed_id()
+                self.log(
+                    "Parsing commands appended after command {}".format(self.last_id)
+                )
 
             self.temp_dir = tempfile.mkdtemp()
             time_start = time.time()
 
+            if self.conf.get("profile"):
+                self.profile = Profile(self.work_dir)
+                self.profile.start()
+
             try:
-                return parse(self, *args, **kwargs)
+                # Commands appended to the cmds file during parsing
+                # will be parsed by the next launch
+                last_id = get_last_id(args[0])
+                result = parse(self, *args, **kwargs)
+                self.ext_meta["last_id"] = last_id
+                return result
             except Exception:
                 if os.path.exists(self.work_dir):
                     self.ext_meta["corrupted"] = True
@@ -116,6 +174,10 @@ class Extension(metaclass=abc.ABCMeta):
 
                 self.ext_meta["time"] = delta_str
 
+                if self.profile:
+                    self.profile.stop()
+                    self.ext_meta["profile"] = self.profile.data
+
                 # 5 is an arbitrary threshold to supress printing unnessesary
                 # log messages for extensions that finished quickly
                 if delta.seconds > 5:
@@ -328,9 +390,23 @@ class Extension(metaclass=abc.ABCMeta):
         return opts
 
     def load_global_meta(self):
-        return self.load_data(self.global_meta_file, raise_exception=False)
+        with self._meta_lock:
+            return self.load_data(self.global_meta_file, raise_exception=False)
+
+    def __write_global_meta(self, stored_meta):
+        # Write to a temporary file first, so meta.json is never seen half-written
+        tmp_file = self.global_meta_file + ".tmp"
+
+        with open(tmp_file, "w") as fh:
+            fh.write(json.dumps(stored_meta, indent=4))
+
+        os.replace(tmp_file, self.global_meta_file)
 
     def dump_global_meta(self, cmds_file):
+        with self._meta_lock:
+            self.__dump_global_meta(cmds_file)
+
+    def __dump_global_meta(self, cmds_file):
         stored_meta = self.load_global_meta()
         stored_meta[self.name] = self.ext_meta
 
@@ -383,15 +459,14 @@ class Extension(metaclass=abc.ABCMeta):
         if "date" not in stored_meta:
             stored_meta["date"] = datetime.datetime.today().strftime("%Y-%m-%d %H:%M")
 
-        with open(self.global_meta_file, "w") as fh:
-            fh.write(json.dumps(stored_meta, indent=4))
+        self.__write_global_meta(stored_meta)
 
     def add_data_to_global_meta(self, key, data):
-        stored_meta = self.load_global_meta()
-        stored_meta[key] = data
+        with self._meta_lock:
+            stored_meta = self.load_global_meta()
+            stored_meta[key] = data
 
-        with open(self.global_meta_file, "w") as fh:
-            fh.write(json.dumps(stored_meta, indent=4))
+            self.__write_global_meta(stored_meta)
 
     def __get_empty_obj(self, obj):
         empty_self = obj.__class__(self.clade_work_dir, self.conf)
@@ -414,76 +489,102 @@ class Extension(metaclass=abc.ABCMeta):
         # Passing "self" object to p.submit() can be very, very time consuming
         # if self is rather big. So, here we create an empty object
         # of the current type, and use it instead
-        if pass_self:
-            empty_self = self.__get_empty_obj(self)
+        empty_self = self.__get_empty_obj(self) if pass_self else None
 
         if os.environ.get("CLADE_DEBUG"):
-            for obj in objs:
-                if pass_self:
-                    process(empty_self, obj, *args)
-                else:
-                    process(obj, *args)
+            _, usage = _process_batch(
+                process, objs, args, empty_self, profile=bool(self.profile)
+            )
+
+            if usage:
+                self.profile.add_batch_usage(usage, in_worker=False)
+
             return
 
-        max_workers = self.conf.get("cpu_count", os.cpu_count())
+        max_workers = self.conf.get("cpu_count") or os.cpu_count()
 
-        with ProcessPoolExecutor(max_workers=max_workers) as p:
-            chunk_size = 2000
-            futures = []
-            finished_objs = 0
+        if self.cpu_budget:
+            max_workers = self.cpu_budget.acquire(max_workers)
 
-            # Submit objs to executor in chunks
-            for obj_chunk in yield_chunk(objs, chunk_size=chunk_size):
-                chunk_futures = []
+        try:
+            self.__execute_in_parallel(
+                objs, process, args, total_objs, empty_self, max_workers
+            )
+        finally:
+            if self.cpu_budget:
+                self.cpu_budget.release(max_workers)
 
-                for obj in obj_chunk:
-                    if pass_self:
-                        f = p.submit(process, empty_self, obj, *args)
-                    else:
-                        f = p.submit(process, obj, *args)
+    def __execute_in_parallel(
+        self, objs, process, args, total_objs, empty_self, max_workers
+    ):
+        batch_size = self._get_batch_size(total_objs, max_workers)
 
-                    chunk_futures.append(f)
-                    futures.append(f)
+        self.debug(
+            "Processing objects in batches of {} using {} workers".format(
+                batch_size, max_workers
+            )
+        )
 
-                while True:
-                    if not futures:
-                        break
+        with ProcessPoolExecutor(max_workers=max_workers) as p:
+            batches = yield_chunk(objs, chunk_size=batch_size)
+            futures = set()
+            finished_objs = 0
 
-                    done_futures = [x for x in futures if x.done()]
+            def submit_next_batch():
+                batch = next(batches, None)
+
+                if batch:
+                    futures.add(
+                        p.submit(
+                            _process_batch,
+                            process,
+                            batch,
+                            args,
+                            empty_self,
+                            profile=bool(self.profile),
+                        )
+                    )
 
-                    # Remove all futures that are already completed
-                    # to reduce memory usage
-                    futures = [x for x in futures if not x.done()]
+            # Keep only a few batches per worker in flight, so objs generator
+            # is not exhausted at once and memory usage stays low
+            for _ in range(max_workers * 4):
+                submit_next_batch()
 
-                    if total_objs:
-                        finished_objs += len(done_futures)
+            while futures:
+                done_futures, futures = wait(futures, return_when=FIRST_COMPLETED)
 
-                        msg = "Processed {} out of {} [{:.0f}%]".format(
-                            finished_objs,
-                            total_objs,
-                            finished_objs / total_objs * 100,
-                        )
-                        self.progress(msg)
-
-                    # Check return value of all finished futures
-                    for f in done_futures:
-                        try:
-                            f.result()
-                        except Exception as e:
-                            raise e
-
-                    # Submit next chunk if the current one is almost processed
-                    finished_chunk_objs = len([x for x in chunk_futures if x.done()])
-                    if finished_chunk_objs > (chunk_size - chunk_size // 10):
-                        break
+                for f in done_futures:
+                    # Raises exception if the batch has failed
+                    processed, usage = f.result()
+                    finished_objs += processed
+                    submit_next_batch()
+
+                    if usage:
+                        self.profile.add_batch_usage(usage)
 
-                    # Save a little bit of CPU time
-                    # skip sleep only for very small projects
-                    time.sleep(0.1)
+                if total_objs:
+                    msg = "Processed {} out of {} [{:.0f}%]".format(
+                        finished_objs,
+                        total_objs,
+                        finished_objs / total_objs * 100,
+                    )
+                    self.progress(msg)
 
         # Clean line
         print(" " * 79, end="\r")
 
+    def _get_batch_size(self, total_objs, max_workers):
+        """Get number of objects that are sent to a worker as a single task."""
+        if self.conf.get("batch_size"):
+            return self.conf["batch_size"]
+
+        if not total_objs:
+            return 100
+
+        # Several batches per worker are needed to balance the load
+        # if some objects take much longer to process than others
+        return max(1, min(1000, total_objs // (max_workers * 16)))
+
     @staticmethod
     def get_all_extensions():
         """Get all extension classes."""
@@ -579,3 +680,31 @@ class Extension(metaclass=abc.ABCMeta):
 
         if not self.logger:
             self.logger = get_logger("clade", with_name=False, conf=self.conf)
+
+
+@after_fork_in_child
+def _reset_meta_lock():
+    Extension._meta_lock = threading.RLock()
+
+
+def _process_batch(process, objs, args, obj_self=None, profile=False):
+    """Process a batch of objects inside a worker process.
+
+    Returns number of processed objects and resources used to process them,
+    if profile is True.
+    """
+    start_usage = get_usage() if profile else None
+    processed = 0
+
+    for obj in objs:
+        if obj_self is not None:
+            process(obj_self, obj, *args)
+        else:
+            process(obj, *args)
+
+        processed += 1
+
+    if not profile:
+        return processed, None
+
+    return processed, get_usage_delta(start_usage, get_usage())
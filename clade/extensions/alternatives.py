@@ -39,6 +39,8 @@ class Alternatives(Extension):
 
     __version__ = "2"
 
+    incremental = True
+
     def __init__(self, work_dir, conf=None):
         super().__init__(work_dir, conf)
 
@@ -55,11 +57,17 @@ class Alternatives(Extension):
     @Extension.prepare
     def parse(self, cmds_file):
         # Load all build commands that create "identical" file copies
-        cmds = self.__load_cmds()
+        cmds = [cmd for cmd in self.__load_cmds() if cmd["id"] > self.last_id]
 
         if not cmds:
             return
 
+        # Merge new alternatives with the ones found by the previous launch
+        if self.last_id and self.file_exists(self.alts_file):
+            self.alts = {
+                path: set(alts) for path, alts in self.load_alternatives().items()
+            }
+
         self.log(f"Parsing {len(cmds)} commands")
 
         for cmd in cmds:
@@ -149,7 +157,7 @@ class Alternatives(Extension):
 
         # Try to return first path that exists
         for path in paths:
-            if os.path.exists(self.extensions["Storage"].get_storage_path(path)):
+            if self.extensions["Storage"].stored_file_exists(path):
                 return path
 
         # Otherwise simply return the path itself
@@ -22,6 +22,7 @@ import subprocess
 
 from clade.extensions.linker import Linker
 from clade.extensions.opts import cc_preprocessor_opts
+from clade.types.deps_cache import DepsCache
 
 
 class CC(Linker):
@@ -29,6 +30,28 @@ class CC(Linker):
 
     __version__ = "1"
 
+    def __init__(self, work_dir, conf=None):
+        conf = conf if conf else dict()
+
+        # Dependencies can be collected from open() calls intercepted during the build
+        if conf.get("CC.deps_source") == "intercepted_open":
+            self.requires = self.requires + ["OpenFiles"]
+
+        super().__init__(work_dir, conf)
+
+        # Files read by assemblers and linkers launched by the compiler
+        # are not dependencies of the compiled source files
+        skip_which_list = (
+            self.conf.get("AS.which_list", [])
+            + self.conf.get("LD.which_list", [])
+            + ["collect2$"]
+        )
+        self.__skip_which = re.compile("(" + ")|(".join(skip_which_list) + ")")
+
+        # Dependencies can be reused by the next launches of Clade
+        deps_cache = self.conf.get("CC.deps_cache")
+        self.__deps_cache = DepsCache(deps_cache) if deps_cache else None
+
     def parse(self, cmds_file):
         which_list = list(self.conf.get("CC.which_list", []))
 
@@ -36,6 +59,11 @@ class CC(Linker):
             which_list.append("ccache")
 
         super().parse(cmds_file, which_list)
+        self._merge_deps_cache()
+
+    def _merge_deps_cache(self):
+        if self.__deps_cache:
+            self.__deps_cache.merge()
 
     def parse_cmd(self, cmd):
         cmd_id = cmd["id"]
@@ -84,7 +112,10 @@ class CC(Linker):
                     os.remove(file)
 
         if self.conf.get("Compiler.get_deps"):
-            deps = self.__get_deps(cmd_id, cmd["which"], parsed_cmd)
+            if self.conf.get("CC.deps_source") == "intercepted_open":
+                deps = self.__get_intercepted_deps(cmd_id, cmd["which"], parsed_cmd)
+            else:
+                deps = self.__get_deps(cmd_id, cmd["which"], parsed_cmd)
             self.dump_deps_by_id(cmd_id, deps, parsed_cmd["cwd"])
 
             if self.conf.get("Compiler.store_deps") and is_compilation_command:
@@ -102,13 +133,99 @@ class CC(Linker):
                     cmd_in, cmd_id
                 )
             )
-            deps_file = self.__collect_deps(cmd_id, which, cmd, cmd_in)
+            key = self.__get_deps_cache_key(which, cmd, cmd_in)
+
+            if key:
+                cached_deps = self.__deps_cache.get(key, cmd["cwd"])
+
+                if cached_deps is not None:
+                    self.debug("Dependencies of {!r} are cached".format(cmd_in))
+                    deps.extend(cached_deps)
+                    continue
+
+            deps_file, collected = self.__collect_deps(cmd_id, which, cmd, cmd_in)
+
+            # Missing headers are not a part of the key, so dependencies are
+            # cached only if the compiler succeeded and produced them
+            collected = collected and os.path.isfile(deps_file)
+            in_deps = self.__parse_deps(deps_file)
+
+            if key and collected:
+                self.__deps_cache.add(key, in_deps, cmd["cwd"])
+
+            deps.extend(in_deps)
+
+        return deps
+
+    def __get_deps_cache_key(self, which, cmd, cmd_in):
+        if not self.__deps_cache or cmd_in == "-":
+            return None
+
+        if not os.path.isabs(which):
+            which = os.path.join(cmd["cwd"], which)
 
-            deps.extend(self.__parse_deps(deps_file))
+        # Lists of dependencies with and without system headers are different
+        return self.__deps_cache.get_key(
+            which,
+            cmd["opts"],
+            cmd["cwd"],
+            cmd_in,
+            salt=str(bool(self.conf.get("CC.with_system_header_files"))),
+        )
+
+    def __get_intercepted_deps(self, cmd_id, which, cmd):
+        """Get a list of CC command dependencies from intercepted open() calls."""
+        deps = self.extensions["OpenFiles"].load_files_by_id(
+            cmd_id, skip_which=self.__skip_which
+        )
+
+        outs = {os.path.normpath(os.path.join(cmd["cwd"], out)) for out in cmd["out"]}
+        deps = [dep for dep in deps if dep not in outs]
+
+        if not self.conf.get("CC.with_system_header_files"):
+            lang = "c++" if self.name == "CXX" else "c"
+            system_dirs = tuple(
+                d + os.path.sep for d in self._get_system_include_dirs(which, lang)
+            )
+            deps = [dep for dep in deps if not dep.startswith(system_dirs)]
 
         return deps
 
+    @staticmethod
+    @functools.lru_cache()
+    def _get_system_include_dirs(which, lang):
+        system_dirs = []
+
+        try:
+            r = subprocess.run(
+                [which, "-E", "-Wp,-v", "-x", lang, os.devnull],
+                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except Exception:
+            return system_dirs
+
+        in_search_list = False
+
+        for line in r.stderr.splitlines():
+            if line.startswith("#include <...> search starts here:"):
+                in_search_list = True
+            elif line.startswith("End of search list."):
+                break
+            elif in_search_list:
+                # clang marks some directories, like "/dir (framework directory)"
+                system_dirs.append(os.path.normpath(line.strip().split(" (")[0]))
+
+        return system_dirs
+
     def __collect_deps(self, cmd_id, which, cmd, cmd_in):
+        """Execute the command to get the file with its dependencies.
+
+        Returns:
+            Path to the file with dependencies and the flag that is true if
+            the compiler was executed successfully
+        """
         deps_file = os.path.join(self.temp_dir, "{}-deps.txt".format(cmd_id))
 
         if self.conf.get("CC.with_system_header_files"):
@@ -125,15 +242,15 @@ class CC(Linker):
         # Do not execute a command that does not contain any input files
         if not cmd["in"] or "-" in cmd["in"]:
             self.debug("Command {} does not contain any input files".format(cmd_id))
-            return deps_file
+            return deps_file, False
 
         if not os.path.exists(which):
             self.warning("Compiler {!r} is no longer exists".format(which))
-            return deps_file
+            return deps_file, False
 
         if not os.path.exists(cmd["cwd"]):
             self.warning("CWD for command {!r} was deleted after build".format(cmd_id))
-            return deps_file
+            return deps_file, False
 
         self.debug("CWD: {!r}".format(cmd["cwd"]))
         self.debug(
@@ -142,14 +259,17 @@ class CC(Linker):
             )
         )
 
-        subprocess.call(
+        ret = subprocess.call(
             command,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             cwd=cmd["cwd"],
         )
 
-        return deps_file
+        if ret:
+            self.debug("Command {} exited with code {}".format(cmd_id, ret))
+
+        return deps_file, ret == 0
 
     def __parse_deps(self, deps_file):
         deps = []
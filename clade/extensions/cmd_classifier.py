@@ -0,0 +1,243 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import array
+import os
+import re
+import shutil
+
+from typing import Dict, List
+
+from clade.cmds import iter_lines, DELIMITER
+from clade.extensions.abstract import Extension
+
+
+class CmdClassifier(Extension):
+    """Classify all intercepted commands by their types in a single pass.
+
+    Type of a command is the name of the extension (CC, LD, etc.), which
+    "which_list" option matches the "which" field of the command. Commands
+    can match several types at once, so for each command a bit mask of its
+    types is stored.
+    """
+
+    __version__ = "1"
+
+    incremental = True
+
+    def __init__(self, work_dir, conf=None):
+        super().__init__(work_dir, conf)
+
+        self.types_file = "types.json"
+        self.masks_file = os.path.join(self.work_dir, "masks.bin")
+
+        self.which_lists = self.get_which_lists()
+        self.types = sorted(self.which_lists)
+
+        # Masks are stored in 32-bit integers
+        if len(self.types) > 32:
+            raise RuntimeError("Too many command types: {}".format(len(self.types)))
+
+        self.regexes = dict()
+
+        for cmd_type in self.types:
+            regex = self.__join_regexes(self.__get_base_which_list(cmd_type))
+            self.regexes[cmd_type] = regex
+
+        # Single regex that matches if any of the types match. Most of the
+        # intercepted commands (sh, sed, rm, etc.) are rejected by it at once
+        self.any_regex = self.__join_regexes(
+            [w for t in self.types for w in self.__get_base_which_list(t)]
+        )
+
+        self.ccache_types = [t for t in self.types if self.__processes_ccache(t)]
+
+        # Number of unique "which" values is small even for big builds
+        self.which_masks = dict()
+        self.ccache_masks = dict()
+
+        self.masks = None
+        self.cmd_ids = dict()
+
+    def get_which_lists(self) -> Dict[str, List[str]]:
+        """Get "which" lists of all command types from the configuration.
+
+        Lists are the same as the ones that extensions pass to Common.parse()
+        """
+        which_lists = dict()
+
+        for key in self.conf:
+            if not key.endswith(".which_list"):
+                continue
+
+            cmd_type = key[: -len(".which_list")]
+            which_lists[cmd_type] = list(self.conf[key])
+
+            if self.__processes_ccache(cmd_type):
+                which_lists[cmd_type].append("ccache")
+
+        return which_lists
+
+    def __processes_ccache(self, cmd_type):
+        return bool(self.conf.get(cmd_type + ".process_ccache"))
+
+    def __get_base_which_list(self, cmd_type):
+        return self.conf.get(cmd_type + ".which_list", [])
+
+    @staticmethod
+    def __join_regexes(which_list):
+        if not which_list:
+            return None
+
+        return re.compile("(" + ")|(".join(which_list) + ")")
+
+    @Extension.prepare
+    def parse(self, cmds_file):
+        masks = array.array("I")
+        counts = {cmd_type: 0 for cmd_type in self.types}
+        total_counts = {cmd_type: 0 for cmd_type in self.types}
+
+        if self.last_id:
+            info = self.load_data(self.types_file)
+
+            # Commands must be classified again if types were changed
+            if info["which_lists"] == self.which_lists:
+                masks = self.__load_masks()[: self.last_id]
+                total_counts.update(info["counts"])
+            else:
+                self.last_id = 0
+
+        for line in iter_lines(cmds_file, start_id=self.last_id + 1):
+            mask = self.__get_mask(line)
+            masks.append(mask)
+
+            if not mask:
+                continue
+
+            for i, cmd_type in enumerate(self.types):
+                if mask & (1 << i):
+                    counts[cmd_type] += 1
+
+        self.log(
+            "Classified {} commands: {}".format(
+                len(masks) - self.last_id,
+                ", ".join(
+                    "{} {}".format(counts[t], t) for t in self.types if counts[t]
+                ),
+            )
+        )
+
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        with open(self.masks_file, "wb") as fh:
+            masks.tofile(fh)
+
+        self.dump_data(
+            {
+                "types": self.types,
+                "which_lists": self.which_lists,
+                "counts": {t: total_counts[t] + counts[t] for t in self.types},
+                "cmds_size": os.path.getsize(cmds_file),
+            },
+            self.types_file,
+        )
+
+        # Identifiers loaded before parsing are outdated
+        self.masks = None
+        self.cmd_ids.clear()
+
+    def __load_masks(self):
+        masks = array.array("I")
+
+        with open(self.masks_file, "rb") as fh:
+            masks.frombytes(fh.read())
+
+        return masks
+
+    def __get_mask(self, line):
+        which = line.split(DELIMITER, 3)[2]
+
+        if which.endswith("ccache") and self.ccache_types:
+            # ccache commands are classified by the actual compiler
+            command = line.rstrip("\n").split(DELIMITER)[3:]
+            command = [x for x in command[1:] if x != "--ccache-skip"]
+
+            if not command:
+                return 0
+
+            if command[0] not in self.ccache_masks:
+                self.ccache_masks[command[0]] = self.__get_ccache_mask(command[0])
+
+            return self.ccache_masks[command[0]]
+
+        if which not in self.which_masks:
+            self.which_masks[which] = self.__get_which_mask(which, self.types)
+
+        return self.which_masks[which]
+
+    def __get_which_mask(self, which, cmd_types):
+        if not self.any_regex or not self.any_regex.search(which):
+            return 0
+
+        mask = 0
+
+        for i, cmd_type in enumerate(self.types):
+            regex = self.regexes[cmd_type]
+
+            if cmd_type in cmd_types and regex and regex.search(which):
+                mask |= 1 << i
+
+        return mask
+
+    def __get_ccache_mask(self, compiler):
+        which = shutil.which(compiler)
+
+        if not which:
+            return 0
+
+        return self.__get_which_mask(which, self.ccache_types)
+
+    def load_cmd_ids(self, cmds_file, cmd_type, which_list):
+        """Load identifiers of all commands of a given type.
+
+        Returns None if commands were classified using a different "which"
+        list or a different cmds file, and must be filtered again.
+        """
+        if cmd_type in self.cmd_ids:
+            return self.cmd_ids[cmd_type]
+
+        if not os.path.exists(self.masks_file):
+            return None
+
+        info = self.load_data(self.types_file)
+
+        if info["cmds_size"] != os.path.getsize(cmds_file):
+            self.debug("Command types are outdated: {!r} was changed".format(cmds_file))
+            return None
+
+        if info["which_lists"].get(cmd_type) != list(which_list):
+            self.debug("Command types are outdated for {}".format(cmd_type))
+            return None
+
+        if self.masks is None:
+            self.masks = self.__load_masks()
+
+        bit = 1 << info["types"].index(cmd_type)
+        cmd_ids = array.array(
+            "L", (i + 1 for i, mask in enumerate(self.masks) if mask & bit)
+        )
+
+        self.cmd_ids[cmd_type] = cmd_ids
+        return cmd_ids
@@ -28,6 +28,8 @@ class CmdGraph(Extension):
 
     __version__ = "3"
 
+    incremental = True
+
     def __init__(self, work_dir, conf=None):
         conf = conf if conf else dict()
 
@@ -102,10 +104,24 @@ class CmdGraph(Extension):
     @Extension.prepare
     def parse(self, _):
         cmds = self.load_all_cmds()
-        self.log("Parsing {} commands".format(len(cmds)))
+
+        if self.last_id:
+            self.graph = self.load_cmd_graph()
+            self.cmd_type = self.load_cmd_type()
+
+        self.log(
+            "Parsing {} commands".format(
+                len([cmd for cmd in cmds if cmd["id"] > self.last_id])
+            )
+        )
 
         for cmd in sorted(cmds, key=lambda x: x["id"]):
-            self.__add_to_graph(cmd)
+            if cmd["id"] > self.last_id:
+                self.__add_to_graph(cmd)
+            else:
+                # Commands from the previous launch are already in the graph,
+                # but new commands may use their output files
+                self.__add_to_out_dict(cmd)
 
         self.dump_dict_with_int_keys(self.graph, self.graph_file)
         self.dump_dict_with_int_keys(self.cmd_type, self.cmd_type_file)
@@ -142,11 +158,14 @@ class CmdGraph(Extension):
             if in_id not in self.graph[out_id]["using"]:
                 self.graph[out_id]["using"].append(in_id)
 
+        self.__add_to_out_dict(cmd)
+
+    def __add_to_out_dict(self, cmd):
         # Rewrite out_dict[cmd_out] values to keep the latest used command id
         for cmd_out in [
             self.extensions["Alternatives"].get_canonical_path(i) for i in cmd["out"]
         ]:
-            self.out_dict[cmd_out] = out_id
+            self.out_dict[cmd_out] = cmd["id"]
 
     def __print_cmd_graph(self):
         self.debug("Preparing dot file")
@@ -199,3 +218,19 @@ class CmdGraph(Extension):
             used_by.update(self.find_used_by(used_by_id))
 
         return used_by
+
+    def find_using(self, cmd_id: int) -> Set[int]:
+        """Find all commands whose output files are used (possibly indirectly) by the given command"""
+        if not self.graph:
+            self.graph = self.load_cmd_graph()
+
+        using: Set[int] = set()
+
+        if cmd_id not in self.graph:
+            return using
+
+        for using_id in self.graph[cmd_id]["using"]:
+            using.add(using_id)
+            using.update(self.find_using(using_id))
+
+        return using
@@ -14,14 +14,15 @@
 # limitations under the License.
 
 import abc
-import glob
+import bisect
 import os
 import re
 import sys
 
 from clade.extensions.abstract import Extension
-from clade.extensions.opts import requires_value, requires_mult_values
-from clade.cmds import iter_cmds_by_which, number_of_cmds_by_which
+from clade.extensions.opts import get_option_table
+from clade.cmds import iter_cmds_by_ids, iter_cmds_by_which, number_of_cmds_by_which
+from clade.types.segment_store import SegmentStore
 
 
 def unwrap(self, cmd):
@@ -35,16 +36,21 @@ class Common(Extension, metaclass=abc.ABCMeta):
         RuntimeError: Command can't be parsed as its type is not supported.
     """
 
-    requires = ["PidGraph", "Path"]
+    requires = ["PidGraph", "Path", "CmdClassifier"]
 
-    __version__ = "3"
+    __version__ = "4"
+
+    incremental = True
 
     def __init__(self, work_dir, conf=None):
         super().__init__(work_dir, conf)
 
-        self.raw_dir = "raw"
-        self.opts_dir = "opts"
-        self.cmds_dir = "cmds"
+        # Parsed commands, their options, raw commands and dependencies
+        # are stored in a single append-only storage instead of separate
+        # json files for each command
+        self.store = SegmentStore(
+            os.path.join(self.work_dir, "store"), ["cmds", "opts", "raw", "deps"]
+        )
 
         self.cmds_file = os.path.join(self.work_dir, "cmds.json")
 
@@ -77,8 +83,20 @@ class Common(Extension, metaclass=abc.ABCMeta):
     def parse(self, cmds_file, which_list):
         """Multiprocess parsing of build commands filtered by 'which' field."""
 
-        total_cmds = number_of_cmds_by_which(cmds_file, which_list)
-        cmds = iter_cmds_by_which(cmds_file, which_list)
+        cmd_ids = self.extensions["CmdClassifier"].load_cmd_ids(
+            cmds_file, self.name, which_list
+        )
+
+        # Skip commands that were parsed by the previous launch
+        start_id = self.last_id + 1
+
+        if cmd_ids is not None:
+            cmd_ids = cmd_ids[bisect.bisect_left(cmd_ids, start_id) :]
+            total_cmds = len(cmd_ids)
+            cmds = iter_cmds_by_ids(cmds_file, cmd_ids)
+        else:
+            total_cmds = number_of_cmds_by_which(cmds_file, which_list, start_id)
+            cmds = iter_cmds_by_which(cmds_file, which_list, start_id)
 
         if total_cmds:
             self.log(f"Parsing {total_cmds} commands")
@@ -101,38 +119,19 @@ class Common(Extension, metaclass=abc.ABCMeta):
         self.debug("Parse: {}".format(cmd))
         parsed_cmd = self._get_cmd_dict(cmd)
 
-        if cmd_type not in requires_value:
-            raise RuntimeError("Command type '{}' is not supported".format(cmd_type))
-
-        opts = iter(cmd["command"][1:])
-
-        for opt in opts:
-            # Options with multiple values.
-            if opt in requires_mult_values[cmd_type].keys():
-                vals = []
-                for _ in range(requires_mult_values[cmd_type][opt]):
-                    vals.append(next(opts))
-                parsed_cmd["opts"].extend([opt] + vals)
-            # Options with single values.
-            elif opt in requires_value[cmd_type]:
-                # Value is the next option.
-                val = next(opts)
-                if opt == "-o":
-                    parsed_cmd["out"].append(os.path.normpath(val))
-                else:
-                    parsed_cmd["opts"].extend([opt, val])
-            # Options without values
-            # Or with values that are not separated by space
-            elif re.search(r"^-", opt):
-                parsed_cmd["opts"].append(opt)
-            # Input files are not options and not values of other options
-            else:
-                parsed_cmd["in"].append(opt)
+        # Table is built once for each command type
+        parsed_cmd.update(get_option_table(cmd_type).parse(cmd["command"][1:]))
 
         return parsed_cmd
 
     def load_cmd_by_id(self, id):
-        return self.load_data(os.path.join(self.cmds_dir, "{}.json".format(id)))
+        cmd = self.store.get("cmds", id)
+
+        if cmd is None:
+            self.error("Command with id {!r} is not found".format(id))
+            raise FileNotFoundError
+
+        return cmd
 
     def dump_cmd_by_id(self, id, cmd):
         cmd = self._normalize_paths(cmd)
@@ -143,29 +142,29 @@ class Common(Extension, metaclass=abc.ABCMeta):
         self.dump_raw_by_id(cmd["id"], cmd["command"])
         del cmd["command"]
 
-        self.dump_data(cmd, os.path.join(self.cmds_dir, "{}.json".format(id)))
+        self.store.add("cmds", id, cmd)
 
     def load_raw_by_id(self, id):
-        raw_file = os.path.join(self.raw_dir, "{}.json".format(id))
-        return self.load_data(raw_file, raise_exception=True)
+        raw_command = self.store.get("raw", id)
+
+        if raw_command is None:
+            self.error("Raw command with id {!r} is not found".format(id))
+            raise FileNotFoundError
+
+        return raw_command
 
     def dump_raw_by_id(self, id, raw_command):
-        self.dump_data(raw_command, os.path.join(self.raw_dir, "{}.json".format(id)))
+        self.store.add("raw", id, raw_command)
 
     def load_opts_by_id(self, id):
-        opts_file = os.path.join(self.opts_dir, "{}.json".format(id))
-        opts = self.load_data(opts_file, raise_exception=False)
-
-        # if load_data can't find file, it returns empty dict()
-        # but opts must be a list
-        return opts if opts else []
+        return self.store.get("opts", id, [])
 
     def dump_opts_by_id(self, id, opts):
         # Do not dump options if they are empty
         if not opts:
             return
 
-        self.dump_data(opts, os.path.join(self.opts_dir, "{}.json".format(id)))
+        self.store.add("opts", id, opts)
 
     def dump_bad_cmd_id(self, cmd_id):
         os.makedirs(os.path.dirname(self.bad_ids), exist_ok=True)
@@ -194,13 +193,18 @@ class Common(Extension, metaclass=abc.ABCMeta):
     def __merge_all_cmds(self):
         """Merge all parsed commands into a single json file."""
         self.debug("Merging all parsed commands")
-        cmd_jsons = glob.glob(os.path.join(self.work_dir, self.cmds_dir, "*[0-9].json"))
+        self.store.merge()
 
         merged_cmds = []
 
-        for cmd_json in cmd_jsons:
-            parsed_cmd = self.load_data(cmd_json)
-            merged_cmds.append(parsed_cmd)
+        # Commands parsed by the previous launch are already merged
+        if self.last_id:
+            merged_cmds = self.load_data(self.cmds_file, raise_exception=False)
+            merged_cmds = [cmd for cmd in merged_cmds if cmd["id"] <= self.last_id]
+
+        for cmd_id in self.store.keys("cmds"):
+            if cmd_id > self.last_id:
+                merged_cmds.append(self.store.get("cmds", cmd_id))
 
         if not merged_cmds:
             self.debug("No commands were parsed")
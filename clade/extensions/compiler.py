@@ -24,19 +24,16 @@ class Compiler(Common):
     requires = Common.requires + ["Storage"]
     file_extensions = [".c", ".i", ".cpp", ".C", ".cc", ".cxx", "c++"]
 
-    __version__ = "2"
-
-    def __init__(self, work_dir, conf=None):
-        super().__init__(work_dir, conf)
-
-        self.deps_dir = os.path.join(self.work_dir, "deps")
+    __version__ = "3"
 
     def parse(self, cmds_file, which_list):
         super().parse(cmds_file, which_list)
 
-        if os.path.exists(self.cmds_file) and not os.path.exists(self.deps_dir):
+        if os.path.exists(self.cmds_file) and not self.store.keys("deps"):
             self.warning("All files with dependencies are empty")
 
+        self.extensions["Storage"].log_dedup_stats()
+
     def store_deps_files(self, deps, cwd):
         self.__store_src_files(deps, cwd, self.conf.get("Compiler.deps_encoding"))
 
@@ -51,12 +48,7 @@ class Compiler(Common):
             self.extensions["Storage"].add_file(file, encoding=encoding)
 
     def load_deps_by_id(self, cmd_id):
-        deps_file = os.path.join("deps", "{}.json".format(cmd_id))
-        deps = self.load_data(deps_file, raise_exception=False)
-
-        # if load_data can't find file, it returns empty dict()
-        # but deps must be a list
-        return deps if deps else []
+        return self.store.get("deps", cmd_id, [])
 
     def dump_deps_by_id(self, cmd_id, deps, cwd):
         # Do not dump deps if they are empty
@@ -68,7 +60,7 @@ class Compiler(Common):
         deps = list(set(deps))
 
         self.debug("Dependencies of command {}: {}".format(cmd_id, deps))
-        self.dump_data(deps, os.path.join(self.deps_dir, "{}.json".format(cmd_id)))
+        self.store.add("deps", cmd_id, deps)
 
     def is_a_compilation_command(self, cmd):
         if any(
@@ -13,7 +13,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import codecs
 import os
 import re
 
@@ -125,12 +124,12 @@ class CrossRef(CommonInfo):
             raw_locations[file] = {val}
 
     def __parse_file(self, file, raw_locations, ignore_errors=False, encoding="utf8"):
-        storage_file = self.extensions["Storage"].get_storage_path(file)
+        storage = self.extensions["Storage"]
 
-        if not os.path.exists(storage_file):
+        if not storage.stored_file_exists(file):
             # There may be some header files from CIF that are not in the storage
             if os.path.exists(file):
-                self.extensions["Storage"].add_file(file)
+                storage.add_file(file)
             else:
                 return None
 
@@ -140,10 +139,12 @@ class CrossRef(CommonInfo):
         sorted_pos = 0
 
         try:
-            if ignore_errors:
-                fp = codecs.open(storage_file, "r", encoding=encoding, errors="ignore")
-            else:
-                fp = open(storage_file, "r", encoding=encoding)
+            fp = storage.open_stored_file(
+                file,
+                "r",
+                encoding=encoding,
+                errors="ignore" if ignore_errors else "strict",
+            )
 
             for i, s in enumerate(fp):
                 if sorted_pos >= len(sorted_locs):
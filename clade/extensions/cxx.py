@@ -28,3 +28,4 @@ class CXX(CC):
             which_list.append("ccache")
 
         super(CC, self).parse(cmds_file, which_list)
+        self._merge_deps_cache()
@@ -14,22 +14,25 @@
 # limitations under the License.
 
 import array
+import os
 
 from clade.extensions.abstract import Extension
 from clade.extensions.common_info import CommonInfo
 from clade.extensions.utils import Location
+from clade.types.packed_store import PackedStore
 
 
 class Functions(CommonInfo):
     requires = ["SrcGraph", "Info"]
 
-    __version__ = "3"
+    __version__ = "4"
 
     def __init__(self, work_dir, conf=None):
         super().__init__(work_dir, conf)
 
         self.funcs = dict()
         self.funcs_folder = "functions"
+        self.funcs_store = PackedStore(os.path.join(self.work_dir, "functions.pack"))
 
         self.funcs_by_file = dict()
         self.funcs_by_file_folder = "functions_by_file"
@@ -42,28 +45,41 @@ class Functions(CommonInfo):
         self.__group_functions_by_file()
         self._clean_warn_log()
 
-        self.dump_data_by_key(self.funcs, self.funcs_folder)
+        self.funcs_store.dump(self.funcs)
         self.dump_data_by_key(self.funcs_by_file, self.funcs_by_file_folder)
 
+        if self.conf.get("Functions.export_json"):
+            self.dump_data_by_key(self.funcs, self.funcs_folder)
+
         self.extensions["SrcGraph"].unload_src_graph()
         self.funcs.clear()
         self.funcs_by_file.clear()
 
     def load_functions(self, funcs=None):
         """Load information about functions."""
-        return self.load_data_by_key(self.funcs_folder, funcs)
+        return {func: data[func] for func, data in self.yield_functions(funcs)}
 
     def yield_functions(self, funcs=None):
-        yield from self.yield_data_by_key(self.funcs_folder, funcs)
-
-    def load_definitions(self, func):
-        """Load all available definitions for a given function."""
-        funcs = self.load_functions([func])
+        if funcs and not isinstance(funcs, list) and not isinstance(funcs, set):
+            raise TypeError(
+                "Provide a list or set of functions to retrieve data but not {!r}".format(
+                    type(funcs).__name__
+                )
+            )
 
         if funcs:
-            return funcs[func]
+            for func in funcs:
+                definitions = self.funcs_store.get(func)
+
+                if definitions is not None:
+                    yield func, {func: definitions}
+        else:
+            for func, definitions in self.funcs_store.items():
+                yield func, {func: definitions}
 
-        return []
+    def load_definitions(self, func):
+        """Load all available definitions for a given function."""
+        return self.funcs_store.get(func, [])
 
     def load_functions_by_file(self, files=None):
         """Load information about functions grouped by files."""
@@ -268,5 +284,5 @@ class Functions(CommonInfo):
         return self.file_exists_by_key(file, self.funcs_by_file_folder)
 
     def function_exists(self, func):
-        """Check that there is file on disk with info about given function."""
-        return self.file_exists_by_key(func, self.funcs_folder)
+        """Check that there is info about given function."""
+        return func in self.funcs_store
@@ -114,6 +114,10 @@ class Info(Extension):
 
         self.storage_dir = self.extensions["Storage"].get_storage_dir()
 
+        # CIF reads source files and headers directly from the Storage directory
+        if self.extensions["Storage"].is_packed():
+            self.extensions["Storage"].unpack()
+
         self.log(f"Parsing {total_cmds} commands")
         self.execute_in_parallel(cmds, Info._run_cif, total_objs=total_cmds)
 
@@ -143,15 +147,23 @@ class Info(Extension):
         self.__normalize_cif_output()
 
     def __check_cif(self):
-        if not shutil.which(self.conf.get("Info.cif", "cif")):
+        cif = self.conf.get("Info.cif", "cif")
+
+        if not shutil.which(cif):
             raise RuntimeError("Can't find CIF in PATH")
 
-        # Check that CIF was not added in PATH via relative path
-        current_dir = os.getcwd()
-        os.chdir(self.temp_dir)
-        if not shutil.which(self.conf.get("Info.cif", "cif")):
+        # Check that CIF was not added in PATH via relative path, since it is
+        # executed in other directories. Working directory is shared by all
+        # extensions executed in parallel threads, so it is not changed here
+        if os.path.dirname(cif):
+            found = os.path.isabs(cif)
+        else:
+            paths = os.environ.get("PATH", os.defpath).split(os.pathsep)
+            abs_paths = os.pathsep.join(p for p in paths if os.path.isabs(p))
+            found = abs_paths and shutil.which(cif, path=abs_paths)
+
+        if not found:
             raise RuntimeError("Path to CIF must be absolute")
-        os.chdir(current_dir)
 
     def _run_cif(self, cmd):
         if self.__is_cmd_bad_for_cif(cmd):
@@ -173,17 +185,18 @@ class Info(Extension):
             cif_s_regex = compile_s_regex(cif_supported_opts + extra_supported_opts)
 
         for cmd_in in cmd["in"]:
-            storage_cmd_in = self.extensions["Storage"].get_storage_path(cmd_in)
-
             if use_pre:
                 cif_in = self.extensions[cmd["type"]].get_pre_file_by_path(
                     cmd_in, cmd["cwd"]
                 )
+
+                if not os.path.exists(cif_in):
+                    continue
             else:
-                cif_in = storage_cmd_in
+                if not self.extensions["Storage"].stored_file_exists(cmd_in):
+                    continue
 
-            if not os.path.exists(cif_in):
-                continue
+                cif_in = self.extensions["Storage"].get_storage_path(cmd_in)
 
             cif_out = os.path.join(
                 tmp_dir, os.path.basename(cif_in.lstrip(os.sep)) + ".o"
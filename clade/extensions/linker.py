@@ -14,10 +14,44 @@
 
 import abc
 import os
-import re
 
 from clade.extensions.compiler import Compiler
-from clade.extensions.opts import requires_value
+from clade.extensions.opts import OptionTable, get_option_table
+from clade.utils import dump
+
+# Options with joined names or paths of libraries and search directories
+library_table = OptionTable(prefixes=["-l", "--library="])
+library_path_table = OptionTable(prefixes=["-L", "--library-path="])
+
+# Default search dirs of linkers that were already used by the current process
+_default_searchdirs = dict()
+
+
+# Listings of search dirs along with their modification time
+_listings = dict()
+
+
+def _listdir(path):
+    # Search dirs are listed again only if they were modified since the
+    # previous listing, since new libraries may appear between live rounds
+    # and incremental parses within the same process
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        # Missing dirs are not cached, since they may be created later
+        return frozenset()
+
+    cached = _listings.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        listing = frozenset(os.listdir(path))
+    except OSError:
+        return frozenset()
+
+    _listings[path] = (mtime, listing)
+    return listing
 
 
 class Linker(Compiler):
@@ -25,24 +59,28 @@ class Linker(Compiler):
 
     __version__ = "1"
 
+    searchdirs_file = "searchdirs.json"
+
     def _parse_linker_opts(self, which, parsed_cmd):
         archives = []
 
         searchdirs = self.__get_searchdirs(which, parsed_cmd)
 
+        arity = get_option_table(self.name).arity
+
         opts = iter(parsed_cmd["opts"])
         for opt in opts:
             if opt in ["-l", "--library"]:
                 name = next(opts)
 
                 self.__find_archive(name, searchdirs, parsed_cmd)
-            elif opt in requires_value[self.name]:
+            elif opt in arity:
                 continue
-            elif opt.startswith("-l") or opt.startswith("--library="):
-                name = re.sub(r"^-l", "", opt)
-                name = re.sub(r"^--library=", "", name)
+            else:
+                prefix = library_table.match(opt)
 
-                self.__find_archive(name, searchdirs, parsed_cmd)
+                if prefix:
+                    self.__find_archive(opt[len(prefix) :], searchdirs, parsed_cmd)
 
         return archives
 
@@ -53,7 +91,7 @@ class Linker(Compiler):
 
     def __get_searchdirs(self, which, parsed_cmd):
         # sysroot paths are not supported (searchdir begins with "=")
-        default_searchdirs = self._get_default_searchdirs(which)
+        default_searchdirs = self.__get_default_searchdirs(which)
         self.debug(f"Default search dirs for {which} are: {default_searchdirs}")
 
         searchdirs = default_searchdirs + self.conf.get("Linker.searchdirs", [])
@@ -65,17 +103,61 @@ class Linker(Compiler):
 
                 path = os.path.normpath(os.path.join(parsed_cmd["cwd"], path))
                 searchdirs.append(path)
-            elif opt.startswith("-L") or opt.startswith("--library-path="):
-                path = re.sub(r"^-L", "", opt)
-                path = re.sub(r"^--library-path=", "", path)
+            else:
+                prefix = library_path_table.match(opt)
 
-                path = os.path.normpath(os.path.join(parsed_cmd["cwd"], path))
-                searchdirs.append(os.path.normpath(path))
+                if prefix:
+                    path = opt[len(prefix) :]
+
+                    path = os.path.normpath(os.path.join(parsed_cmd["cwd"], path))
+                    searchdirs.append(os.path.normpath(path))
 
         syslibroot = self.__get_syslibroot(parsed_cmd)
 
         return [syslibroot + s for s in searchdirs]
 
+    def __get_default_searchdirs(self, which):
+        """Get default search dirs, which are computed once for each linker binary.
+
+        Search dirs are stored in the working directory of the extension,
+        so worker processes and next launches do not execute linkers again.
+        They are computed again if the linker binary is changed.
+        """
+        try:
+            st = os.stat(which)
+        except OSError:
+            return self._get_default_searchdirs(which)
+
+        linker = os.path.realpath(which)
+        signature = [st.st_size, st.st_mtime_ns]
+        searchdirs_file = os.path.join(self.work_dir, self.searchdirs_file)
+
+        cached = _default_searchdirs.get((searchdirs_file, linker))
+        if cached and cached["signature"] == signature:
+            return list(cached["searchdirs"])
+
+        stored = self.load_data(searchdirs_file, raise_exception=False)
+        cached = stored.get(linker)
+
+        if not cached or cached["signature"] != signature:
+            cached = {
+                "signature": signature,
+                "searchdirs": self._get_default_searchdirs(which),
+            }
+            stored[linker] = cached
+
+            # File is replaced atomically, since it can be read by other
+            # workers. Search dirs can be computed by several workers at
+            # the same time, but results are the same
+            tmp_file = "{}.{}.tmp".format(searchdirs_file, os.getpid())
+            os.makedirs(self.work_dir, exist_ok=True)
+            dump(stored, tmp_file)
+            os.replace(tmp_file, searchdirs_file)
+
+        _default_searchdirs[(searchdirs_file, linker)] = cached
+
+        return list(cached["searchdirs"])
+
     def __get_syslibroot(self, parsed_cmd):
         syslibroot = ""
 
@@ -104,7 +186,13 @@ class Linker(Compiler):
             names.append(name + ".a")
 
         for searchdir in searchdirs:
+            listing = _listdir(searchdir)
+
             for basename in names:
+                # Names like ":dir/libname.a" are not in the listing
+                if os.sep not in basename and basename not in listing:
+                    continue
+
                 archive = os.path.normpath(os.path.join(searchdir, basename))
                 if os.path.exists(archive):
                     if archive not in parsed_cmd["in"]:
@@ -0,0 +1,136 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+from clade import compression
+from clade.cmds import iter_cmds
+from clade.extensions.abstract import Extension
+from clade.fingerprints import IGNORED_DIRS, is_read_flags
+from clade.types.segment_store import SegmentStore
+
+
+class OpenFiles(Extension):
+    """Parse open() calls intercepted during the build (open.txt file).
+
+    For each command it collects the list of existing files that the command
+    opened for reading, and for each command it stores the list of its
+    child commands, so files read by a command together with its children
+    (like cc1 launched by gcc) can be obtained without executing anything.
+    """
+
+    __version__ = "1"
+
+    def __init__(self, work_dir, conf=None):
+        super().__init__(work_dir, conf)
+
+        self.store = SegmentStore(
+            os.path.join(self.work_dir, "store"), ["files", "children"]
+        )
+
+    @Extension.prepare
+    def parse(self, cmds_file):
+        open_file = os.path.join(os.path.dirname(cmds_file), "open.txt")
+
+        if not os.path.exists(open_file):
+            self.warning(
+                "File with intercepted open() calls does not exist: {!r}".format(
+                    open_file
+                )
+            )
+            return
+
+        cwd_by_id = dict()
+        children = dict()
+
+        for cmd in iter_cmds(cmds_file):
+            cwd_by_id[cmd["id"]] = sys.intern(cmd["cwd"])
+            children.setdefault(cmd["pid"], []).append([cmd["id"], cmd["which"]])
+
+        self.log("Parsing open() calls")
+        files_by_id = self.__parse_open_file(open_file, cwd_by_id)
+
+        for cmd_id in sorted(files_by_id):
+            self.store.add("files", cmd_id, sorted(files_by_id[cmd_id]))
+
+        for cmd_id in sorted(children):
+            self.store.add("children", cmd_id, children[cmd_id])
+
+        self.store.merge()
+
+    def __parse_open_file(self, open_file, cwd_by_id):
+        files_by_id = dict()
+
+        # Files that are opened by many commands are checked only once
+        is_file = dict()
+
+        with compression.open_file(
+            open_file, encoding="utf-8", errors="surrogateescape"
+        ) as fh:
+            for line in fh:
+                try:
+                    cmd_id, exists, flags, path = line.rstrip("\n").split(" ", 3)
+                    cmd_id = int(cmd_id)
+                    flags = int(flags)
+                except ValueError:
+                    self.debug("Skip incorrect line: {!r}".format(line))
+                    continue
+
+                if exists != "1" or not is_read_flags(flags):
+                    continue
+
+                if not os.path.isabs(path):
+                    if cmd_id not in cwd_by_id:
+                        continue
+
+                    path = os.path.join(cwd_by_id[cmd_id], path)
+
+                path = sys.intern(os.path.normpath(path))
+
+                if path.startswith(IGNORED_DIRS):
+                    continue
+
+                if path not in is_file:
+                    # Temporary files may be already removed
+                    is_file[path] = os.path.isfile(path)
+
+                if is_file[path]:
+                    files_by_id.setdefault(cmd_id, set()).add(path)
+
+        return files_by_id
+
+    def load_files_by_id(self, cmd_id, skip_which=None):
+        """Get sorted list of files read by the command and its child commands.
+
+        Args:
+            cmd_id: Id of the command
+            skip_which: Regex object. Child commands, whose "which" field
+                matches it, are skipped together with their children.
+        """
+        files = set()
+        ids = [int(cmd_id)]
+
+        while ids:
+            cmd_id = ids.pop()
+            files.update(self.store.get("files", cmd_id, []))
+
+            for child_id, which in self.store.get("children", cmd_id, []):
+                if skip_which and skip_which.search(which):
+                    continue
+
+                ids.append(child_id)
+
+        return sorted(files)
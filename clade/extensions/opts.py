@@ -16,6 +16,7 @@
 # These are options like "-include header.h" with space betwen option and value
 # Options with values that are not separated by space should not be included here
 
+import functools
 import os
 import re
 
@@ -567,11 +568,168 @@ cif_supported_opts = (
 clang_supported_opts = cif_supported_opts + ["--target", "--sysroot", "-target"]
 
 
+class OptionTable:
+    """Compiled table of known options of a single command type.
+
+    Options with separate values are mapped to the number of their values,
+    so each argument of a command is classified by a single dictionary
+    lookup. Options that can be followed by joined values (like "-DX" or
+    "-I/usr/include") are stored in a shallow prefix tree: its first level
+    is keyed by the first characters of options, and each leaf is a short
+    list of options sorted from the longest to the shortest one. Options
+    that end with "$" match only the whole argument, and options that
+    contain other regular expression syntax are matched by a regex.
+    Results of prefix lookups are remembered, since the same arguments
+    are repeated in many commands.
+    """
+
+    KEY_LEN = 2
+    # Maximum number of remembered results of match()
+    MAX_MATCHED = 1 << 16
+    REGEX_CHARS = set("\\.^$*+?{}[]|()")
+
+    def __init__(self, opts=(), mult_opts=None, prefixes=()):
+        self.arity = dict.fromkeys(opts, 1)
+        self.arity.update(mult_opts if mult_opts else dict())
+
+        self.__tree = dict()
+        regexes = []
+
+        for prefix in prefixes:
+            exact = prefix.endswith("$")
+            name = prefix[:-1] if exact else prefix
+
+            if self.REGEX_CHARS.intersection(name):
+                regexes.append(prefix)
+                continue
+
+            self.__tree.setdefault(name[: self.KEY_LEN], []).append((name, exact))
+
+        for leaf in self.__tree.values():
+            leaf.sort(key=lambda x: len(x[0]), reverse=True)
+
+        self.__key_lens = sorted({len(key) for key in self.__tree}, reverse=True)
+        self.__regex = re.compile("|".join(regexes)) if regexes else None
+        self.__matched = dict()
+
+    def match(self, opt):
+        """Get the longest known option that is a prefix of opt, or None."""
+        # Most arguments are repeated in many commands of the same build
+        try:
+            return self.__matched[opt]
+        except KeyError:
+            pass
+
+        if len(self.__matched) >= self.MAX_MATCHED:
+            self.__matched.clear()
+
+        name = self.__match(opt)
+        self.__matched[opt] = name
+
+        return name
+
+    def __match(self, opt):
+        for key_len in self.__key_lens:
+            for name, exact in self.__tree.get(opt[:key_len], ()):
+                if opt == name or (not exact and opt.startswith(name)):
+                    return name
+
+        if self.__regex:
+            m = self.__regex.match(opt)
+
+            if m:
+                return m.group(0)
+
+        return None
+
+    def split_joined(self, opt):
+        """Split option into the known option and its joined value.
+
+        Value can be separated from the option by "=", like in
+        "-isysroot=/path". If there is no known option, None is returned
+        instead of the option.
+        """
+        name = self.match(opt)
+
+        if name is None:
+            return None, None
+
+        value = opt[len(name) :]
+
+        if value.startswith("="):
+            value = value[1:]
+
+        return name, value
+
+    def parse(self, args):
+        """Split arguments of a command into input files, output files and options.
+
+        Values of options are kept next to them, except for values of "-o",
+        which are output files.
+
+        Raises:
+            StopIteration: Option requires more values than there are left.
+        """
+        parsed = {"in": [], "out": [], "opts": []}
+        ins, outs, opts = parsed["in"], parsed["out"], parsed["opts"]
+        arity = self.arity
+
+        args = iter(args)
+        for arg in args:
+            n = arity.get(arg)
+
+            # Options without values or with values that are not
+            # separated by space, and input files
+            if n is None:
+                if arg.startswith("-"):
+                    opts.append(arg)
+                else:
+                    ins.append(arg)
+            elif n == 1:
+                val = next(args)
+
+                if arg == "-o":
+                    outs.append(os.path.normpath(val))
+                else:
+                    opts.append(arg)
+                    opts.append(val)
+            else:
+                opts.append(arg)
+                for _ in range(n):
+                    opts.append(next(args))
+
+        return parsed
+
+
+@functools.lru_cache()
+def get_option_table(cmd_type):
+    """Get table of options of the command type, which is built once per process.
+
+    Raises:
+        RuntimeError: Command type is not supported.
+    """
+    if cmd_type not in requires_value:
+        raise RuntimeError("Command type '{}' is not supported".format(cmd_type))
+
+    return OptionTable(
+        requires_value[cmd_type], requires_mult_values.get(cmd_type, dict())
+    )
+
+
+@functools.lru_cache()
+def _compile_s_regex(opts):
+    return OptionTable(prefixes=opts)
+
+
 def compile_s_regex(opts):
-    return re.compile("|".join(opts))
+    """Compile list of supported options, which are prefixes of arguments.
 
+    Returned table has match() method, like compiled regexes.
+    """
+    return _compile_s_regex(tuple(opts))
 
-i_regex = re.compile("(" + "|".join(include_opts) + ")=?(.*)")
+
+i_regex = OptionTable(prefixes=include_opts)
 cif_s_regex = compile_s_regex(cif_supported_opts)
 clang_s_regex = compile_s_regex(clang_supported_opts)
 
@@ -598,9 +756,9 @@ def filter_opts(opts, get_storage_path=None, s_regex=None):
         if not s_regex.match(opt):
             continue
 
-        m = i_regex.match(opt)
+        name, path = i_regex.split_joined(opt)
 
-        if not m:
+        if name is None:
             filtered_opts.append(opt)
 
             if opt in requires_value["CC"]:
@@ -608,9 +766,6 @@ def filter_opts(opts, get_storage_path=None, s_regex=None):
 
             continue
 
-        name = m.group(1)
-        path = m.group(2)
-
         if path:
             if (
                 get_storage_path
@@ -22,6 +22,8 @@ from clade.extensions.abstract import Extension
 class PidGraph(Extension):
     __version__ = "1"
 
+    incremental = True
+
     def __init__(self, work_dir, conf=None):
         super().__init__(work_dir, conf)
 
@@ -31,10 +33,15 @@ class PidGraph(Extension):
     @Extension.prepare
     def parse(self, cmds_file):
         self.log(
-            "Parsing {} commands".format(get_last_id(cmds_file, raise_exception=True))
+            "Parsing {} commands".format(
+                get_last_id(cmds_file, raise_exception=True) - self.last_id
+            )
         )
 
-        for cmd in iter_cmds(cmds_file):
+        if self.last_id:
+            self.pid_by_id = self.load_pid_by_id()
+
+        for cmd in iter_cmds(cmds_file, start_id=self.last_id + 1):
             self.pid_by_id[cmd["id"]] = cmd["pid"]
 
         self.dump_dict_with_int_keys(self.pid_by_id, self.pid_by_id_file)
@@ -21,6 +21,8 @@ from clade.extensions.abstract import Extension
 class SrcGraph(Extension):
     __version__ = "2"
 
+    incremental = True
+
     always_requires = ["CmdGraph", "Storage", "Alternatives"]
     requires = always_requires  # exact list is specified in presets.json
 
@@ -56,10 +58,18 @@ class SrcGraph(Extension):
     @Extension.prepare
     def parse(self, _):
         cmds = list(self.load_compilation_cmds())
+
+        if self.last_id:
+            cmds = self.__get_cmds_to_update(cmds)
+            self.src_info = self.load_src_info()
+
         cmds_number = len(cmds)
 
         if cmds_number:
             self.log(f"Parsing {cmds_number} commands")
+        elif self.last_id:
+            self.log("There are no new compilation commands")
+            return
         else:
             self.error("No compilation commands found")
             raise RuntimeError
@@ -70,6 +80,9 @@ class SrcGraph(Extension):
             self.error("Source graph is empty")
             raise RuntimeError
 
+        if self.last_id:
+            self.__merge_src_graph()
+
         self.dump_data(self.src_info, self.src_info_file)
         self.dump_src_graph()
 
@@ -91,6 +104,33 @@ class SrcGraph(Extension):
 
         return cmds
 
+    def __get_cmds_to_update(self, cmds):
+        """Get new compilation commands, and old ones whose output files are
+        used (possibly indirectly) by new commands, since their lists of
+        commands that use them have changed."""
+        cmd_graph = self.extensions["CmdGraph"]
+        new_ids = [i for i in cmd_graph.load_cmd_graph() if i > self.last_id]
+
+        ids_to_update = set()
+
+        # If a command is already added, then all commands that it uses
+        # were added together with it
+        for cmd_id in sorted(new_ids, reverse=True):
+            if cmd_id not in ids_to_update:
+                ids_to_update.add(cmd_id)
+                ids_to_update.update(cmd_graph.find_using(cmd_id))
+
+        return [cmd for cmd in cmds if cmd["id"] in ids_to_update]
+
+    def __merge_src_graph(self):
+        """Merge updated part of the source graph with the existing one."""
+        src_graph = self.load_src_graph(list(self.src_graph))
+
+        for file in self.src_graph:
+            src_graph.setdefault(file, dict()).update(self.src_graph[file])
+
+        self.src_graph = src_graph
+
     def __generate_src_graph(self, cmds):
         # We can do nothing without command graph
         if not self.extensions["CmdGraph"].cmd_graph_exists():
@@ -114,6 +154,8 @@ class SrcGraph(Extension):
 
                 if src_file not in self.src_graph:
                     self.src_graph[src_file] = dict()
+
+                if src_file not in self.src_info:
                     self.src_info[src_file] = {"loc": self.__count_file_loc(src_file)}
 
                 # The following means: source file src_file is compiled
@@ -123,12 +165,16 @@ class SrcGraph(Extension):
 
     def __count_file_loc(self, file):
         """Count number of lines of code in the file."""
-        if self.conf.get("Compiler.store_deps"):
-            file = self.extensions["Storage"].get_storage_path(file)
-
         try:
             i = -1
-            with open(file, "rb") as f:
+
+            # Storage can be packed into a single file
+            if self.conf.get("Compiler.store_deps"):
+                f = self.extensions["Storage"].open_stored_file(file)
+            else:
+                f = open(file, "rb")
+
+            with f:
                 for i, _ in enumerate(f):
                     pass
 
@@ -14,12 +14,31 @@
 # limitations under the License.
 
 import charset_normalizer
+import errno
 import functools
+import hashlib
+import io
+import itertools
 import os
 import shutil
+import stat
+import sys
 import tempfile
 
 from clade.extensions.abstract import Extension
+from clade.types.file_pack import FilePack
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request that makes the destination file share extents
+# of the source file (copy-on-write), see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+# Counter of temporary files created by the current process
+_tmp_counter = itertools.count()
 
 
 class Storage(Extension):
@@ -27,6 +46,33 @@ class Storage(Extension):
 
     __version__ = "1"
 
+    # Names inside the working directory that are not part of the path tree
+    blobs_dir_name = ".blobs"
+    dedup_file = ".dedup.txt"
+    pack_file = ".pack"
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, work_dir, conf=None):
+        super().__init__(work_dir, conf)
+
+        self.blobs_dir = os.path.abspath(
+            self.conf.get("Storage.blobs_dir")
+            or os.path.join(self.work_dir, self.blobs_dir_name)
+        )
+
+        link_modes = {"hardlink": ["hardlink", "reflink"], "reflink": ["reflink"]}
+        dedup = self.conf.get("Storage.dedup")
+
+        if dedup and dedup not in link_modes:
+            raise RuntimeError(
+                "Unsupported value of 'Storage.dedup' option: {!r}".format(dedup)
+            )
+
+        self.__link_modes = link_modes.get(dedup, [])
+
+        self.__pack = FilePack(os.path.join(self.work_dir, self.pack_file))
+
     @Extension.prepare
     def parse(self, cmds_file):
         files_to_add = self.conf.get("Storage.files_to_add", [])
@@ -49,9 +95,12 @@ class Storage(Extension):
             for root, _, filenames in os.walk(file):
                 for filename in filenames:
                     filename = os.path.join(root, filename)
-                    if not filename.startswith(self.clade_work_dir):
+                    if not filename.startswith((self.clade_work_dir, self.blobs_dir)):
                         self.add_file(filename)
 
+        if files_to_add:
+            self.log_dedup_stats()
+
     def add_file(self, filename, storage_filename=None, encoding=None):
         """Add file to the storage.
 
@@ -71,7 +120,7 @@ class Storage(Extension):
 
         dst = os.path.normpath(self.work_dir + os.sep + storage_filename)
 
-        if self.__path_exists(dst):
+        if self.__path_exists(dst) or self.__get_pack_name(dst) in self.__pack:
             return
 
         try:
@@ -95,7 +144,7 @@ class Storage(Extension):
 
         if not self.conf.get("Storage.convert_to_utf8"):
             self.debug("Storing {!r}".format(filename))
-            shutil.copyfile(filename, dst)
+            self.__store_file(filename, dst)
         else:
             with open(filename, "rb") as fh:
                 content_bytes = fh.read()
@@ -112,7 +161,7 @@ class Storage(Extension):
                 self.warning(
                     "Can't confidently detect encoding of {!r}.".format(filename)
                 )
-                shutil.copyfile(filename, dst)
+                self.__store_file(filename, dst)
                 return
 
             self.debug(
@@ -145,10 +194,149 @@ class Storage(Extension):
                 self.warning("Couldn't set permissions for {!r}".format(filename))
 
             try:
-                os.replace(f.name, dst)
+                if self.__link_modes:
+                    self.__store_file(f.name, dst, keep_mode=True)
+                    os.remove(f.name)
+                else:
+                    os.replace(f.name, dst)
             except OSError:
                 os.remove(f.name)
 
+    def __store_file(self, filename, dst, keep_mode=False):
+        if not self.__link_modes:
+            shutil.copyfile(filename, dst)
+            return
+
+        blob, size, existed = self.__add_blob(filename, keep_mode)
+
+        # Only files that are linked to already existing blobs take no space
+        if self.__link_blob(blob, dst) and existed:
+            self.__add_dedup_stats(size)
+
+    def __add_blob(self, filename, keep_mode):
+        """Copy file to the blob named by the hash of its content and mode.
+
+        Returns:
+            Path to the blob, its size, and True if the same blob already existed
+        """
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+        tmp = os.path.join(
+            self.blobs_dir, ".{}.{}.tmp".format(os.getpid(), next(_tmp_counter))
+        )
+        digest = hashlib.sha256()
+
+        try:
+            # Blob is created with the same mode as shutil.copyfile() uses
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+
+            with os.fdopen(fd, "wb") as out, open(filename, "rb") as fh:
+                for chunk in iter(lambda: fh.read(self.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            if keep_mode:
+                shutil.copymode(filename, tmp)
+
+            st = os.stat(tmp)
+
+            # Hardlinks share the mode, so files with different modes
+            # are stored in different blobs
+            name = "{}-{:o}".format(digest.hexdigest(), stat.S_IMODE(st.st_mode))
+            blob = os.path.join(self.blobs_dir, name[:2], name[2:])
+
+            if os.path.exists(blob):
+                os.remove(tmp)
+                return blob, st.st_size, True
+
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp, blob)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        return blob, st.st_size, False
+
+    def __link_blob(self, blob, dst):
+        """Create file in the path tree that shares content with the blob.
+
+        Returns:
+            True if the file was linked, and False if it was copied
+        """
+        for mode in self.__link_modes:
+            try:
+                if mode == "hardlink":
+                    os.link(blob, dst)
+                else:
+                    self.__reflink(blob, dst)
+
+                return True
+            except FileExistsError:
+                # File was stored by another process
+                return False
+            except OSError as e:
+                self.debug("Can't {} {!r}: {}".format(mode, blob, e))
+
+        shutil.copyfile(blob, dst)
+        shutil.copymode(blob, dst)
+        return False
+
+    @staticmethod
+    def __reflink(blob, dst):
+        if not fcntl or not sys.platform.startswith("linux"):
+            raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported")
+
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+
+        try:
+            with open(blob, "rb") as fh:
+                fcntl.ioctl(fd, FICLONE, fh.fileno())
+
+            os.chmod(dst, stat.S_IMODE(os.stat(blob).st_mode))
+        except OSError:
+            os.close(fd)
+            os.remove(dst)
+            raise
+
+        os.close(fd)
+
+    def __add_dedup_stats(self, size):
+        # Files are stored by worker processes, so each of them appends
+        # sizes of deduplicated files to the same file
+        fd = os.open(
+            os.path.join(self.work_dir, self.dedup_file),
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+            0o666,
+        )
+
+        try:
+            os.write(fd, "{}\n".format(size).encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def get_dedup_stats(self):
+        """Get number of deduplicated files and number of bytes saved by it."""
+        try:
+            with open(os.path.join(self.work_dir, self.dedup_file), "r") as fh:
+                sizes = [int(line) for line in fh if line.strip()]
+        except FileNotFoundError:
+            sizes = []
+
+        return len(sizes), sum(sizes)
+
+    def log_dedup_stats(self):
+        """Log number of bytes saved by storing identical files only once."""
+        if not self.__link_modes:
+            return
+
+        files, saved = self.get_dedup_stats()
+        self.log(
+            "Identical content of {} files is stored only once, saved {} bytes".format(
+                files, saved
+            )
+        )
+
     def get_storage_dir(self):
         return self.work_dir
 
@@ -156,3 +344,125 @@ class Storage(Extension):
         """Get path to the file or directory from the storage."""
         path = os.path.normpath(path)
         return os.path.join(self.work_dir, path.lstrip(os.path.sep))
+
+    def __get_pack_name(self, storage_path):
+        return os.path.relpath(storage_path, start=self.work_dir)
+
+    def stored_file_exists(self, path):
+        """Check that the file is in the storage, either in the directory or in the pack."""
+        storage_path = self.get_storage_path(path)
+
+        return (
+            os.path.exists(storage_path)
+            or self.__get_pack_name(storage_path) in self.__pack
+        )
+
+    def open_stored_file(self, path, mode="rb", encoding=None, errors=None):
+        """Open file from the storage for reading.
+
+        Files from the directory take precedence over files from the pack,
+        so files that were added after packing are also found.
+
+        Args:
+            path: Path to the file (not the path inside the storage)
+            mode: "rb" or "r"
+            encoding: encoding of the file in the text mode
+            errors: how to treat decoding errors in the text mode
+
+        Raises:
+            FileNotFoundError: File is not in the storage.
+        """
+        if mode not in ("r", "rb"):
+            raise ValueError("Files from the storage can only be read")
+
+        storage_path = self.get_storage_path(path)
+
+        try:
+            return open(storage_path, mode, encoding=encoding, errors=errors)
+        except FileNotFoundError:
+            name = self.__get_pack_name(storage_path)
+
+            if name not in self.__pack:
+                raise
+
+        fh = io.BytesIO(self.__pack.read(name))
+
+        if mode == "rb":
+            return fh
+
+        return io.TextIOWrapper(fh, encoding=encoding, errors=errors)
+
+    def is_packed(self):
+        """Check that files of the storage are packed into a single file."""
+        return self.__pack.exists()
+
+    def __iter_tree_files(self):
+        for root, dirnames, filenames in os.walk(self.work_dir):
+            if root == self.work_dir:
+                dirnames[:] = [d for d in dirnames if d != self.blobs_dir_name]
+                filenames = [
+                    f for f in filenames if f not in (self.dedup_file, self.pack_file)
+                ]
+
+            for filename in filenames:
+                yield os.path.join(root, filename)
+
+    def pack(self, remove=True):
+        """Pack all files of the storage into a single indexed file.
+
+        Files remain accessible by open_stored_file() and stored_file_exists(),
+        but not by paths returned by get_storage_path().
+
+        Args:
+            remove: Remove files of the directory after they are packed
+        """
+        # Files of the previous pack are packed together with the new ones
+        if self.is_packed():
+            self.__pack.extract(self.work_dir, overwrite=False)
+
+        files = list(self.__iter_tree_files())
+        self.log("Packing {} files".format(len(files)))
+
+        number, size = self.__pack.dump(
+            (self.__get_pack_name(file), file) for file in files
+        )
+
+        self.log(
+            "{} files of {} bytes are packed into {} bytes".format(
+                number, size, os.path.getsize(self.__pack.path)
+            )
+        )
+
+        if not remove:
+            return
+
+        for name in os.listdir(self.work_dir):
+            if name in (self.dedup_file, self.pack_file):
+                continue
+
+            path = os.path.join(self.work_dir, name)
+
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+        self.__path_exists.cache_clear()
+
+    def unpack(self, remove=True):
+        """Extract all packed files to the directory of the storage.
+
+        Args:
+            remove: Remove the pack after files are extracted
+        """
+        if not self.is_packed():
+            return
+
+        self.log("Unpacking {} files".format(len(self.__pack)))
+        self.__pack.extract(self.work_dir, overwrite=False)
+
+        if remove:
+            self.__pack.close()
+            os.remove(self.__pack.path)
+
+        self.__path_exists.cache_clear()
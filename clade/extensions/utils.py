@@ -16,6 +16,13 @@
 import collections
 import hashlib
 import itertools
+import os
+import sys
+import threading
+import time
+
+if sys.platform != "win32":
+    import resource
 
 
 def get_string_hash(key):
@@ -36,3 +43,144 @@ def yield_chunk(container, chunk_size=1000):
 
 # Location is a file + command id, in which it was compiled
 Location = collections.namedtuple("Location", ["file", "cmd_id"])
+
+
+class CPUBudget:
+    """CPU cores shared between extensions that are executed at the same time."""
+
+    def __init__(self, total):
+        self.total = max(1, total)
+        self.free = self.total
+        self.condition = threading.Condition()
+
+    def acquire(self, requested):
+        """Wait until at least one core is free and take up to requested cores."""
+        with self.condition:
+            while not self.free:
+                self.condition.wait()
+
+            granted = max(1, min(requested, self.free))
+            self.free -= granted
+
+            return granted
+
+    def release(self, granted):
+        with self.condition:
+            self.free += granted
+            self.condition.notify_all()
+
+
+def get_usage(thread=False):
+    """Get resources used by the current process or thread so far.
+
+    CPU time of subprocesses includes only finished ones. Peak RSS is
+    always measured for the whole process. On Windows only the number
+    of read and written bytes is available.
+    """
+    usage = {
+        "cpu_time": 0.0,
+        "subprocess_cpu_time": 0.0,
+        "peak_rss": 0,
+        "bytes_read": 0,
+        "bytes_written": 0,
+    }
+
+    if sys.platform != "win32":
+        who = resource.RUSAGE_SELF
+        if thread and hasattr(resource, "RUSAGE_THREAD"):
+            who = resource.RUSAGE_THREAD
+
+        r = resource.getrusage(who)
+        usage["cpu_time"] = r.ru_utime + r.ru_stime
+
+        r = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage["subprocess_cpu_time"] = r.ru_utime + r.ru_stime
+
+        # ru_maxrss is measured in kilobytes on Linux and in bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["peak_rss"] = peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+    io_file = "/proc/thread-self/io" if thread else "/proc/self/io"
+
+    if os.path.exists(io_file):
+        with open(io_file, "r") as fh:
+            io = dict(line.split(": ") for line in fh.read().splitlines())
+
+        usage["bytes_read"] = int(io["rchar"])
+        usage["bytes_written"] = int(io["wchar"])
+
+    return usage
+
+
+def get_usage_delta(start_usage, end_usage):
+    """Get resources used between two calls of get_usage()."""
+    delta = {key: end_usage[key] - start_usage[key] for key in start_usage}
+    delta["peak_rss"] = end_usage["peak_rss"]
+
+    return delta
+
+
+def count_files(path):
+    if not os.path.exists(path):
+        return 0
+
+    return sum(len(files) for _, _, files in os.walk(path))
+
+
+class Profile:
+    """Resources used by an extension, including its worker processes."""
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+
+        self.data = {
+            "wall_time": 0.0,
+            "cpu_time": 0.0,
+            "subprocess_cpu_time": 0.0,
+            "peak_rss": 0,
+            "workers_peak_rss": 0,
+            "files_created": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+        }
+
+        self.__lock = threading.Lock()
+        self.__start_time = None
+        self.__start_usage = None
+        self.__start_files = None
+
+    def start(self):
+        self.__start_time = time.time()
+        self.__start_usage = get_usage(thread=True)
+        self.__start_files = count_files(self.work_dir)
+
+    def stop(self):
+        delta = get_usage_delta(self.__start_usage, get_usage(thread=True))
+
+        with self.__lock:
+            self.data["wall_time"] = time.time() - self.__start_time
+            self.data["peak_rss"] = delta["peak_rss"]
+            self.data["files_created"] = count_files(self.work_dir) - self.__start_files
+
+            for key in ("cpu_time", "bytes_read", "bytes_written"):
+                self.data[key] += delta[key]
+
+    def add_batch_usage(self, usage, in_worker=True):
+        """Add resources used to process a single batch of objects.
+
+        Batches that are processed in the parent process (in debug mode)
+        add only CPU time of subprocesses, since everything else is
+        already measured for the parent thread.
+        """
+        with self.__lock:
+            self.data["subprocess_cpu_time"] += usage["subprocess_cpu_time"]
+
+            if not in_worker:
+                return
+
+            self.data["workers_peak_rss"] = max(
+                self.data["workers_peak_rss"], usage["peak_rss"]
+            )
+
+            for key in ("cpu_time", "bytes_read", "bytes_written"):
+                self.data[key] += usage[key]
@@ -0,0 +1,280 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import hashlib
+import itertools
+import os
+
+from clade.cmds import DELIMITER, iter_cmds, iter_lines, split_cmd
+from clade.compression import open_file
+
+# Files from these directories are never inputs of build commands
+IGNORED_DIRS = ("/proc/", "/sys/", "/dev/")
+
+
+def get_fingerprints_file(cmds_file):
+    """Get path to the file with fingerprints of inputs of intercepted commands."""
+    return os.path.join(os.path.dirname(os.path.abspath(cmds_file)), "fingerprints.txt")
+
+
+def get_open_fingerprints_file(cmds_file):
+    """Get path to the file with fingerprints of files read during the build."""
+    return os.path.join(
+        os.path.dirname(os.path.abspath(cmds_file)), "open_fingerprints.txt"
+    )
+
+
+def get_open_file(cmds_file):
+    return os.path.join(os.path.dirname(os.path.abspath(cmds_file)), "open.txt")
+
+
+def is_read_flags(flags):
+    """Check that flags of the open() call correspond to reading an existing file."""
+    if flags & os.O_ACCMODE != os.O_RDONLY:
+        return False
+
+    return not flags & (os.O_CREAT | getattr(os, "O_DIRECTORY", 0))
+
+
+def _iter_read_files(cmds_file, cwd_by_id):
+    """Get pairs of command ids and normalized paths of files they opened for reading."""
+    with open_file(
+        get_open_file(cmds_file), encoding="utf-8", errors="surrogateescape"
+    ) as fh:
+        for line in fh:
+            try:
+                cmd_id, exists, flags, path = line.rstrip("\n").split(" ", 3)
+                cmd_id = int(cmd_id)
+                flags = int(flags)
+            except ValueError:
+                continue
+
+            if exists != "1" or not is_read_flags(flags):
+                continue
+
+            if not os.path.isabs(path):
+                if cmd_id not in cwd_by_id:
+                    continue
+
+                path = os.path.join(cwd_by_id[cmd_id], path)
+
+            path = os.path.normpath(path)
+
+            if not path.startswith(IGNORED_DIRS):
+                yield cmd_id, path
+
+
+def dump_open_fingerprints(cmds_file):
+    """Save fingerprints of all files that were read by intercepted commands.
+
+    Files are checked after the build, so a fingerprint describes the last
+    version of the file that was used by the build. Files that were removed
+    during the build, like temporary files, are skipped.
+    """
+    cwd_by_id = {cmd["id"]: cmd["cwd"] for cmd in iter_cmds(cmds_file)}
+    paths = {path for _, path in _iter_read_files(cmds_file, cwd_by_id)}
+
+    with open(
+        get_open_fingerprints_file(cmds_file), "w", errors="surrogateescape"
+    ) as fh:
+        for path in sorted(paths):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            fh.write(
+                "{} {} {} {}\n".format(st.st_size, st.st_mtime_ns, st.st_ino, path)
+            )
+
+
+def open_fingerprints_file(fingerprints_file):
+    """Open txt file with fingerprints and return file object.
+
+    Raises:
+        RuntimeError: Specified file does not exist.
+    """
+    if not os.path.exists(fingerprints_file):
+        raise RuntimeError("Specified {} file does not exist".format(fingerprints_file))
+
+    return open_file(fingerprints_file)
+
+
+def split_fingerprints(line):
+    """Convert a single line of the fingerprints file into a list of dictionaries.
+
+    Each line contains fingerprints of files that were inputs of the command
+    with the same id: the executable and arguments that were existing
+    regular files, when the command was intercepted.
+    """
+    fingerprints = []
+
+    line = line.rstrip("\n")
+    if not line:
+        return fingerprints
+
+    for fingerprint in line.split(DELIMITER):
+        size, mtime_ns, ino, path = fingerprint.split(" ", 3)
+        fingerprints.append(
+            {
+                "path": path,
+                "size": int(size),
+                "mtime_ns": int(mtime_ns),
+                "ino": int(ino),
+            }
+        )
+
+    return fingerprints
+
+
+def iter_fingerprints(fingerprints_file):
+    """Get an iterator over fingerprints of inputs of all intercepted commands."""
+    with open_fingerprints_file(fingerprints_file) as fh:
+        for cmd_id, line in enumerate(fh, start=1):
+            yield {"id": cmd_id, "fingerprints": split_fingerprints(line)}
+
+
+def _get_read_digests(cmds_file):
+    """Get digests of fingerprints of files read by each command and its children.
+
+    Returns:
+        Dictionary with ids of commands as keys and digests as values
+    """
+    fingerprints = dict()
+
+    with open(
+        get_open_fingerprints_file(cmds_file), "r", errors="surrogateescape"
+    ) as fh:
+        for line in fh:
+            line = line.rstrip("\n")
+            fingerprints[line.split(" ", 3)[3]] = line
+
+    cwd_by_id = dict()
+    children = collections.defaultdict(list)
+
+    for cmd in iter_cmds(cmds_file):
+        cwd_by_id[cmd["id"]] = cmd["cwd"]
+        children[cmd["pid"]].append(cmd["id"])
+
+    read_by_id = collections.defaultdict(set)
+
+    for cmd_id, path in _iter_read_files(cmds_file, cwd_by_id):
+        if path in fingerprints:
+            read_by_id[cmd_id].add(fingerprints[path])
+
+    # Children always have greater ids than their parents, so digests
+    # of all children are ready before the digest of their parent
+    digests = dict()
+
+    for cmd_id in sorted(cwd_by_id, reverse=True):
+        digest = hashlib.sha1()
+
+        for fingerprint in sorted(read_by_id.pop(cmd_id, [])):
+            digest.update(fingerprint.encode("utf-8", errors="surrogateescape"))
+            digest.update(b"\0")
+
+        # Order of children depends on scheduling of the build
+        for child_digest in sorted(digests[c] for c in children[cmd_id]):
+            digest.update(child_digest)
+
+        digests[cmd_id] = digest.digest()
+
+    return digests
+
+
+def _iter_digests(cmds_file, with_read_files=False):
+    fingerprints_file = get_fingerprints_file(cmds_file)
+    read_digests = _get_read_digests(cmds_file) if with_read_files else dict()
+
+    with open_fingerprints_file(fingerprints_file) as fh:
+        # Commands without a line in the fingerprints file are always changed
+        lines = itertools.zip_longest(iter_lines(cmds_file), fh)
+
+        for cmd_id, (cmd_line, fingerprints_line) in enumerate(lines, start=1):
+            if cmd_line is None:
+                break
+
+            cmd = split_cmd(cmd_line)
+
+            # Stubs and placeholders of lost commands have no inputs
+            if not cmd["which"]:
+                continue
+
+            if fingerprints_line is None:
+                yield cmd_id, None
+                continue
+
+            # Identity of the command does not include its parent, since ids
+            # of commands are different in each build
+            identity = DELIMITER.join([cmd["cwd"], cmd["which"]] + cmd["command"])
+
+            digest = hashlib.sha1(identity.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(fingerprints_line.rstrip("\n").encode("utf-8"))
+
+            if with_read_files:
+                digest.update(b"\0")
+                digest.update(read_digests.get(cmd_id, b""))
+
+            yield cmd_id, digest.digest()
+
+
+def get_changed_ids(old_cmds_file, new_cmds_file):
+    """Get ids of commands that are new or have changed inputs since the previous build.
+
+    Commands are matched by their working directory, executable and
+    arguments, and each of them is unchanged only if the previous build
+    contains the same command with the same fingerprints (size, modification
+    time and inode) of its input files. Both files are read once, and only
+    digests of commands from the previous build are kept in memory.
+    Fingerprints must be recorded during both builds (see
+    "Intercept.fingerprints" option).
+
+    Input files are the executable and arguments of the command, so changes
+    of files that are only opened by the command, like headers, are not
+    detected by themselves. If open() calls were also intercepted during
+    both builds, files read by each command and all its child commands
+    (like cc1 launched by gcc) are inputs as well.
+
+    Args:
+        old_cmds_file: Path to the txt file with commands of the previous build.
+        new_cmds_file: Path to the txt file with commands of the new build.
+
+    Returns:
+        Set of identifiers of commands from the new_cmds_file
+
+    Raises:
+        RuntimeError: Some of the files do not exist.
+    """
+    with_read_files = all(
+        os.path.exists(get_open_fingerprints_file(cmds_file))
+        for cmds_file in (old_cmds_file, new_cmds_file)
+    )
+
+    old_digests = collections.Counter(
+        digest for _, digest in _iter_digests(old_cmds_file, with_read_files) if digest
+    )
+
+    changed_ids = set()
+
+    for cmd_id, digest in _iter_digests(new_cmds_file, with_read_files):
+        # The same command can be executed several times during the build
+        if digest and old_digests[digest]:
+            old_digests[digest] -= 1
+        else:
+            changed_ids.add(cmd_id)
+
+    return changed_ids
@@ -0,0 +1,62 @@
+/*
+ * Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+ * Ivannikov Institute for System Programming of the Russian Academy of Sciences
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <fcntl.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+#include "env.h"
+
+// Last used command id, shared by all intercepted processes.
+// CLADE_ID_FILE file contains a single 64-bit integer in native byte order,
+// which is mapped into memory and incremented atomically,
+// so ids are allocated without any file locks
+static uint64_t *counter;
+
+static uint64_t *get_counter(void) {
+    if (counter)
+        return counter;
+
+    char *id_file = getenv_or_fail(CLADE_ID_FILE_ENV);
+
+    // openat() is used instead of open(), since open() is intercepted
+    int fd = openat(AT_FDCWD, id_file, O_RDWR);
+    if (fd == -1) {
+        fprintf(stderr, "Couldn't open %s file\n", id_file);
+        exit(EXIT_FAILURE);
+    }
+
+    void *addr = mmap(NULL, sizeof(uint64_t), PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+
+    if (addr == MAP_FAILED) {
+        fprintf(stderr, "Couldn't map %s file into memory\n", id_file);
+        exit(EXIT_FAILURE);
+    }
+
+    // Mapping is inherited by forked processes, so it is created only once
+    counter = addr;
+
+    return counter;
+}
+
+int clade_next_id(void) {
+    return (int)__atomic_add_fetch(get_counter(), 1, __ATOMIC_SEQ_CST);
+}
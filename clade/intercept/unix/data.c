@@ -20,11 +20,13 @@
 #include <string.h>
 #include <unistd.h>
 #include <errno.h>
+#include <fcntl.h>
+#include <regex.h>
+#include <sys/stat.h>
 
 #include "which.h"
 #include "env.h"
 #include "client.h"
-#include "lock.h"
 
 #define DELIMITER "||"
 
@@ -59,7 +61,42 @@ static char *expand_newlines_alloc(const char *src) {
     return dest;
 }
 
-static char *prepare_exec_data(const char *path, char const *const argv[], char **envp) {
+static regex_t allow_re, deny_re;
+static int has_allow_re, has_deny_re, filter_compiled;
+
+static int compile_filter(regex_t *re, const char *name) {
+    char *pattern = getenv(name);
+    if (!pattern || !*pattern)
+        return 0;
+
+    if (regcomp(re, pattern, REG_EXTENDED | REG_NOSUB)) {
+        fprintf(stderr, "Couldn't compile regular expression from %s\n", name);
+        exit(EXIT_FAILURE);
+    }
+
+    return 1;
+}
+
+/*
+ * Commands, which executables do not match CLADE_FILTER_ALLOW or match
+ * CLADE_FILTER_DENY regular expressions, are stored as stubs: only their
+ * working directory and the id of the parent command, which keep the pid
+ * graph correct. Regular expressions are compiled once per process.
+ */
+static int is_filtered(const char *path) {
+    if (!filter_compiled) {
+        has_allow_re = compile_filter(&allow_re, CLADE_FILTER_ALLOW_ENV);
+        has_deny_re = compile_filter(&deny_re, CLADE_FILTER_DENY_ENV);
+        filter_compiled = 1;
+    }
+
+    if (has_deny_re && !regexec(&deny_re, path, 0, NULL, 0))
+        return 1;
+
+    return has_allow_re && regexec(&allow_re, path, 0, NULL, 0);
+}
+
+static char *prepare_exec_data(const char *path, char const *const argv[], char **envp, int *cmd_id, int *filtered) {
     unsigned args_len = 1, written_len = 0;
 
     // Concatenate all command-line arguments together using "||" as delimeter.
@@ -88,8 +125,11 @@ static char *prepare_exec_data(const char *path, char const *const argv[], char
         correct_path = (char *)path;
     }
 
-    // Allocate memory to store the data + cwd + which + PID (50) + delimeters.
-    char *data = malloc(args_len + strlen(cwd) + strlen(DELIMITER) * 3 + 50
+    *filtered = is_filtered(correct_path);
+    set_flag_to_envp(envp, CLADE_FILTERED_ENV, *filtered);
+
+    // Allocate memory to store the ID (50) + data + cwd + which + PID (50) + delimeters.
+    char *data = malloc(args_len + strlen(cwd) + strlen(DELIMITER) * 3 + 100
                         + strlen(correct_path) + strlen("\n"));
 
     if (!data) {
@@ -97,12 +137,17 @@ static char *prepare_exec_data(const char *path, char const *const argv[], char
         exit(EXIT_FAILURE);
     }
 
-    char *parent_id = get_parent_id(envp);
-    written_len += sprintf(data + written_len, "%s%s%s%s%s%s",
+    // Records are prefixed by the id of the command, since they can be
+    // written by parallel processes in a different order
+    char *parent_id = get_parent_id(envp, cmd_id);
+    written_len += sprintf(data + written_len, "%d %s%s%s%s",
+        *cmd_id,
         cwd, DELIMITER,
-        parent_id, DELIMITER,
-        correct_path, DELIMITER
+        parent_id, DELIMITER
     );
+
+    if (!*filtered)
+        written_len += sprintf(data + written_len, "%s%s", correct_path, DELIMITER);
     free(parent_id);
 
     // if cwd == "" then it wasn't returned by malloc inside getcwd
@@ -110,6 +155,11 @@ static char *prepare_exec_data(const char *path, char const *const argv[], char
         free(cwd);
     }
 
+    if (*filtered) {
+        written_len += sprintf(data + written_len, "\n");
+        return data;
+    }
+
     for (const char *const *arg = argv; arg && *arg; arg++) {
         char *exp_arg = expand_newlines_alloc(*arg);
         written_len += sprintf(data + written_len, "%s", exp_arg);
@@ -125,8 +175,15 @@ static char *prepare_exec_data(const char *path, char const *const argv[], char
 }
 
 static char *prepare_open_data(const char *path, int flags) {
-    // Allocate memory to store the CMD_ID + existence + path + " " and "\n".
-    char *data = malloc(sizeof(int) * 3 + strlen("   \n") + strlen(path));
+    // File is opened by the command of the current process, which id
+    // was stored in its environment when it was executed
+    char *cmd_id = getenv(CLADE_PARENT_ID_ENV);
+    if (!cmd_id) {
+        cmd_id = "0";
+    }
+
+    // Allocate memory to store the CMD_ID + existence + flags (50) + path + " " and "\n".
+    char *data = malloc(strlen(cmd_id) + 50 + strlen("   \n") + strlen(path));
 
     if (!data) {
         fprintf(stderr, "Couldn't allocate memory\n");
@@ -138,20 +195,60 @@ static char *prepare_open_data(const char *path, int flags) {
         exists = 0;
     }
 
-    int cmd_id = get_cmd_id();
-
-    sprintf(data, "%d %d %d %s\n", cmd_id, exists, flags, path);
+    sprintf(data, "%s %d %d %s\n", cmd_id, exists, flags, path);
 
     return data;
 }
 
-static char *prepare_env_data(char const *const envp[]) {
-    unsigned envs_len = 1, written_len = 0;
+static int envp_contains(char **envp, const char *entry) {
+    for (char **env = envp; env && *env; env++) {
+        if (*env == entry || !strcmp(*env, entry))
+            return 1;
+    }
+
+    return 0;
+}
+
+static int envp_contains_key(char const *const envp[], const char *key, size_t key_len) {
+    for (const char *const *env = envp; env && *env; env++) {
+        if (!strncmp(*env, key, key_len) && (*env)[key_len] == '=')
+            return 1;
+    }
+
+    return 0;
+}
+
+/*
+ * If environment of the command, which has executed the current process,
+ * is known (base_envp), only the difference between it and the new
+ * environment is stored: the first line contains "=" and the id of that
+ * command, changed and new variables are stored as usual, and removed
+ * variables are stored as "=-" followed by their names.
+ */
+static char *prepare_env_data(char const *const envp[], char **base_envp, int cmd_id) {
+    unsigned envs_len = 100, written_len = 0;
 
     for (const char *const *env = envp; env && *env; env++) {
         envs_len += 2 * strlen(*env) + strlen("\n");
     }
 
+    char *base_id = NULL;
+    if (base_envp) {
+        base_id = getenv_from_envp(base_envp, CLADE_PARENT_ID_ENV);
+
+        // Environments of the first command and of stubs are not stored anywhere
+        if (base_id && (!strcmp(base_id, "0") || getenv_from_envp(base_envp, CLADE_FILTERED_ENV)))
+            base_id = NULL;
+    }
+
+    if (base_id) {
+        envs_len += strlen(base_id);
+
+        for (char **env = base_envp; *env; env++) {
+            envs_len += strlen(*env) + strlen("=-\n");
+        }
+    }
+
     char *data = malloc(envs_len + strlen("\n"));
 
     if (!data) {
@@ -159,62 +256,180 @@ static char *prepare_env_data(char const *const envp[]) {
         exit(EXIT_FAILURE);
     }
 
+    written_len += sprintf(data + written_len, "%d ", cmd_id);
+
+    if (base_id)
+        written_len += sprintf(data + written_len, "=%s\n", base_id);
+
     for (const char *const *env = envp; env && *env; env++) {
+        if (base_id && envp_contains(base_envp, *env))
+            continue;
+
         char *exp_env = expand_newlines_alloc(*env);
         written_len += sprintf(data + written_len, "%s\n", exp_env);
         free(exp_env);
     }
 
+    if (base_id) {
+        for (char **env = base_envp; *env; env++) {
+            size_t key_len = strcspn(*env, "=");
+
+            if (!envp_contains_key(envp, *env, key_len))
+                written_len += sprintf(data + written_len, "=-%.*s\n", (int)key_len, *env);
+        }
+    }
+
+    written_len += sprintf(data + written_len, "\n");
+
+    return data;
+}
+
+static long long get_mtime_ns(struct stat *st) {
+#ifdef __APPLE__
+    return (long long)st->st_mtimespec.tv_sec * 1000000000 + st->st_mtimespec.tv_nsec;
+#else
+    return (long long)st->st_mtim.tv_sec * 1000000000 + st->st_mtim.tv_nsec;
+#endif
+}
+
+static unsigned add_fingerprint(char *dest, const char *file, int first) {
+    struct stat st;
+
+    if (stat(file, &st) || !S_ISREG(st.st_mode))
+        return 0;
+
+    char *exp_file = expand_newlines_alloc(file);
+    unsigned len = sprintf(dest, "%s%lld %lld %llu %s",
+        first ? "" : DELIMITER,
+        (long long)st.st_size,
+        get_mtime_ns(&st),
+        (unsigned long long)st.st_ino,
+        exp_file
+    );
+    free(exp_file);
+
+    return len;
+}
+
+/*
+ * Fingerprints (size, modification time and inode) of the executable and
+ * of arguments that are existing regular files, separated by "||".
+ * Value of the "-o" option is skipped, since it is an output file, which
+ * may be left by a previous build. Record of a stub is empty, but it is
+ * still written to keep ids of the following records.
+ */
+static char *prepare_fingerprint_data(const char *path, char const *const argv[], int cmd_id, int filtered) {
+    unsigned data_len = 100 + 2 * strlen(path), written_len = 0;
+
+    for (const char *const *arg = argv; arg && *arg; arg++) {
+        data_len += 2 * strlen(*arg) + 100;
+    }
+
+    char *data = malloc(data_len);
+
+    if (!data) {
+        fprintf(stderr, "Couldn't allocate memory\n");
+        exit(EXIT_FAILURE);
+    }
+
+    written_len += sprintf(data + written_len, "%d ", cmd_id);
+
+    if (!filtered) {
+        unsigned len = add_fingerprint(data + written_len, path, 1);
+        int first = !len;
+        written_len += len;
+
+        for (int i = 1; argv && argv[0] && argv[i]; i++) {
+            if (!strcmp(argv[i - 1], "-o"))
+                continue;
+
+            len = add_fingerprint(data + written_len, argv[i], first);
+            first = first && !len;
+            written_len += len;
+        }
+    }
+
     written_len += sprintf(data + written_len, "\n");
 
     return data;
 }
 
+// Data is appended by a single write() call, so records of parallel
+// processes are not mixed, and no lock is required
 static void store_data(const char *data, const char *data_file) {
-    FILE *f = fopen(data_file, "a");
-    if (!f) {
+    // openat() is used instead of open(), since open() is intercepted
+    int fd = openat(AT_FDCWD, data_file, O_WRONLY | O_APPEND | O_CREAT, 0644);
+    if (fd == -1) {
         fprintf(stderr, "Couldn't open %s file\n", data_file);
         exit(EXIT_FAILURE);
     }
 
-    fprintf(f, "%s", data);
-    fclose(f);
+    size_t len = strlen(data);
+    while (len) {
+        ssize_t r = write(fd, data, len);
+
+        if (r == -1) {
+            if (errno == EINTR)
+                continue;
+
+            fprintf(stderr, "Couldn't write data to %s file\n", data_file);
+            exit(EXIT_FAILURE);
+        }
+
+        data += r;
+        len -= r;
+    }
+
+    close(fd);
 }
 
-void intercept_exec_call(const char *path, char const *const argv[], char **envp) {
+void intercept_exec_call(const char *path, char const *const argv[], char **envp, char **base_envp) {
     char *data_file = getenv_or_fail(CLADE_INTERCEPT_EXEC_ENV);
     char *env_vars_file = getenv(CLADE_ENV_VARS_ENV);
-
-    clade_lock();
+    char *fingerprints_file = getenv(CLADE_FINGERPRINTS_ENV);
 
     // Data with intercepted command which will be stored
-    char *data = prepare_exec_data(path, argv, envp);
+    int cmd_id, filtered;
+    char *data = prepare_exec_data(path, argv, envp, &cmd_id, &filtered);
 
     if (getenv(CLADE_PREPROCESS_ENV))
         send_data(data);
     else
         store_data(data, data_file);
 
-    if (env_vars_file) {
-        char *envs = prepare_env_data((char const *const *)envp);
+    if (env_vars_file && filtered) {
+        // Record is still required to keep ids in envs.txt,
+        // "=0" means that the environment is empty
+        char stub[64];
+        snprintf(stub, sizeof(stub), "%d =0\n\n", cmd_id);
+        store_data(stub, env_vars_file);
+    } else if (env_vars_file) {
+        char *envs = prepare_env_data((char const *const *)envp, base_envp, cmd_id);
         store_data(envs, env_vars_file);
         free(envs);
     }
 
-    free(data);
+    if (fingerprints_file) {
+        // Sometimes "path" contains incorrect values ("gcc" instead of "/usr/bin/gcc")
+        char *correct_path = access(path, X_OK) ? which(path) : NULL;
+        char *fingerprints = prepare_fingerprint_data(correct_path ? correct_path : path, argv, cmd_id, filtered);
+        store_data(fingerprints, fingerprints_file);
+        free(fingerprints);
+        free(correct_path);
+    }
 
-    clade_unlock();
+    free(data);
 }
 
 void intercept_open_call(const char *path, int flags) {
     char *data_file = getenv_or_fail(CLADE_INTERCEPT_OPEN_ENV);
 
-    clade_lock();
+    // Files opened by stubs are not stored either
+    if (getenv(CLADE_FILTERED_ENV))
+        return;
 
     // Data with intercepted command which will be stored
     char *data = prepare_open_data(path, flags);
     store_data(data, data_file);
     free(data);
-
-    clade_unlock();
 }
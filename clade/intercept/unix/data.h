@@ -18,7 +18,9 @@
 #ifndef DATA_H
 #define DATA_H
 
-extern void intercept_exec_call(const char *path, char const *const argv[], char **envp);
+// base_envp is the environment with which the current process was executed,
+// or NULL if it is unknown
+extern void intercept_exec_call(const char *path, char const *const argv[], char **envp, char **base_envp);
 extern void intercept_open_call(const char *path, int flags);
 
 #endif /* DATA_H */
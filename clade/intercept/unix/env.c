@@ -21,6 +21,7 @@
 #include <stdio.h>
 
 #include "env.h"
+#include "counter.h"
 
 #define ARRAY_SIZE(x) (sizeof(x) / sizeof((x)[0]))
 
@@ -36,6 +37,10 @@ char *clade_envs[] = {
     CLADE_INET_PORT_ENV,
     CLADE_PREPROCESS_ENV,
     CLADE_ENV_VARS_ENV,
+    CLADE_FILTER_ALLOW_ENV,
+    CLADE_FILTER_DENY_ENV,
+    CLADE_WHICH_CACHE_ENV,
+    CLADE_FINGERPRINTS_ENV,
     "LD_PRELOAD",
     "LD_LIBRARY_PATH",
     "DYLD_INSERT_LIBRARIES",
@@ -78,7 +83,8 @@ static char* construct_envp_entry(const char *key, const char *value) {
 
 char **copy_envp(char **envp) {
     int envp_len = get_envp_len(envp);
-    char **copy = malloc((envp_len + clade_envs_len + 1) * sizeof(char *));
+    // One more slot is reserved for CLADE_FILTERED_ENV
+    char **copy = malloc((envp_len + clade_envs_len + 2) * sizeof(char *));
 
     int i;
     for (i = 0; i < envp_len; i++) {
@@ -120,6 +126,15 @@ void update_environ(char **envp, bool force) {
     if (!envp)
         return;
 
+    if (force) {
+        char *filtered = getenv_from_envp(envp, CLADE_FILTERED_ENV);
+
+        if (filtered)
+            setenv(CLADE_FILTERED_ENV, filtered, 1);
+        else
+            unsetenv(CLADE_FILTERED_ENV);
+    }
+
     // Add Clade environment variables from envp to environ
     // if force == true or they were absent
     for (int i = 0; i < clade_envs_len; i++) {
@@ -135,29 +150,6 @@ void update_environ(char **envp, bool force) {
     }
 }
 
-static int get_cmd_id_and_update() {
-    int id = get_cmd_id();
-
-    id++;
-
-    char *id_file = getenv(CLADE_ID_FILE_ENV);
-    FILE *f = fopen(id_file, "w");
-    if (!f) {
-        fprintf(stderr, "Couldn't open %s file for write\n", id_file);
-        exit(EXIT_FAILURE);
-    }
-
-    int ret = fprintf(f, "%d", id);
-    if (ret <= 0) {
-        fprintf(stderr, "Couldn't write data to file %s\n", id_file);
-        exit(EXIT_FAILURE);
-    }
-
-    fclose(f);
-
-    return id;
-}
-
 char *getenv_from_envp(char **envp, const char *key) {
     int index = find_key_index(envp, key);
 
@@ -182,34 +174,30 @@ void setenv_to_envp(char **envp, const char *key, const char *value) {
     }
 }
 
-int get_cmd_id() {
-    char *id_file = getenv(CLADE_ID_FILE_ENV);
-
-    FILE *f = fopen(id_file, "r");
-    if (!f) {
-        fprintf(stderr, "Couldn't open %s file for read\n", id_file);
-        exit(EXIT_FAILURE);
-    }
+// Add "key=1" to envp or remove key from it
+// envp must have a free slot, like the one returned by copy_envp()
+void set_flag_to_envp(char **envp, const char *key, bool value) {
+    int index = find_key_index(envp, key);
 
-    int id;
-    int ret = fscanf(f, "%d", &id);
-    if (ret <= 0) {
-        fprintf(stderr, "Couldn't read data from file %s\n", id_file);
-        exit(EXIT_FAILURE);
+    if (value && index == -1) {
+        int envp_len = get_envp_len(envp);
+        envp[envp_len] = construct_envp_entry(key, "1");
+        envp[envp_len + 1] = NULL;
+    } else if (!value && index != -1) {
+        int envp_len = get_envp_len(envp);
+        free(envp[index]);
+        memmove(envp + index, envp + index + 1, (envp_len - index) * sizeof(char *));
     }
-
-    fclose(f);
-
-    return id;
 }
 
-char *get_parent_id(char **envp) {
+char *get_parent_id(char **envp, int *cmd_id) {
     char *parent_id = strdup(getenv_from_envp(envp, CLADE_PARENT_ID_ENV));
 
-    int new_parent_id = get_cmd_id_and_update();
+    int new_parent_id = clade_next_id();
     char new_clade_id[50]; // 50 should be enough
 
     sprintf(new_clade_id, "%d", new_parent_id);
+    *cmd_id = new_parent_id;
 
     setenv_to_envp(envp, CLADE_PARENT_ID_ENV, new_clade_id);
 
@@ -7,13 +7,13 @@ extern char **copy_envp(char **envp);
 extern char **update_envp(char **input_envp);
 extern void update_environ(char **envp, bool force);
 
-extern char *get_parent_id(char **envp);
-extern int get_cmd_id();
+extern char *get_parent_id(char **envp, int *cmd_id);
 
 extern char *getenv_or_fail(const char *name);
 
 char *getenv_from_envp(char **envp, const char *key);
 void setenv_to_envp(char **envp, const char *key, const char *value);
+void set_flag_to_envp(char **envp, const char *key, bool value);
 
 // All environment variables used by clade
 #define CLADE_INTERCEPT_OPEN_ENV "CLADE_INTERCEPT_OPEN"
@@ -25,6 +25,13 @@ void setenv_to_envp(char **envp, const char *key, const char *value);
 #define CLADE_INET_PORT_ENV "CLADE_INET_PORT"
 #define CLADE_PREPROCESS_ENV "CLADE_PREPROCESS"
 #define CLADE_ENV_VARS_ENV "CLADE_ENV_VARS"
+#define CLADE_FILTER_ALLOW_ENV "CLADE_FILTER_ALLOW"
+#define CLADE_FILTER_DENY_ENV "CLADE_FILTER_DENY"
+#define CLADE_WHICH_CACHE_ENV "CLADE_WHICH_CACHE"
+#define CLADE_FINGERPRINTS_ENV "CLADE_FINGERPRINTS"
 // Do not forget to add new variables to clade_envs inside env.c
 
+// Set only for commands that were stored as stubs, so it is not in clade_envs
+#define CLADE_FILTERED_ENV "CLADE_FILTERED"
+
 #endif /* ENV_H */
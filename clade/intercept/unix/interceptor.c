@@ -70,7 +70,7 @@ int execve(const char *path, char *const argv[], char *const envp[]) {
         char **new_envp = copy_envp((char **)envp);
 
         // Store information about intercepted call
-        intercept_exec_call(path, (char const *const *)argv, new_envp);
+        intercept_exec_call(path, (char const *const *)argv, new_envp, clade_environ);
         intercepted = true;
 
         return execve_real(path, argv, (char *const *restrict)new_envp);
@@ -98,7 +98,7 @@ int execvp(const char *filename, char *const argv[]) {
         // Copy environ, so we can safely modify it later
         char **new_envp = copy_envp((char **)environ);
 
-        intercept_exec_call(filename, (char const *const *)argv, (char **)new_envp);
+        intercept_exec_call(filename, (char const *const *)argv, (char **)new_envp, clade_environ);
         // DO NOT change value of intercepted to TRUE here
 
         // intercept_exec_call changed some environment values in new_envp, which now should be added back to environ
@@ -128,7 +128,7 @@ int execv(const char *filename, char *const argv[]) {
         // Copy environ, so we can safely modify it later
         char **new_envp = copy_envp((char **)environ);
 
-        intercept_exec_call(filename, (char const *const *)argv, (char **)new_envp);
+        intercept_exec_call(filename, (char const *const *)argv, (char **)new_envp, clade_environ);
 
         // intercept_exec_call changed some environment values in new_envp, which now should be added back to environ
         update_environ(new_envp, true);
@@ -165,7 +165,7 @@ int posix_spawn(pid_t *restrict pid, const char *restrict path, const posix_spaw
         // from "environ" if they were absent in "evnp"
         char **new_envp = copy_envp((char **)envp);
 
-        intercept_exec_call(path, (char const *const *)argv, new_envp);
+        intercept_exec_call(path, (char const *const *)argv, new_envp, clade_environ);
         intercepted = true;
 
         return posix_spawn_real(pid, path, file_actions, attrp, argv, (char *const *restrict)new_envp);
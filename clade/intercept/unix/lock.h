@@ -1,7 +0,0 @@
-#ifndef LOCK_H
-#define LOCK_H
-
-extern void clade_lock(void);
-extern void clade_unlock(void);
-
-#endif /* LOCK_H */
@@ -15,20 +15,188 @@
  * limitations under the License.
  */
 
+#include <fcntl.h>
+#include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include <unistd.h>
 
 #include "which.h"
+#include "env.h"
+
+/*
+ * Results of which_path() are cached in a table shared by all intercepted
+ * processes. CLADE_WHICH_CACHE file is mapped into memory, and each slot
+ * stores the result for a single (PATH, name) pair: the name followed by
+ * the resolved path. Slots are protected by sequence counters: odd value
+ * means that the slot is being written, so readers ignore it, and writers
+ * skip the slot instead of waiting. Cached result is used only if its
+ * inode and modification time are the same, so a single stat() call
+ * replaces the walk over PATH directories.
+ * Results depend on the current working directory if PATH contains
+ * relative directories, so such lookups are never cached.
+ */
+struct which_cache_slot {
+    uint32_t seq;
+    uint16_t name_len;
+    uint16_t path_len;
+    uint64_t key;
+    uint64_t ino;
+    int64_t mtime;
+    char data[WHICH_CACHE_SLOT_SIZE - 32];
+};
+
+_Static_assert(sizeof(struct which_cache_slot) == WHICH_CACHE_SLOT_SIZE, "Wrong size of which cache slot");
+
+static struct which_cache_slot *cache;
+static int cache_mapped;
+
+static struct which_cache_slot *get_cache(void) {
+    if (cache_mapped)
+        return cache;
+
+    cache_mapped = 1;
+
+    char *cache_file = getenv(CLADE_WHICH_CACHE_ENV);
+    if (!cache_file)
+        return NULL;
+
+    // openat() is used instead of open(), since open() is intercepted
+    int fd = openat(AT_FDCWD, cache_file, O_RDWR);
+    if (fd == -1)
+        return NULL;
+
+    void *addr = mmap(NULL, WHICH_CACHE_SLOTS * sizeof(struct which_cache_slot),
+                      PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    close(fd);
+
+    // Cache is optional, so resolution works without it
+    if (addr != MAP_FAILED)
+        cache = addr;
+
+    return cache;
+}
+
+// FNV-1a hash of PATH and name
+static uint64_t get_key(const char *name, const char *path) {
+    uint64_t hash = 14695981039346656037ULL;
+
+    for (const char *c = path; *c; c++)
+        hash = (hash ^ (unsigned char)*c) * 1099511628211ULL;
+
+    hash = (hash ^ 0) * 1099511628211ULL;
+
+    for (const char *c = name; *c; c++)
+        hash = (hash ^ (unsigned char)*c) * 1099511628211ULL;
+
+    // 0 marks empty slots
+    return hash ? hash : 1;
+}
+
+static int get_stat(const char *file, struct stat *st) {
+    return !stat(file, st) && S_ISREG(st->st_mode);
+}
+
+static int64_t get_mtime(struct stat *st) {
+#ifdef __APPLE__
+    return (int64_t)st->st_mtimespec.tv_sec * 1000000000 + st->st_mtimespec.tv_nsec;
+#else
+    return (int64_t)st->st_mtim.tv_sec * 1000000000 + st->st_mtim.tv_nsec;
+#endif
+}
+
+// Check that PATH contains only absolute directories
+static int is_abs_path(const char *path) {
+    const char *entry = path;
+
+    for (const char *c = path;; c++) {
+        if (*c && !strchr(WHICH_DELIMITER, *c))
+            continue;
+
+        // Empty entries are skipped by which_path_uncached()
+        if (c != entry && *entry != '/')
+            return 0;
+
+        if (!*c)
+            return 1;
+
+        entry = c + 1;
+    }
+}
+
+static char *cache_get(uint64_t key, const char *name) {
+    struct which_cache_slot *slot = get_cache() + key % WHICH_CACHE_SLOTS;
+    size_t name_len = strlen(name);
+
+    uint32_t seq = __atomic_load_n(&slot->seq, __ATOMIC_ACQUIRE);
+    uint16_t path_len = slot->path_len;
+
+    // Different names can have the same key
+    if (seq & 1 || slot->key != key || slot->name_len != name_len ||
+        name_len + path_len >= sizeof(slot->data) ||
+        memcmp(slot->data, name, name_len))
+        return NULL;
+
+    char *file = malloc(path_len + 1);
+    if (!file)
+        return NULL;
+
+    memcpy(file, slot->data + name_len, path_len);
+    file[path_len] = 0;
+
+    uint64_t ino = slot->ino;
+    int64_t mtime = slot->mtime;
+
+    __atomic_thread_fence(__ATOMIC_ACQUIRE);
+    if (__atomic_load_n(&slot->seq, __ATOMIC_RELAXED) != seq) {
+        free(file);
+        return NULL;
+    }
+
+    struct stat st;
+    if (!get_stat(file, &st) || st.st_ino != ino || get_mtime(&st) != mtime) {
+        free(file);
+        return NULL;
+    }
+
+    return file;
+}
+
+static void cache_put(uint64_t key, const char *name, const char *file) {
+    struct which_cache_slot *slot = get_cache() + key % WHICH_CACHE_SLOTS;
+    size_t name_len = strlen(name);
+    size_t path_len = strlen(file);
+    struct stat st;
+
+    if (name_len + path_len >= sizeof(slot->data) || !get_stat(file, &st))
+        return;
+
+    uint32_t seq = __atomic_load_n(&slot->seq, __ATOMIC_RELAXED);
+    if (seq & 1 || !__atomic_compare_exchange_n(&slot->seq, &seq, seq + 1, 0,
+                                                __ATOMIC_ACQUIRE, __ATOMIC_RELAXED))
+        return;
+
+    slot->key = key;
+    slot->ino = st.st_ino;
+    slot->mtime = get_mtime(&st);
+    slot->name_len = name_len;
+    slot->path_len = path_len;
+    memcpy(slot->data, name, name_len);
+    memcpy(slot->data + name_len, file, path_len);
+
+    __atomic_store_n(&slot->seq, seq + 2, __ATOMIC_RELEASE);
+}
 
 // Lookup executable `name` within the PATH environment variable
 char *which(const char *name) {
   return which_path(name, getenv("PATH"));
 }
 
-// Lookup executable `name` within `path`
-char *which_path(const char *name, const char *_path) {
+// Lookup executable `name` within `path` without the cache
+char *which_path_uncached(const char *name, const char *_path) {
   char *path = strdup(_path);
 
   if (!path)
@@ -63,3 +231,22 @@ char *which_path(const char *name, const char *_path) {
 
   return NULL;
 }
+
+// Lookup executable `name` within `path`
+char *which_path(const char *name, const char *path) {
+  if (!path || !is_abs_path(path) || !get_cache())
+    return which_path_uncached(name, path);
+
+  uint64_t key = get_key(name, path);
+  char *file = cache_get(key, name);
+
+  if (!file) {
+    file = which_path_uncached(name, path);
+
+    // Relative results depend on the current working directory
+    if (file && file[0] == '/')
+      cache_put(key, name, file);
+  }
+
+  return file;
+}
@@ -26,8 +26,13 @@
 #define WHICH_DELIMITER   ":"
 #endif
 
+// Number and size of slots in the CLADE_WHICH_CACHE file
+#define WHICH_CACHE_SLOTS 4096
+#define WHICH_CACHE_SLOT_SIZE 512
+
 extern char *which(const char *name);
 extern char *which_path(const char *name, const char *path);
+extern char *which_path_uncached(const char *name, const char *path);
 
 
 #endif /* WHICH_H */
@@ -53,7 +53,7 @@ int main(int argc, char **argv, char **envp) {
 
             // strip wrapper_postfix extension
             which[strlen(which) - strlen(wrapper_postfix)] = 0;
-            intercept_exec_call(which, (char const *const *)argv, new_envp);
+            intercept_exec_call(which, (char const *const *)argv, new_envp, NULL);
         }
 
         // First argument must be a valid path, not just a filename
@@ -71,7 +71,7 @@ int main(int argc, char **argv, char **envp) {
         }
 
         if (getenv_from_envp(new_envp, CLADE_INTERCEPT_EXEC_ENV)) {
-            intercept_exec_call(which, (char const *const *)argv, new_envp);
+            intercept_exec_call(which, (char const *const *)argv, new_envp, NULL);
         }
 
         // First argument must be a valid path, not just a filename
@@ -0,0 +1,158 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from clade.compression import append_to_file
+from clade.utils import get_logger
+
+
+class Journal:
+    """Unordered records of intercepted commands.
+
+    Intercepted processes allocate ids of their commands without any locks,
+    and append records to the journal file in arbitrary order. Each record
+    starts with the id of the command followed by a space, and ends with
+    a terminator. collect() moves records from the journal to the output
+    file in order of their ids, so that id of each command still matches
+    its position in the output file.
+
+    Args:
+        path: Path to the journal file
+        output: Path to the output file, like cmds.txt or envs.txt
+        last_id: Id of the last record that is already in the output file
+        terminator: Sequence of bytes that ends each record
+        placeholder: Record that is written instead of a missing one
+        compress: If true or zlib compression level, new output file
+            is block-compressed
+        conf: dictionary with configuration
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        path,
+        output,
+        last_id=0,
+        terminator=b"\n",
+        placeholder=b"\n",
+        compress=None,
+        conf=None,
+    ):
+        self.path = path
+        self.output = output
+        self.next_id = int(last_id) + 1
+        self.terminator = terminator
+        self.placeholder = placeholder
+        self.compress = compress
+
+        self.logger = get_logger("Journal", conf=conf)
+
+        self.__offset = 0
+        self.__tail = b""
+        self.__pending = dict()
+
+    def collect(self):
+        """Move all records that can be ordered from the journal to the output file.
+
+        Returns:
+            Number of moved records
+        """
+        return self.__read()
+
+    def close(self):
+        """Move all remaining records to the output file and remove the journal.
+
+        Records of commands that got their ids, but were never written
+        (for example, if process was killed), are replaced by placeholders,
+        so ids of the following commands are not shifted.
+        """
+        self.__read()
+
+        if self.__tail:
+            self.logger.warning(
+                "Incomplete record at the end of {!r} is skipped".format(self.path)
+            )
+            self.__tail = b""
+
+        self.__write(final=True)
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __read(self):
+        written = 0
+
+        if not os.path.exists(self.path):
+            return written
+
+        # Records are written after each chunk, so only records that are
+        # out of order are kept in memory
+        with open(self.path, "rb") as fh:
+            fh.seek(self.__offset)
+
+            while True:
+                chunk = fh.read(self.CHUNK_SIZE)
+
+                if not chunk:
+                    break
+
+                self.__offset += len(chunk)
+                self.__parse(self.__tail + chunk)
+                written += self.__write()
+
+        return written
+
+    def __parse(self, data):
+        start = 0
+
+        while True:
+            end = data.find(self.terminator, start)
+
+            if end == -1:
+                break
+
+            end += len(self.terminator)
+            cmd_id, record = data[start:end].split(b" ", 1)
+            self.__pending[int(cmd_id)] = record
+            start = end
+
+        self.__tail = data[start:]
+
+    def __write(self, final=False):
+        records = []
+
+        while self.__pending:
+            record = self.__pending.pop(self.next_id, None)
+
+            if record is None:
+                if not final:
+                    break
+
+                self.logger.warning(
+                    "Record with id {} is missing in {!r}".format(
+                        self.next_id, self.path
+                    )
+                )
+                record = self.placeholder
+
+            records.append(record)
+            self.next_id += 1
+
+        if records:
+            append_to_file(self.output, b"".join(records), compress=self.compress)
+
+        return len(records)
@@ -0,0 +1,270 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import os
+import re
+import shutil
+import stat
+import threading
+import time
+
+from clade.cmds import get_last_id, split_cmd
+from clade.compression import open_file
+from clade.extensions.abstract import Extension
+from clade.extensions.common import Common
+from clade.utils import get_logger
+
+# Extensions that do not parse intercepted commands by themselves,
+# so they can be used by extensions that are executed during the build
+HELPER_EXTENSIONS = ("Path", "Storage")
+
+# Types of commands whose output files are specified by the "-o" option
+OUTPUT_TYPES = ("CC", "CXX", "AS", "LD")
+
+
+class LiveParser:
+    """Parse intercepted commands while the build is still running.
+
+    A background thread follows the file with intercepted commands as it
+    grows, and copies completed commands to a separate file in the working
+    directory. Each time this file grows, extensions that parse commands
+    incrementally are executed on it, so after the build only commands
+    appended after the last round remain to be parsed.
+
+    Command is considered completed if all its output files exist and
+    were modified after the start of the build. Commands are copied in
+    order of their ids, so parsing of a command starts only after all
+    previous commands are completed.
+
+    Args:
+        clade: Clade interface object
+        ext_names: List of extensions that will be executed after the build
+        append: A boolean that is True if intercepted commands are appended
+            to already existing file with commands
+    """
+
+    # Number of seconds between checks of the file with intercepted commands
+    interval = 5
+
+    def __init__(self, clade, ext_names, append=False):
+        self.clade = clade
+        self.cmds_file = clade.cmds_file
+        self.live_dir = os.path.join(clade.work_dir, "live")
+        self.live_cmds_file = os.path.join(self.live_dir, "cmds.txt")
+
+        # Working directory must keep results of previous rounds
+        self.conf = dict(clade.conf)
+        self.conf["force"] = False
+
+        self.logger = get_logger("LiveParser", conf=self.conf)
+        self.ext_names = self.__get_live_ext_names(ext_names)
+
+        which_list = []
+        for cmd_type in OUTPUT_TYPES:
+            which_list.extend(self.conf.get(cmd_type + ".which_list", []))
+        self.which_re = re.compile("(" + ")|(".join(which_list) + ")")
+
+        # Commands intercepted by previous builds are already completed
+        self.last_old_id = get_last_id(self.cmds_file) if append else 0
+
+        self.start_time = None
+        self.rounds = 0
+        self.copied = 0
+
+        self.__offset = 0
+        self.__tail = b""
+        self.__pending = []
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def start(self):
+        """Start following the file with intercepted commands."""
+        if not self.ext_names:
+            self.logger.debug("There are no extensions that can parse live")
+            return
+
+        self.logger.debug(
+            "Parse commands during the build by {}".format(", ".join(self.ext_names))
+        )
+
+        if os.path.exists(self.live_dir):
+            shutil.rmtree(self.live_dir)
+        os.makedirs(self.live_dir)
+
+        self.start_time = time.time()
+        self.__thread = threading.Thread(target=self.__follow, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Wait until the current round of parsing is finished and stop."""
+        if not self.__thread:
+            return
+
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+
+        self.logger.debug("Commands were parsed in {} rounds".format(self.rounds))
+        shutil.rmtree(self.live_dir, ignore_errors=True)
+
+    def __get_live_ext_names(self, ext_names):
+        """Get extensions that can be executed during the build.
+
+        These are Common extensions, required (possibly indirectly) by the
+        specified ones, all requirements of which parse commands incrementally.
+        """
+        Extension.get_all_extensions()
+
+        ext_objs = dict()
+        names = list(ext_names)
+
+        while names:
+            name = names.pop()
+
+            if name not in ext_objs:
+                ext_class = Extension.find_subclass(name)
+                ext_objs[name] = ext_class(self.clade.work_dir, conf=self.conf)
+                names.extend(ext_objs[name].requires)
+
+        def can_parse_live(name):
+            ext_obj = ext_objs[name]
+
+            if name in HELPER_EXTENSIONS:
+                return all(can_parse_live(r) for r in ext_obj.requires)
+
+            return ext_obj.incremental and all(
+                can_parse_live(r) for r in ext_obj.requires
+            )
+
+        return sorted(
+            name
+            for name, ext_obj in ext_objs.items()
+            if isinstance(ext_obj, Common) and can_parse_live(name)
+        )
+
+    def __follow(self):
+        while not self.__stop.wait(self.interval):
+            try:
+                if self.__copy_completed_cmds():
+                    self.__parse()
+            except Exception as e:
+                self.logger.warning(
+                    "Parsing during the build is stopped: {!r}. "
+                    "Commands will be parsed after the build".format(e)
+                )
+                return
+
+    def __copy_completed_cmds(self):
+        """Copy new completed commands to the file that is parsed during the build.
+
+        Returns:
+            Number of copied commands
+        """
+        if not os.path.exists(self.cmds_file):
+            return 0
+
+        # Commands may be appended to the file while it is read,
+        # so the last incomplete line is kept until the next round
+        with open_file(self.cmds_file, "rb") as fh:
+            fh.seek(self.__offset)
+            data = self.__tail + fh.read()
+            self.__offset = fh.tell()
+
+        lines = data.split(b"\n")
+        self.__tail = lines.pop()
+        self.__pending.extend(line + b"\n" for line in lines)
+
+        cmds = [
+            split_cmd(line.decode("utf-8", errors="surrogateescape"))
+            for line in self.__pending
+        ]
+        names = [self.__get_arg_names(cmd) for cmd in cmds]
+
+        # Names of files from arguments of commands that follow the current one
+        next_names = collections.Counter(
+            name for cmd_names in names for name in cmd_names
+        )
+
+        completed = 0
+        for cmd, cmd_names in zip(cmds, names):
+            cmd_id = self.copied + completed + 1
+            next_names.subtract(cmd_names)
+
+            if cmd_id > self.last_old_id and not self.__is_completed(cmd, next_names):
+                break
+
+            completed += 1
+
+        if completed:
+            with open(self.live_cmds_file, "ab") as fh:
+                fh.write(b"".join(self.__pending[:completed]))
+
+            del self.__pending[:completed]
+            self.copied += completed
+
+        return completed
+
+    @staticmethod
+    def __get_arg_names(cmd):
+        return {os.path.basename(arg) for arg in cmd["command"][1:]}
+
+    def __is_completed(self, cmd, next_names):
+        if not self.which_re.search(cmd["which"]):
+            return True
+
+        for cmd_out in self.__get_outputs(cmd["command"]):
+            try:
+                st = os.stat(os.path.join(cmd["cwd"], cmd_out))
+
+                # Some file systems store modification time with 1 second precision
+                if not stat.S_ISREG(st.st_mode) or st.st_mtime >= self.start_time - 1:
+                    continue
+            except OSError:
+                pass
+
+            # Output file can be already moved or removed by the next commands,
+            # which are executed only after the current one is completed
+            if next_names[os.path.basename(cmd_out)] <= 0:
+                return False
+
+        return True
+
+    @staticmethod
+    def __get_outputs(command):
+        outputs = []
+        opts = iter(command[1:])
+
+        for opt in opts:
+            if opt == "-o":
+                outputs.append(next(opts, ""))
+            elif opt.startswith("-o"):
+                outputs.append(opt[2:])
+
+        return [cmd_out for cmd_out in outputs if cmd_out and cmd_out != "-"]
+
+    def __parse(self):
+        self.rounds += 1
+
+        # New interface object is created for each round, so extensions
+        # do not keep data loaded by the previous one
+        c = type(self.clade)(
+            work_dir=self.clade.work_dir,
+            cmds_file=self.live_cmds_file,
+            conf=self.conf,
+            preset=self.conf["preset"],
+        )
+
+        c.parse_list(self.ext_names)
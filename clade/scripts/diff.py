@@ -19,7 +19,7 @@ import os
 import sys
 
 from clade import Clade
-
+from clade.extensions.storage import Storage
 
 # Setup extensions logger
 logger = logging.getLogger("Diff")
@@ -233,23 +233,27 @@ class Diff:
         storage_files1 = set()
         storage_files2 = set()
 
-        for root, _, filenames in os.walk(self.cl1.storage_dir):
-            for filename in filenames:
-                storage_files1.add(
-                    os.path.relpath(
-                        os.path.join(root, filename),
-                        start=self.cl1.storage_dir,
-                    )
-                )
-
-        for root, _, filenames in os.walk(self.cl2.storage_dir):
-            for filename in filenames:
-                storage_files2.add(
-                    os.path.relpath(
-                        os.path.join(root, filename),
-                        start=self.cl2.storage_dir,
+        for storage_files, cl in [
+            (storage_files1, self.cl1),
+            (storage_files2, self.cl2),
+        ]:
+            for root, dirnames, filenames in os.walk(cl.storage_dir):
+                # Blobs of deduplicated files and the pack are not part of the path tree
+                if root == cl.storage_dir:
+                    dirnames[:] = [d for d in dirnames if d != Storage.blobs_dir_name]
+                    filenames = [
+                        f
+                        for f in filenames
+                        if f not in (Storage.dedup_file, Storage.pack_file)
+                    ]
+
+                for filename in filenames:
+                    storage_files.add(
+                        os.path.relpath(
+                            os.path.join(root, filename),
+                            start=cl.storage_dir,
+                        )
                     )
-                )
 
         if storage_files1 == storage_files2:
             logger.info("Files in the Storage are the same")
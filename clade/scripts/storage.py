@@ -0,0 +1,51 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import sys
+
+from clade import Clade
+
+
+def main(args=sys.argv[1:]):
+    parser = argparse.ArgumentParser(
+        description="Pack files of the Clade Storage into a single file, or unpack them."
+    )
+
+    parser.add_argument(
+        dest="action", choices=["pack", "unpack"], help="action to perform"
+    )
+    parser.add_argument(dest="work_dir", help="path to the Clade working directory")
+    parser.add_argument(
+        "--keep",
+        help="do not remove files of the Storage after packing, or the pack after unpacking",
+        action="store_true",
+    )
+
+    args = parser.parse_args(args)
+
+    c = Clade(args.work_dir)
+
+    if not c.Storage.is_parsed():
+        sys.exit("Working directory does not contain the Storage")
+
+    if args.action == "pack":
+        c.Storage.pack(remove=not args.keep)
+    else:
+        c.Storage.unpack(remove=not args.keep)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
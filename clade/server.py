@@ -13,12 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
 import multiprocessing
 import threading
 import os
+import re
 import socketserver
 import sys
 import tempfile
+import time
 
 from clade.utils import get_logger
 from clade.extensions.abstract import Extension
@@ -30,65 +33,164 @@ else:
     parent = socketserver.TCPServer
 
 
-# Forking and threading versions can be created using
-# the ForkingMixIn and ThreadingMixIn mix-in classes.
-# For instance, a forking CladeSocketServer class is created as follows:
-# class SocketServer(ForkingMixIn, parent):
-class SocketServer(parent):
+class SocketServer(socketserver.ThreadingMixIn, parent):
+    """Server that preprocesses intercepted commands before their execution.
+
+    Each request is handled in a separate thread, so intercepted processes
+    don't wait for each other. Preprocessed commands are written to the
+    output file through a single buffered file object, which is flushed
+    periodically and when the server is stopped.
+    """
+
+    # Default value is too small for parallel builds
+    request_queue_size = 1024
+
     class RequestHandler(socketserver.StreamRequestHandler):
         def handle(self):
+            time_start = time.monotonic()
             data = self.rfile.readline().strip().decode("utf-8")
+
+            # Records are prefixed by ids of commands, which are kept in the output
+            if self.server.with_ids:
+                cmd_id, data = data.split(" ", 1)
+
             cmd = split_cmd(data)
 
-            for ext in self.extensions:
-                ext.preprocess(cmd)
+            for ext, regex in self.server.extensions:
+                if not regex or regex.search(cmd["which"]):
+                    ext.preprocess(cmd)
 
             data = join_cmd(cmd)
 
-            with open(self.output, "a") as clade_fh:
-                clade_fh.write(data + "\n")
+            if self.server.with_ids:
+                data = cmd_id + " " + data
+
+            self.server.write(data + "\n")
+            self.server.latencies.append(time.monotonic() - time_start)
 
-    def __init__(self, address, output, conf):
+    def __init__(self, address, output, conf, with_ids=False):
         self.process = None
         # Variable to store file object of UNIX socket parent directory
         self.socket_fh = None
 
-        rh = SocketServer.RequestHandler
-
-        rh.output = output
+        self.output = output
+        self.with_ids = with_ids
+        self.flush_interval = conf.get("Server.flush_interval", 1)
 
         # Request handler must have access to extensions
+        self.extensions = self.__get_extensions(conf)
+
+        # Durations of handled requests, in seconds
+        self.latencies = array.array("d")
+
+        self.__output_fh = None
+        self.__output_lock = threading.Lock()
+        self.__stop_event = multiprocessing.Event()
+        self.__stats_reader, self.__stats_writer = multiprocessing.Pipe(duplex=False)
+
+        super().__init__(address, SocketServer.RequestHandler)
+
+    @staticmethod
+    def __get_extensions(conf):
         extensions = []
+
         for cls in Extension.get_all_extensions():
+            # Most extensions do not preprocess commands at all
+            if cls.preprocess is Extension.preprocess:
+                continue
+
             try:
-                extensions.append(cls(conf.get("work_dir", "Clade"), conf))
+                ext = cls(conf.get("work_dir", "Clade"), conf)
             except Exception:
                 # Some extension classes are abstract and can't be instantiated
                 continue
-        rh.extensions = extensions
 
-        super().__init__(address, rh)
+            # Extensions with a which list receive only matching commands
+            which_list = conf.get(ext.name + ".which_list")
+            regex = (
+                re.compile("(" + ")|(".join(which_list) + ")") if which_list else None
+            )
+
+            extensions.append((ext, regex))
+
+        return extensions
+
+    def write(self, data):
+        with self.__output_lock:
+            self.__output_fh.write(data)
+
+    def __flush_periodically(self):
+        while not self.__stop_event.wait(self.flush_interval):
+            with self.__output_lock:
+                self.__output_fh.flush()
+
+    def __wait_for_stop(self):
+        self.__stop_event.wait()
+        self.shutdown()
+
+    def __serve(self):
+        self.__output_fh = open(self.output, "a")
+
+        threading.Thread(target=self.__flush_periodically, daemon=True).start()
+        threading.Thread(target=self.__wait_for_stop, daemon=True).start()
+
+        try:
+            self.serve_forever(poll_interval=0.1)
+        finally:
+            # Wait for all handler threads
+            self.server_close()
+
+            with self.__output_lock:
+                self.__output_fh.close()
+
+            self.__stats_writer.send(self.get_stats())
+
+    def get_stats(self):
+        """Get number of handled requests and statistics of their latencies."""
+        latencies = sorted(self.latencies)
+        stats = {"requests": len(latencies)}
+
+        if latencies:
+            stats["mean"] = sum(latencies) / len(latencies)
+            stats["max"] = latencies[-1]
+
+            for p in (50, 95, 99):
+                stats["p{}".format(p)] = latencies[(len(latencies) - 1) * p // 100]
+
+        return stats
 
     def start(self):
         if sys.platform == "win32" or (
             sys.platform == "darwin" and sys.version_info[1] >= 8
         ):
-            self.process = threading.Thread(target=self.serve_forever)
+            self.process = threading.Thread(target=self.__serve)
         else:
-            self.process = multiprocessing.Process(target=self.serve_forever)
+            self.process = multiprocessing.Process(target=self.__serve)
         self.process.daemon = True
         self.process.start()
 
     def terminate(self):
+        """Stop the server, and return statistics of handled requests."""
+        self.__stop_event.set()
+        self.process.join()
+
+        stats = None
+        if self.__stats_reader.poll():
+            stats = self.__stats_reader.recv()
+
         # if UNIX socket was used, it's parent directory needs to be closed
         if self.socket_fh:
             self.socket_fh.close()
 
+        return stats
+
 
 class PreprocessServer:
-    def __init__(self, conf, output):
+    def __init__(self, conf, output, with_ids=False):
         self.conf = conf
         self.output = output
+        self.with_ids = with_ids
+        self.stats = None
         self.logger = get_logger("Server", conf=self.conf)
         self.server = self.__prepare()
         self.env = self.__setup_env()
@@ -109,7 +211,7 @@ class PreprocessServer:
         name = os.path.join(f.name, "clade.sock")
         self.conf["Server.address"] = name
 
-        server = SocketServer(name, self.output, self.conf)
+        server = SocketServer(name, self.output, self.conf, with_ids=self.with_ids)
 
         # Without this file object will be closed automatically after exiting from this function
         server.sock_fh = f
@@ -124,6 +226,7 @@ class PreprocessServer:
             (self.conf["Server.host"], int(self.conf["Server.port"])),
             self.output,
             self.conf,
+            with_ids=self.with_ids,
         )
 
         # If "Server.port" is 0, than dynamic port assignment is used and the value needs to be updated
@@ -149,4 +252,4 @@ class PreprocessServer:
         self.server.start()
 
     def terminate(self):
-        self.server.terminate()
+        self.stats = self.server.terminate()
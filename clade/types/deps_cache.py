@@ -0,0 +1,165 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import hashlib
+import os
+import re
+
+from clade.types.segment_store import SegmentStore
+from clade.utils import get_program_version
+
+# Options that do not change the list of dependencies
+IGNORED_OPTS = re.compile(r"^(-c|-g.*|-W(?![apl],).*|-M(M?D|P)|-pipe|-v)$")
+
+# Options of dependency generation with values, which are replaced
+# by the options that are used to collect dependencies
+IGNORED_OPTS_WITH_VALUE = {"-MF", "-MT", "-MQ"}
+
+
+@functools.lru_cache()
+def _get_compiler_id(which):
+    path = os.path.realpath(which)
+    stat = os.stat(path)
+
+    return "{}\0{}\0{}\0{}".format(
+        path, stat.st_size, stat.st_mtime_ns, get_program_version(path)
+    )
+
+
+class DepsCache:
+    """Persistent cache of dependencies of input files of compilation commands.
+
+    Key of each input file is a hash of the compiler (its real path, size,
+    modification time and version), options that can affect preprocessing,
+    working directory, path to the input file and its content. Value is the
+    list of dependencies together with hashes of their content, so a cached
+    list is used only if none of the dependencies were changed.
+    Records are kept in the SegmentStore, so parallel workers and even
+    several Clade instances with different working directories can share
+    the same cache.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+        # Index of the reader is loaded only once, since it is reloaded
+        # by SegmentStore each time a new record is added
+        self.__reader = SegmentStore(self.path, ["deps"])
+        self.__writer = SegmentStore(self.path, ["deps"])
+        self.__added = dict()
+
+        # Hashes of files by their paths, which are valid while files
+        # have the same inode, size and modification time
+        self.__hashes = dict()
+
+    def get_key(self, which, opts, cwd, cmd_in, salt=""):
+        """Get key of the input file of the command.
+
+        Returns:
+            Hexadecimal digest or None if the compiler or the input file
+            can't be read
+        """
+        cmd_in_hash = self.get_file_hash(os.path.join(cwd, cmd_in))
+
+        try:
+            compiler_id = _get_compiler_id(which)
+        except OSError:
+            return None
+
+        if not cmd_in_hash:
+            return None
+
+        filtered_opts = []
+        opts = iter(opts)
+
+        for opt in opts:
+            if opt in IGNORED_OPTS_WITH_VALUE:
+                next(opts, None)
+            elif not IGNORED_OPTS.match(opt):
+                filtered_opts.append(opt)
+
+        digest = hashlib.sha1()
+        for item in [compiler_id, cwd, cmd_in, cmd_in_hash, salt] + filtered_opts:
+            digest.update(item.encode("utf-8"))
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    def get(self, key, cwd):
+        """Get cached list of dependencies, or None if it is missing or outdated."""
+        record = self.__added.get(key)
+
+        if not record:
+            record = self.__reader.get("deps", self.__get_store_key(key))
+
+        # Different keys can have the same prefix
+        if not record or record["key"] != key:
+            return None
+
+        for dep, dep_hash in zip(record["deps"], record["hashes"]):
+            if self.get_file_hash(os.path.join(cwd, dep)) != dep_hash:
+                return None
+
+        return record["deps"]
+
+    def add(self, key, deps, cwd):
+        """Store list of dependencies of the input file with a given key."""
+        hashes = [self.get_file_hash(os.path.join(cwd, dep)) for dep in deps]
+
+        # Dependencies that can't be read can't be validated either
+        if None in hashes:
+            return
+
+        record = {"key": key, "deps": deps, "hashes": hashes}
+        self.__writer.add("deps", self.__get_store_key(key), record)
+        self.__added[key] = record
+
+    def merge(self):
+        """Merge records of all processes, so they can be found faster."""
+        self.__reader.close()
+        self.__writer.merge()
+
+    @staticmethod
+    def __get_store_key(key):
+        # Keys of the SegmentStore are 64-bit integers
+        return int(key[:16], 16)
+
+    def get_file_hash(self, path):
+        """Get hash of file content, or None if file can't be read."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self.__hashes.get(path)
+
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = hashlib.sha1()
+
+        try:
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(self.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+
+        self.__hashes[path] = (signature, digest.hexdigest())
+        return digest.hexdigest()
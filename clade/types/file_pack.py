@@ -0,0 +1,126 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import zlib
+
+from clade.compression import DEFAULT_LEVEL
+from clade.types.packed_file import PackedFile
+
+
+class FilePack(PackedFile):
+    """Single-file archive of a directory tree with random access to each file.
+
+    File layout: content of files, each compressed by zlib separately (or
+    stored as is if it can't be compressed), followed by the index that maps
+    relative path of each file to its offset, length, uncompressed size,
+    mode and compression flag, followed by the trailer with the offset of
+    the index. Files with identical content share the same data. The pack
+    is memory-mapped on the first read, so reading a single file costs one
+    slice and one decompression.
+    """
+
+    MAGIC = b"CLADEFP1"
+
+    # Index of the fields of an index entry
+    OFFSET, LENGTH, SIZE, MODE, COMPRESSED = range(5)
+
+    def dump(self, files, level=DEFAULT_LEVEL):
+        """Write files to the pack.
+
+        Args:
+            files: Iterable of pairs with relative paths of files inside
+                   the pack and paths to the files that will be read
+            level: zlib compression level
+
+        Returns:
+            Number of packed files and total size of their content
+        """
+        offsets = dict()
+        offset = 0
+        total_size = 0
+
+        with self._create() as (out, index):
+            for name, path in files:
+                with open(path, "rb") as fh:
+                    content = fh.read()
+
+                mode = os.stat(path).st_mode & 0o7777
+                digest = hashlib.sha1(content).digest()
+
+                if digest not in offsets:
+                    data = zlib.compress(content, level)
+                    compressed = len(data) < len(content)
+
+                    if not compressed:
+                        data = content
+
+                    out.write(data)
+                    offsets[digest] = (offset, len(data), compressed)
+                    offset += len(data)
+
+                data_offset, length, compressed = offsets[digest]
+                index[name] = (data_offset, length, len(content), mode, compressed)
+                total_size += len(content)
+
+        return len(index), total_size
+
+    def read(self, name):
+        """Get content of the file from the pack.
+
+        Raises:
+            KeyError: File is not in the pack.
+        """
+        entry, data = self._read_record(name)
+
+        if entry[self.COMPRESSED]:
+            return zlib.decompress(data)
+
+        return data
+
+    def get_size(self, name):
+        """Get uncompressed size of the file from the pack."""
+        self._open()
+        return self._index[name][self.SIZE]
+
+    def extract(self, dst_dir, overwrite=True):
+        """Extract all files from the pack to the directory.
+
+        Args:
+            dst_dir: Path to the directory
+            overwrite: Overwrite files that already exist in the directory
+
+        Returns:
+            Number of extracted files
+        """
+        self._open()
+        extracted = 0
+
+        for name, entry in self._index.items():
+            dst = os.path.join(dst_dir, name)
+
+            if not overwrite and os.path.exists(dst):
+                continue
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+            with open(dst, "wb") as fh:
+                fh.write(self.read(name))
+
+            os.chmod(dst, entry[self.MODE])
+            extracted += 1
+
+        return extracted
@@ -0,0 +1,136 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import mmap
+import os
+import struct
+
+import orjson
+
+
+class PackedFile:
+    """Base class for single files with indexed records.
+
+    File layout: records, followed by the json index that maps each key to
+    the entry describing its record (the first two fields of each entry are
+    the offset and the length of the record), followed by the trailer with
+    the offset of the index and the magic bytes. The file is memory-mapped
+    on the first read.
+    """
+
+    MAGIC = None
+    TRAILER = struct.Struct("<Q8s")
+
+    # Index of the fields of an index entry
+    OFFSET, LENGTH = range(2)
+
+    def __init__(self, path):
+        self.path = path
+
+        self._index = None
+        self._fh = None
+        self._mm = None
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    @contextlib.contextmanager
+    def _create(self):
+        """Open the file for writing records.
+
+        Yields the opened file and the empty index that should be filled with
+        entries of the written records. The file is written to a temporary
+        one first, so readers never see it half-written.
+        """
+        self.close()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        index = dict()
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+
+        try:
+            with open(tmp, "wb") as fh:
+                yield fh, index
+
+                index_offset = fh.tell()
+                fh.write(orjson.dumps(index))
+                fh.write(self.TRAILER.pack(index_offset, self.MAGIC))
+
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _open(self):
+        if self._index is not None:
+            return
+
+        if not self.exists():
+            self._index = dict()
+            return
+
+        if os.path.getsize(self.path) < self.TRAILER.size:
+            raise RuntimeError("{!r} has wrong format".format(self.path))
+
+        self._fh = open(self.path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        trailer_start = len(self._mm) - self.TRAILER.size
+        index_offset, magic = self.TRAILER.unpack(self._mm[trailer_start:])
+
+        if magic != self.MAGIC:
+            self.close()
+            raise RuntimeError("{!r} has wrong format".format(self.path))
+
+        self._index = orjson.loads(self._mm[index_offset:trailer_start])
+
+    def _read_record(self, key):
+        self._open()
+
+        entry = self._index[key]
+        offset = entry[self.OFFSET]
+        return entry, self._mm[offset : offset + entry[self.LENGTH]]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+        self._index = None
+
+    def __contains__(self, key):
+        self._open()
+        return key in self._index
+
+    def __iter__(self):
+        self._open()
+        yield from self._index
+
+    def __len__(self):
+        self._open()
+        return len(self._index)
+
+    def __getstate__(self):
+        # mmap objects can't be pickled, so reopen the file after unpickling
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
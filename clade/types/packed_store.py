@@ -0,0 +1,60 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import orjson
+
+from clade.types.packed_file import PackedFile
+from clade.utils import array_hook
+
+
+class PackedStore(PackedFile):
+    """Single-file key-value storage of json-serializable records.
+
+    File layout: packed records, followed by the index that maps each key
+    to the (offset, length) pair of its record, followed by the trailer
+    with the offset of the index. The file is memory-mapped on the first
+    read, so loading a single record costs one slice and one json parse.
+    """
+
+    MAGIC = b"CLADEPK1"
+
+    def dump(self, data):
+        """Write all items of a given dictionary to the file."""
+        with self._create() as (fh, index):
+            offset = 0
+
+            for key in data:
+                record = orjson.dumps(data[key], default=array_hook)
+                fh.write(record)
+
+                index[key] = (offset, len(record))
+                offset += len(record)
+
+    def __getitem__(self, key):
+        _, record = self._read_record(key)
+        return orjson.loads(record)
+
+    def get(self, key, default_value=None):
+        try:
+            return self.__getitem__(key)
+        except KeyError:
+            return default_value
+
+    def keys(self):
+        return list(self.__iter__())
+
+    def items(self):
+        for key in self.__iter__():
+            yield key, self.__getitem__(key)
@@ -0,0 +1,240 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import os
+import struct
+import threading
+import time
+import uuid
+
+import orjson
+
+from clade.utils import after_fork_in_child, array_hook
+
+# Segments that are opened for writing by the current process.
+# Stores are pickled and sent to worker processes for each batch of
+# commands, so writers are shared by all stores with the same path
+_writers = dict()
+_writers_lock = threading.Lock()
+
+
+@after_fork_in_child
+def _reset_writers_lock():
+    global _writers_lock
+    _writers_lock = threading.Lock()
+
+
+class SegmentStore:
+    """Append-only storage of json-serializable records with integer keys.
+
+    Records are divided into several kinds (for example, parsed commands
+    and their options), and each kind has its own key space. Each process
+    appends records to its own segment file, and for each record it appends
+    a fixed-size entry (key, offset, length, kind) to the index of this
+    segment, so processes never write to the same file. merge() concatenates
+    indexes of all segments into a single index file, which is loaded
+    by readers. If there is no merged index, indexes of all segments are
+    read instead.
+    """
+
+    ENTRY = struct.Struct("<QQIHH")
+
+    def __init__(self, path, kinds):
+        self.path = path
+        self.kinds = list(kinds)
+
+        self.index_file = os.path.join(self.path, "index.bin")
+        self.segments_file = os.path.join(self.path, "segments.json")
+
+        self.__segments = None
+        self.__index = None
+        self.__entries = None
+        self.__readers = dict()
+        self.__lock = threading.Lock()
+
+    def add(self, kind, key, data):
+        """Append record of a given kind to the segment of current process."""
+        record = orjson.dumps(data, default=array_hook)
+
+        with _writers_lock:
+            seg_fd, idx_fd = self.__get_writer()
+
+            offset = os.lseek(seg_fd, 0, os.SEEK_END)
+            os.write(seg_fd, record)
+            os.write(
+                idx_fd,
+                self.ENTRY.pack(
+                    int(key), offset, len(record), self.kinds.index(kind), 0
+                ),
+            )
+
+            # Records of the merged index are outdated
+            self.__index = None
+
+    def __get_writer(self):
+        pid, writer = _writers.get(self.path, (None, None))
+
+        # Writers can't be shared with forked worker processes
+        if pid != os.getpid():
+            os.makedirs(self.path, exist_ok=True)
+
+            if os.path.exists(self.index_file):
+                os.remove(self.index_file)
+
+            # Names of segments are sorted in order of their creation,
+            # so records from newer segments replace older ones
+            segment = os.path.join(
+                self.path, "{:020d}-{}.seg".format(time.time_ns(), uuid.uuid4().hex)
+            )
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+
+            writer = (
+                os.open(segment, flags, 0o644),
+                os.open(segment + ".idx", flags, 0o644),
+            )
+            _writers[self.path] = (os.getpid(), writer)
+
+        return writer
+
+    def close(self):
+        """Close all opened segment files."""
+        with _writers_lock:
+            pid, writer = _writers.pop(self.path, (None, None))
+
+            if pid == os.getpid():
+                for fd in writer:
+                    os.close(fd)
+
+        with self.__lock:
+            for fh in self.__readers.values():
+                fh.close()
+
+            self.__readers.clear()
+            self.__index = None
+
+    def merge(self):
+        """Concatenate indexes of all segments into a single index file."""
+        self.close()
+
+        segments, entries = self.__read_segment_indexes()
+
+        if not segments:
+            return
+
+        tmp_file = self.index_file + ".tmp"
+
+        with open(tmp_file, "wb") as fh:
+            fh.write(entries)
+
+        with open(self.segments_file, "wb") as fh:
+            fh.write(orjson.dumps(segments))
+
+        os.replace(tmp_file, self.index_file)
+
+    def __read_segment_indexes(self):
+        segments = []
+        entries = bytearray()
+
+        for idx_file in sorted(glob.glob(os.path.join(self.path, "*.seg.idx"))):
+            with open(idx_file, "rb") as fh:
+                data = fh.read()
+
+            # Skip incomplete entry that may be left by a killed process
+            data = data[: len(data) - len(data) % self.ENTRY.size]
+
+            for key, offset, length, kind, _ in self.ENTRY.iter_unpack(data):
+                entries += self.ENTRY.pack(key, offset, length, kind, len(segments))
+
+            segments.append(os.path.basename(idx_file)[: -len(".idx")])
+
+        return segments, bytes(entries)
+
+    def __load_index(self):
+        if self.__index is not None:
+            return
+
+        if os.path.exists(self.index_file) and os.path.exists(self.segments_file):
+            with open(self.segments_file, "rb") as fh:
+                segments = orjson.loads(fh.read())
+
+            with open(self.index_file, "rb") as fh:
+                entries = fh.read()
+        else:
+            segments, entries = self.__read_segment_indexes()
+
+        # Index of each kind maps keys to the numbers of entries,
+        # which are unpacked only when records are requested.
+        # Later records of the same key replace earlier ones
+        index = [dict() for _ in self.kinds]
+
+        for i, (key, _, _, kind, _) in enumerate(self.ENTRY.iter_unpack(entries)):
+            index[kind][key] = i
+
+        self.__segments = segments
+        self.__entries = entries
+        self.__index = index
+
+    def __read(self, entry_number):
+        key, offset, length, kind, segment = self.ENTRY.unpack_from(
+            self.__entries, entry_number * self.ENTRY.size
+        )
+
+        # Numbers of segments are changed each time the index is rebuilt,
+        # so opened segments are identified by their names
+        name = self.__segments[segment]
+
+        if name not in self.__readers:
+            self.__readers[name] = open(os.path.join(self.path, name), "rb")
+
+        fh = self.__readers[name]
+        fh.seek(offset)
+
+        return orjson.loads(fh.read(length))
+
+    def get(self, kind, key, default_value=None):
+        """Get record of a given kind by its key."""
+        with self.__lock:
+            self.__load_index()
+
+            entry_number = self.__index[self.kinds.index(kind)].get(int(key))
+
+            if entry_number is None:
+                return default_value
+
+            return self.__read(entry_number)
+
+    def contains(self, kind, key):
+        with self.__lock:
+            self.__load_index()
+            return int(key) in self.__index[self.kinds.index(kind)]
+
+    def keys(self, kind):
+        """Get sorted list of keys of all records of a given kind."""
+        with self.__lock:
+            self.__load_index()
+            return sorted(self.__index[self.kinds.index(kind)])
+
+    def items(self, kind):
+        """Yield all records of a given kind sorted by their keys."""
+        for key in self.keys(kind):
+            yield key, self.get(kind, key)
+
+    def __getstate__(self):
+        # File descriptors and locks can't be pickled
+        return {"path": self.path, "kinds": self.kinds}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["kinds"])
@@ -20,10 +20,41 @@ import os
 import re
 import subprocess
 import sys
+import threading
 import orjson
 
 
+def after_fork_in_child(func):
+    """Decorator that registers function to be called in child processes after fork().
+
+    Extensions can be executed in parallel threads, and each of them creates
+    worker processes by fork(). Locks that were held by other threads at the
+    moment of fork() are never released in the child process, so module-level
+    locks must be recreated there.
+    """
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=func)
+
+    return func
+
+
+# Extensions can be executed in parallel threads, and each of them
+# reconfigures the same logger
+_logger_lock = threading.Lock()
+
+
+@after_fork_in_child
+def _reset_logger_lock():
+    global _logger_lock
+    _logger_lock = threading.Lock()
+
+
 def get_logger(name, with_name=True, conf=None):
+    with _logger_lock:
+        return _get_logger(name, with_name=with_name, conf=conf)
+
+
+def _get_logger(name, with_name=True, conf=None):
     if not conf:
         conf = dict()
 
@@ -83,6 +114,23 @@ def merge_preset_to_conf(preset_name, conf):
     return preset_conf
 
 
+def get_which_list(conf):
+    """Get regexes from "which_list" options of all extensions.
+
+    Commands of executables that do not match any of them are not parsed
+    by any extension.
+    """
+    which_list = []
+
+    for key in sorted(conf):
+        if key.endswith(".which_list"):
+            which_list.extend(conf[key])
+        elif key.endswith(".process_ccache") and conf[key]:
+            which_list.append("ccache$")
+
+    return which_list
+
+
 def get_clade_version():
     version = pkg_resources.get_distribution("clade").version
     location = pkg_resources.get_distribution("clade").location
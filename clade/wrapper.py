@@ -13,12 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import os
+import re
 import tempfile
 import shutil
 import sys
+import time
 
 from clade.abstract import Intercept
+from clade.utils import get_which_list, merge_preset_to_conf
 
 
 class Wrapper(Intercept):
@@ -35,7 +39,15 @@ class Wrapper(Intercept):
         if intercept_open:
             raise RuntimeError("wrappers can't be used to intercept open()")
 
-        self.wrappers_dir = tempfile.mkdtemp()
+        # Directory with wrappers can be reused between launches
+        self.cache_dir = (conf if conf else dict()).get("Wrapper.cache_dir")
+        self.wrapper = self.__find_wrapper()
+
+        if self.cache_dir:
+            self.cache_dir = os.path.abspath(self.cache_dir)
+            self.wrappers_dir = self.__get_cached_wrappers_dir(conf, command)
+        else:
+            self.wrappers_dir = tempfile.mkdtemp()
 
         super().__init__(
             command,
@@ -47,7 +59,6 @@ class Wrapper(Intercept):
             conf=conf,
         )
 
-        self.wrapper = self.__find_wrapper()
         self.wrapper_postfix = ".clade"
 
     def _setup_env(self):
@@ -60,32 +71,101 @@ class Wrapper(Intercept):
 
         return env
 
-    def __find_wrapper(self):
+    @staticmethod
+    def __find_wrapper():
         wrapper = os.path.join(os.path.dirname(__file__), "intercept", "wrapper")
 
         if not os.path.exists(wrapper):
             raise RuntimeError("wrapper is not found in {!r}".format(wrapper))
 
-        self.logger.debug("Path to the wrapper: {!r}".format(wrapper))
-
         return wrapper
 
+    def __get_cached_wrappers_dir(self, conf, command):
+        """Get path to the directory with wrappers inside the cache directory.
+
+        Its name depends on everything that affects the set of wrappers:
+        path to the wrapper, directories from PATH and their modification
+        times (they are changed if executables are added or removed),
+        and the regex that filters them.
+        """
+        key = [self.wrapper, self.__get_which_regex(conf, command)]
+
+        for path in os.environ.get("PATH", "").split(os.pathsep):
+            try:
+                key.append("{}:{}".format(path, os.stat(path).st_mtime_ns))
+            except OSError:
+                continue
+
+        digest = hashlib.sha256("\n".join(key).encode("utf-8", "surrogateescape"))
+        return os.path.join(self.cache_dir, "wrappers-" + digest.hexdigest()[:16])
+
+    @staticmethod
+    def __get_which_regex(conf, command):
+        """Join "which_list" options of all extensions into a single regex.
+
+        Only executables that match it are wrapped, since commands of other
+        executables are not parsed by any extension. Executable of the build
+        command itself is always wrapped, so it remains the first intercepted
+        command, and its working directory is used as the build directory.
+        Returns an empty string if filtering is disabled, or there are no
+        "which_list" options. Missing configuration is treated as the
+        default one.
+        """
+        if not conf:
+            conf = merge_preset_to_conf("base", dict())
+
+        if not conf.get("Wrapper.filter_path_wrappers", True):
+            return ""
+
+        which_list = get_which_list(conf)
+
+        if not which_list:
+            return ""
+
+        if command:
+            which_list.append("/" + re.escape(os.path.basename(command[0])) + "$")
+
+        return "(" + ")|(".join(which_list) + ")"
+
     def __create_wrappers(self):
         self.__create_path_wrappers()
         self.__create_exe_wrappers()
 
     def __create_path_wrappers(self):
-        self.logger.debug(
-            "Create temporary directory for wrappers: {!r}".format(self.wrappers_dir)
-        )
+        self.logger.debug("Path to the wrapper: {!r}".format(self.wrapper))
+        time_start = time.time()
+
+        if self.cache_dir:
+            if os.path.isdir(self.wrappers_dir):
+                self.logger.debug(
+                    "Reuse cached directory with wrappers: {!r}".format(
+                        self.wrappers_dir
+                    )
+                )
+                return
 
-        if os.path.exists(self.wrappers_dir):
-            shutil.rmtree(self.wrappers_dir)
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            # Wrappers are created in a temporary directory, which is renamed
+            # afterwards, so other launches never see an incomplete one
+            wrappers_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        else:
+            wrappers_dir = self.wrappers_dir
+
+            if os.path.exists(wrappers_dir):
+                shutil.rmtree(wrappers_dir)
+
+            os.makedirs(wrappers_dir)
 
-        os.makedirs(self.wrappers_dir)
+        self.logger.debug(
+            "Create directory for wrappers: {!r}".format(self.wrappers_dir)
+        )
 
         paths = os.environ.get("PATH", "").split(os.pathsep)
 
+        which_regex = self.__get_which_regex(self.conf, self.command)
+        which_re = re.compile(which_regex) if which_regex else None
+
         counter = 0
         self.logger.debug(
             "Walk through every directory in PATH to create wrappers: {!r}".format(
@@ -95,18 +175,30 @@ class Wrapper(Intercept):
         for path in paths:
             try:
                 for file in os.listdir(path):
+                    if which_re and not which_re.search(os.path.join(path, file)):
+                        continue
+
                     if os.access(os.path.join(path, file), os.X_OK):
                         try:
-                            os.symlink(
-                                self.wrapper, os.path.join(self.wrappers_dir, file)
-                            )
+                            os.symlink(self.wrapper, os.path.join(wrappers_dir, file))
                             counter += 1
                         except FileExistsError:
                             continue
             except (FileNotFoundError, PermissionError):
                 continue
 
-        self.logger.debug("{} path wrappers were created".format(counter))
+        if wrappers_dir != self.wrappers_dir:
+            try:
+                os.rename(wrappers_dir, self.wrappers_dir)
+            except OSError:
+                # The same directory was created by a concurrent launch
+                shutil.rmtree(wrappers_dir)
+
+        self.logger.debug(
+            "{} path wrappers were created in {:.3f} seconds".format(
+                counter, time.time() - time_start
+            )
+        )
 
     def __create_exe_wrappers(self):
         wrap_list = self.conf.get("Wrapper.wrap_list", [])
@@ -152,11 +244,12 @@ class Wrapper(Intercept):
             self.logger.warning(e)
 
     def __delete_wrappers(self):
-        self.logger.debug(
-            "Delete temporary directory with wrappers: {!r}".format(self.wrappers_dir)
-        )
-
-        if os.path.exists(self.wrappers_dir):
+        if not self.cache_dir and os.path.exists(self.wrappers_dir):
+            self.logger.debug(
+                "Delete temporary directory with wrappers: {!r}".format(
+                    self.wrappers_dir
+                )
+            )
             shutil.rmtree(self.wrappers_dir)
 
         self.logger.debug("Delete all other wrapper files")
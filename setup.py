@@ -236,6 +236,7 @@ setuptools.setup(
             "clade-trace=clade.scripts.tracer:main",
             "clade-file-graph=clade.scripts.file_graph:main",
             "clade-pid-graph=clade.scripts.pid_graph:main",
+            "clade-storage=clade.scripts.storage:main",
         ]
     },
     cmdclass={
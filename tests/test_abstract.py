@@ -32,6 +32,19 @@ def test_cc_parallel(tmpdir, cmds_file):
         os.environ["CLADE_DEBUG"] = "1"
 
 
+@pytest.mark.parametrize("batch_size", [1, 1000])
+def test_cc_parallel_batch_size(tmpdir, cmds_file, batch_size):
+    del os.environ["CLADE_DEBUG"]
+
+    try:
+        c = Clade(tmpdir, cmds_file, conf={"batch_size": batch_size})
+        e = c.parse("CC")
+
+        assert e.load_all_cmds()
+    finally:
+        os.environ["CLADE_DEBUG"] = "1"
+
+
 def test_cc_parallel_with_exception(tmpdir, cmds_file):
     del os.environ["CLADE_DEBUG"]
 
@@ -116,3 +129,90 @@ def test_check_conf_consistency(tmpdir, cmds_file):
     c = Clade(tmpdir, cmds_file, conf=changed_conf)
     with pytest.raises(RuntimeError):
         c.parse("CC")
+
+
+@pytest.mark.parametrize("parallel_extensions", [True, False])
+def test_parallel_extensions(tmpdir, cmds_file, parallel_extensions):
+    del os.environ["CLADE_DEBUG"]
+
+    try:
+        conf = {"parallel_extensions": parallel_extensions, "cpu_count": 2}
+        c = Clade(tmpdir, cmds_file, conf=conf)
+        c.parse_list(["CmdGraph"])
+
+        meta = c.get_meta()
+        for ext_name in ["PidGraph", "Path", "Storage", "CC", "LD", "CmdGraph"]:
+            assert ext_name in meta
+            assert not meta[ext_name]["corrupted"]
+
+        assert c.cmd_graph
+    finally:
+        os.environ["CLADE_DEBUG"] = "1"
+
+
+def test_parallel_extensions_with_exception(tmpdir, cmds_file):
+    del os.environ["CLADE_DEBUG"]
+
+    try:
+        with unittest.mock.patch("clade.extensions.ld.LD.parse_cmd") as parse_cmd_mock:
+            parse_cmd_mock.side_effect = RuntimeError
+
+            c = Clade(tmpdir, cmds_file, conf={"parallel_extensions": True})
+            with pytest.raises(RuntimeError):
+                c.parse_list(["CmdGraph"])
+
+            assert not c.are_parsed("CmdGraph")
+    finally:
+        os.environ["CLADE_DEBUG"] = "1"
+
+
+@pytest.mark.parametrize("clade_debug", [True, False])
+def test_profile(tmpdir, cmds_file, clade_debug):
+    if not clade_debug:
+        del os.environ["CLADE_DEBUG"]
+
+    try:
+        c = Clade(tmpdir, cmds_file, conf={"profile": True, "cpu_count": 2})
+        c.parse("CC")
+
+        profile = c.get_meta()["CC"]["profile"]
+
+        assert profile["wall_time"] > 0
+        assert profile["cpu_time"] > 0
+        assert profile["peak_rss"] > 0
+        assert profile["files_created"] > 0
+
+        if not clade_debug:
+            assert profile["workers_peak_rss"] > 0
+    finally:
+        os.environ["CLADE_DEBUG"] = "1"
+
+
+def _use_locks_in_child():
+    from clade.extensions.abstract import Extension
+    from clade.utils import get_logger
+
+    get_logger("Test")
+
+    with Extension._meta_lock:
+        pass
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires fork")
+def test_locks_after_fork():
+    import multiprocessing
+
+    from clade import utils
+    from clade.extensions.abstract import Extension
+
+    # Locks are held by the parent process at the moment of fork()
+    with utils._logger_lock, Extension._meta_lock:
+        p = multiprocessing.get_context("fork").Process(target=_use_locks_in_child)
+        p.start()
+        p.join(timeout=30)
+
+    if p.is_alive():
+        p.kill()
+        p.join()
+
+    assert p.exitcode == 0
@@ -0,0 +1,93 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+import shutil
+import sys
+
+from benchmarks.exec_storm import METHODS, get_number_of_execs, measure
+from benchmarks.generator import BuildGenerator
+from benchmarks.intercept import MODES
+from benchmarks.which_cache import measure as measure_which
+from clade import Clade
+
+
+def test_generated_build(tmpdir):
+    generator = BuildGenerator(
+        os.path.join(str(tmpdir), "build"),
+        compile_cmds=20,
+        link_cmds=3,
+        copies=6,
+        headers=10,
+        includes=3,
+        pid_depth=4,
+    )
+    stats = generator.generate()
+
+    conf = {
+        "Compiler.get_deps": False,
+        "Alternatives.requires": ["LN", "Install"],
+        "CmdGraph.requires": ["CC", "LD", "LN", "Install"],
+        "SrcGraph.requires": ["CC"],
+    }
+    c = Clade(os.path.join(str(tmpdir), "clade"), generator.cmds_file, conf=conf)
+    c.parse_list(["CmdGraph", "SrcGraph"])
+
+    assert len(c.pid_graph) == stats["cmds"]
+    assert len(c.get_all_cmds_by_type("CC")) == stats["CC"]
+    assert len(c.get_all_cmds_by_type("LD")) == stats["LD"]
+    assert len(c.get_all_cmds_by_type("LN")) == stats["LN"]
+    assert len(c.get_all_cmds_by_type("Install")) == stats["Install"]
+    assert (
+        len(c.cmd_graph) == stats["CC"] + stats["LD"] + stats["LN"] + stats["Install"]
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    sys.platform != "linux" or not shutil.which("cc"),
+    reason="tests only for Linux with C compiler",
+)
+@pytest.mark.parametrize("method", METHODS)
+def test_exec_storm(tmpdir, method):
+    results = measure(str(tmpdir), method, depth=2, fanout=3, parallel=2, modes=MODES)
+    execs = get_number_of_execs(2, 3, 2)
+
+    assert [r["mode"] for r in results] == ["none"] + MODES
+
+    for r in results:
+        assert r["execs"] == execs
+        assert r["p50"] <= r["p99"] <= r["max"]
+
+    for r in results[1:]:
+        # Storm processes, sh, seq and roots of process trees
+        assert r["cmds"] == execs + 4
+        assert r["bytes"] > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    sys.platform != "linux" or not shutil.which("cc"),
+    reason="tests only for Linux with C compiler",
+)
+def test_which_cache(tmpdir):
+    results = measure_which(str(tmpdir), ["sh", "cc"], iterations=100, extra_dirs=5)
+
+    assert list(results) == ["sh", "cc"]
+
+    for uncached, cached in results.values():
+        assert uncached > 0
+        assert cached > 0
@@ -16,9 +16,13 @@
 import os
 import pytest
 import re
+import shutil
+import subprocess
+import sys
 
 from clade import Clade
 from clade.extensions.opts import cc_preprocessor_opts
+from clade.types.deps_cache import DepsCache
 
 
 def test_cc_load_deps_by_id(tmpdir, cmds_file):
@@ -177,3 +181,106 @@ def test_cc_preprocess(tmpdir, cmds_file):
     e = c.parse("CC")
 
     assert e.get_all_pre_files()
+
+
+def test_cc_deps_cache(tmpdir, cmds_file, monkeypatch):
+    conf = {"CC.deps_cache": os.path.join(str(tmpdir), "deps_cache")}
+
+    c = Clade(os.path.join(str(tmpdir), "first"), cmds_file, conf)
+    first_deps = {
+        cmd["id"]: sorted(cmd["deps"])
+        for cmd in c.parse("CC").load_all_cmds(with_deps=True)
+    }
+
+    # The second launch executes compilers only for files that were
+    # removed after the build, since their dependencies can't be cached
+    def call(command, cwd=None, **kwargs):
+        assert not os.path.exists(os.path.join(cwd, command[-1]))
+
+    monkeypatch.setattr(subprocess, "call", call)
+
+    c = Clade(os.path.join(str(tmpdir), "second"), cmds_file, conf)
+    second_deps = {
+        cmd["id"]: sorted(cmd["deps"])
+        for cmd in c.parse("CC").load_all_cmds(with_deps=True)
+    }
+
+    assert first_deps
+    assert first_deps == second_deps
+
+
+@pytest.mark.skipif(not shutil.which("gcc"), reason="requires gcc")
+def test_cc_deps_cache_failed_compiler(tmpdir):
+    conf = {"CC.deps_cache": os.path.join(str(tmpdir), "deps_cache")}
+    src_dir = os.path.join(str(tmpdir), "src")
+    main_c = os.path.join(src_dir, "main.c")
+    gen_h = os.path.join(src_dir, "gen.h")
+    os.makedirs(src_dir)
+
+    with open(main_c, "w") as fh:
+        fh.write('#include "gen.h"\nint main() { return X; }\n')
+
+    with open(gen_h, "w") as fh:
+        fh.write("#define X 0\n")
+
+    c = Clade(os.path.join(str(tmpdir), "build"), conf=conf)
+    assert not c.intercept(
+        ["gcc", "-c", main_c, "-o", os.path.join(src_dir, "main.o")],
+        use_wrappers=False,
+    )
+
+    # Header is generated during the build and removed afterwards
+    os.remove(gen_h)
+    c = Clade(os.path.join(str(tmpdir), "first"), c.cmds_file, conf)
+    assert not any(
+        gen_h in cmd["deps"] for cmd in c.parse("CC").load_all_cmds(with_deps=True)
+    )
+
+    # Dependencies collected by the failed compiler are not cached
+    with open(gen_h, "w") as fh:
+        fh.write("#define X 0\n")
+
+    c = Clade(os.path.join(str(tmpdir), "second"), c.cmds_file, conf)
+    cmds = list(c.parse("CC").load_all_cmds(with_deps=True))
+
+    assert cmds
+    for cmd in cmds:
+        assert gen_h in cmd["deps"]
+        assert main_c in cmd["deps"]
+
+
+def test_deps_cache_validation(tmpdir):
+    cache = DepsCache(os.path.join(str(tmpdir), "deps_cache"))
+    cwd = str(tmpdir)
+
+    for name in ["main.c", "main.h"]:
+        with open(os.path.join(cwd, name), "w") as fh:
+            fh.write("int x;\n")
+
+    key = cache.get_key(shutil.which("gcc") or sys.executable, [], cwd, "main.c")
+    assert key
+    assert cache.get(key, cwd) is None
+
+    cache.add(key, ["main.c", "main.h"], cwd)
+    cache.merge()
+    assert cache.get(key, cwd) == ["main.c", "main.h"]
+
+    # Options that do not affect preprocessing do not change the key
+    assert key == cache.get_key(
+        shutil.which("gcc") or sys.executable,
+        ["-c", "-g", "-Wall", "-MD", "-MF", "main.d"],
+        cwd,
+        "main.c",
+    )
+    assert key != cache.get_key(
+        shutil.which("gcc") or sys.executable, ["-DX"], cwd, "main.c"
+    )
+
+    # Another cache instance reads merged records
+    cache = DepsCache(os.path.join(str(tmpdir), "deps_cache"))
+    assert cache.get(key, cwd) == ["main.c", "main.h"]
+
+    with open(os.path.join(cwd, "main.h"), "w") as fh:
+        fh.write("int y;\n")
+
+    assert cache.get(key, cwd) is None
@@ -0,0 +1,40 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from clade import Clade
+from clade.cmds import iter_cmds_by_ids, iter_cmds_by_which
+
+
+@pytest.mark.parametrize("cmd_type", ["AR", "AS", "LD", "MV", "Objcopy"])
+def test_cmd_classifier(tmpdir, cmds_file, cmd_type):
+    c = Clade(tmpdir, cmds_file)
+    e = c.parse("CmdClassifier")
+
+    which_list = c.conf[cmd_type + ".which_list"]
+    cmd_ids = e.load_cmd_ids(cmds_file, cmd_type, which_list)
+
+    expected = list(iter_cmds_by_which(cmds_file, which_list))
+    assert list(cmd_ids) == [cmd["id"] for cmd in expected]
+    assert list(iter_cmds_by_ids(cmds_file, cmd_ids)) == expected
+
+
+def test_cmd_classifier_outdated(tmpdir, cmds_file):
+    c = Clade(tmpdir, cmds_file)
+    e = c.parse("CmdClassifier")
+
+    assert e.load_cmd_ids(cmds_file, "LD", ["unknown"]) is None
+    assert e.load_cmd_ids(cmds_file, "Unknown", []) is None
@@ -22,6 +22,9 @@ from clade.cmds import (
     iter_cmds_by_which,
     open_cmds_file,
     get_build_dir,
+    get_cmd_by_id,
+    get_cmds_index,
+    get_last_cmd,
     get_last_id,
     get_stats,
     join_cmd,
@@ -81,3 +84,36 @@ def test_get_all_cmds(cmds_file):
         cmds.append(cmd)
 
     assert cmds == get_all_cmds(cmds_file)
+
+
+def test_get_cmd_by_id(cmds_file):
+    cmds = get_all_cmds(cmds_file)
+
+    for cmd in cmds:
+        assert get_cmd_by_id(cmds_file, cmd["id"]) == cmd
+
+    with pytest.raises(RuntimeError):
+        get_cmd_by_id(cmds_file, len(cmds) + 1)
+
+
+def test_cmds_index_append(tmpdir, cmds_file):
+    tmp_cmds_file = os.path.join(str(tmpdir), "cmds.txt")
+    shutil.copy(cmds_file, tmp_cmds_file)
+
+    cmds = get_all_cmds(tmp_cmds_file)
+    assert get_last_id(tmp_cmds_file) == len(cmds)
+    assert os.path.exists(get_cmds_index(tmp_cmds_file).index_file)
+
+    with open(tmp_cmds_file, "a") as fh:
+        fh.write(join_cmd(cmds[0]) + "\n")
+
+    assert get_last_id(tmp_cmds_file) == len(cmds) + 1
+    assert get_last_cmd(tmp_cmds_file)["command"] == cmds[0]["command"]
+
+    # Rewritten file of the same size must be indexed again
+    with open(tmp_cmds_file, "w") as fh:
+        for cmd in reversed(cmds):
+            fh.write(join_cmd(cmd) + "\n")
+        fh.write(join_cmd(cmds[0]) + "\n")
+
+    assert get_cmd_by_id(tmp_cmds_file, 1)["command"] == cmds[-1]["command"]
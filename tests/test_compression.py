@@ -0,0 +1,107 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+import sys
+
+from clade import Clade
+from clade import compression
+from clade.cmds import get_cmd_by_id, iter_cmds
+from clade.envs import iter_envs
+from clade.intercept import intercept
+from tests.test_intercept import test_project_make
+
+
+def test_compressed_file(tmpdir, monkeypatch):
+    monkeypatch.setattr(compression, "BLOCK_SIZE", 10)
+
+    path = os.path.join(str(tmpdir), "cmds.txt")
+    lines = [b"line %d\n" % i for i in range(100)]
+
+    for i in range(0, len(lines), 7):
+        compression.append_to_file(path, b"".join(lines[i : i + 7]), compress=True)
+
+    data = b"".join(lines)
+    assert compression.is_compressed(path)
+    assert compression.get_size(path) == len(data)
+
+    with compression.open_file(path) as fh:
+        assert fh.readlines() == [line.decode() for line in lines]
+
+        fh.seek(data.index(b"line 42\n"))
+        assert fh.readline() == "line 42\n"
+
+    # Incomplete block at the end of the file is skipped
+    with open(path, "ab") as fh:
+        fh.write(compression.BLOCK_HEADER.pack(100, 10) + b"0")
+
+    with compression.open_file(path, "rb") as fh:
+        assert fh.read() == data
+
+
+def test_plain_file_is_not_compressed(tmpdir):
+    path = os.path.join(str(tmpdir), "cmds.txt")
+
+    compression.append_to_file(path, b"line 1\n")
+    compression.append_to_file(path, b"line 2\n", compress=True)
+
+    assert not compression.is_compressed(path)
+
+    with compression.open_file(path) as fh:
+        assert fh.read() == "line 1\nline 2\n"
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+def test_compressed_intercept(tmpdir):
+    outputs = dict()
+
+    for compress in [False, True]:
+        output = os.path.join(str(tmpdir), str(compress), "cmds.txt")
+        os.makedirs(os.path.dirname(output))
+
+        assert not intercept(
+            command=test_project_make,
+            output=output,
+            use_wrappers=False,
+            intercept_open=True,
+            intercept_envs=True,
+            conf={"Intercept.compress_logs": compress},
+        )
+
+        outputs[compress] = output
+
+    output = outputs[True]
+    for name in ["cmds.txt", "envs.txt", "open.txt"]:
+        assert compression.is_compressed(os.path.join(os.path.dirname(output), name))
+
+    # Names of temporary files are different between builds
+    cmds = list(iter_cmds(output))
+    assert [cmd["which"] for cmd in cmds] == [
+        cmd["which"] for cmd in iter_cmds(outputs[False])
+    ]
+    assert get_cmd_by_id(output, len(cmds)) == cmds[-1]
+
+    envs_file = os.path.join(os.path.dirname(output), "envs.txt")
+    assert len(list(iter_envs(envs_file))) == len(cmds)
+
+    c = Clade(os.path.join(str(tmpdir), "clade"), output)
+    e = c.parse("OpenFiles")
+
+    for cmd in c.parse("CC").load_all_cmds(compile_only=True):
+        files = e.load_files_by_id(cmd["id"])
+
+        for cmd_in in cmd["in"]:
+            assert os.path.join(cmd["cwd"], cmd_in) in files
@@ -14,16 +14,22 @@
 # limitations under the License.
 
 
+import os
+import sys
+
 import pytest
 
+from clade.cmds import iter_cmds
 from clade.envs import (
     open_envs_file,
     iter_envs,
     join_env,
+    get_envs_index,
     get_last_id,
     get_all_envs,
     get_stats,
 )
+from clade.intercept import intercept
 
 
 def test_bad_open():
@@ -53,6 +59,10 @@ def test_join_env(envs_file):
         for line in envs_fh:
             line = line.strip()
 
+            # Markers of differences with environments of parent commands
+            if line.startswith("="):
+                continue
+
             assert not line or line in lines
 
 
@@ -62,3 +72,41 @@ def test_get_all_envs(envs_file):
         envs.append(env)
 
     assert envs == get_all_envs(envs_file)
+
+
+def test_get_envs_index(envs_file):
+    index = get_envs_index(envs_file)
+
+    for envs in iter_envs(envs_file):
+        assert index.get_envs(envs["id"]) == envs["envs"]
+
+        for name, value in envs["envs"].items():
+            assert index.get_env_value(envs["id"], name) == value
+
+    assert index.get_env_value(1, "CLADE_NO_SUCH_VARIABLE") is None
+    assert os.path.isfile(envs_file + ".idx")
+
+    with pytest.raises(RuntimeError):
+        index.get_envs(len(index) + 1)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+def test_envs_differences(tmpdir):
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    command = ["sh", "-c", "export CLADE_TEST=1; unset HOME; env > /dev/null"]
+
+    assert not intercept(
+        command=command, output=output, use_wrappers=False, intercept_envs=True
+    )
+
+    envs_file = os.path.join(str(tmpdir), "envs.txt")
+    with open(envs_file) as fh:
+        assert any(line.startswith("=-") for line in fh)
+
+    cmd = [cmd for cmd in iter_cmds(output) if cmd["command"][0] == "env"][0]
+    envs = get_envs_index(envs_file).get_envs(cmd["id"])
+
+    assert envs["CLADE_TEST"] == "1"
+    assert "HOME" not in envs
+    assert envs["PATH"] == os.environ["PATH"]
+    assert envs["CLADE_PARENT_ID"] == str(cmd["id"])
@@ -0,0 +1,94 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+import pytest
+
+from clade.types.file_pack import FilePack
+
+
+def write_file(path, content, mode=0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "wb") as fh:
+        fh.write(content)
+
+    os.chmod(path, mode)
+    return path
+
+
+def test_file_pack(tmpdir):
+    src_dir = os.path.join(str(tmpdir), "src")
+    files = {
+        "main.c": (b"int main() { return 0; }\n" * 100, 0o644),
+        os.path.join("include", "main.h"): (b"int main();\n" * 100, 0o600),
+        os.path.join("include", "copy.h"): (b"int main();\n" * 100, 0o644),
+        "empty.h": (b"", 0o644),
+        "random.bin": (os.urandom(1024), 0o755),
+    }
+
+    for name, (content, mode) in files.items():
+        write_file(os.path.join(src_dir, name), content, mode)
+
+    pack = FilePack(os.path.join(str(tmpdir), "pack", "files.pack"))
+    assert not pack.exists()
+    assert "main.c" not in pack
+
+    number, size = pack.dump(
+        (name, os.path.join(src_dir, name)) for name in sorted(files)
+    )
+    assert pack.exists()
+    assert number == len(files)
+    assert size == sum(len(content) for content, _ in files.values())
+
+    # Content is compressed, and identical files are stored once
+    assert os.path.getsize(pack.path) < size // 4
+
+    assert len(pack) == len(files)
+    assert sorted(pack) == sorted(files)
+
+    for name, (content, _) in files.items():
+        assert pack.read(name) == content
+        assert pack.get_size(name) == len(content)
+
+    with pytest.raises(KeyError):
+        pack.read("do_not_exist.c")
+
+    # Pack can be reopened in another process
+    pack = pickle.loads(pickle.dumps(pack))
+    assert pack.read("main.c") == files["main.c"][0]
+
+    dst_dir = os.path.join(str(tmpdir), "dst")
+    write_file(os.path.join(dst_dir, "main.c"), b"changed")
+
+    assert pack.extract(dst_dir, overwrite=False) == len(files) - 1
+    assert pack.extract(dst_dir) == len(files)
+
+    for name, (content, mode) in files.items():
+        with open(os.path.join(dst_dir, name), "rb") as fh:
+            assert fh.read() == content
+
+        assert os.stat(os.path.join(dst_dir, name)).st_mode & 0o777 == mode
+
+    pack.close()
+
+
+def test_file_pack_bad_file(tmpdir):
+    path = write_file(os.path.join(str(tmpdir), "files.pack"), b"not a pack at all")
+    pack = FilePack(path)
+
+    with pytest.raises(RuntimeError):
+        "main.c" in pack
@@ -0,0 +1,193 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import sys
+
+import pytest
+
+from clade.cmds import iter_cmds
+from clade.fingerprints import (
+    get_changed_ids,
+    get_fingerprints_file,
+    get_open_fingerprints_file,
+    iter_fingerprints,
+    open_fingerprints_file,
+    split_fingerprints,
+)
+from clade.intercept import intercept
+
+test_project = os.path.join(os.path.dirname(__file__), "test_project")
+
+
+def write_capture(capture_dir, cmds, fingerprints):
+    os.makedirs(capture_dir)
+    cmds_file = os.path.join(capture_dir, "cmds.txt")
+
+    with open(cmds_file, "w") as fh:
+        fh.write("".join(line + "\n" for line in cmds))
+
+    with open(get_fingerprints_file(cmds_file), "w") as fh:
+        fh.write("".join(line + "\n" for line in fingerprints))
+
+    return cmds_file
+
+
+def test_bad_open():
+    with pytest.raises(RuntimeError):
+        open_fingerprints_file("do_not_exist.txt")
+
+
+def test_split_fingerprints():
+    assert split_fingerprints("\n") == []
+    assert split_fingerprints("10 20 30 /usr/bin/gcc||1 2 3 a b.c\n") == [
+        {"path": "/usr/bin/gcc", "size": 10, "mtime_ns": 20, "ino": 30},
+        {"path": "a b.c", "size": 1, "mtime_ns": 2, "ino": 3},
+    ]
+
+
+def test_get_changed_ids(tmpdir):
+    old_cmds_file = write_capture(
+        os.path.join(str(tmpdir), "old"),
+        [
+            "/src||0||/usr/bin/make||make",
+            "/src||1||/usr/bin/gcc||gcc||-c||a.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||b.c",
+            "/src||1||||",
+            "/src||1||/usr/bin/gcc||gcc||-c||c.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||c.c",
+        ],
+        [
+            "1 1 1 /usr/bin/make",
+            "1 1 1 /usr/bin/gcc||5 5 5 a.c",
+            "1 1 1 /usr/bin/gcc||6 6 6 b.c",
+            "",
+            "1 1 1 /usr/bin/gcc||7 7 7 c.c",
+            "1 1 1 /usr/bin/gcc||7 7 7 c.c",
+        ],
+    )
+
+    # Commands are executed in a different order, b.c is changed,
+    # d.c is new, and the last command has no fingerprints
+    new_cmds_file = write_capture(
+        os.path.join(str(tmpdir), "new"),
+        [
+            "/src||0||/usr/bin/make||make",
+            "/src||1||/usr/bin/gcc||gcc||-c||b.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||a.c",
+            "/src||1||||",
+            "/src||1||/usr/bin/gcc||gcc||-c||c.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||c.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||c.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||d.c",
+            "/src||1||/usr/bin/gcc||gcc||-c||a.c",
+        ],
+        [
+            "1 1 1 /usr/bin/make",
+            "1 1 1 /usr/bin/gcc||6 6 8 b.c",
+            "1 1 1 /usr/bin/gcc||5 5 5 a.c",
+            "",
+            "1 1 1 /usr/bin/gcc||7 7 7 c.c",
+            "1 1 1 /usr/bin/gcc||7 7 7 c.c",
+            "1 1 1 /usr/bin/gcc||7 7 7 c.c",
+            "1 1 1 /usr/bin/gcc||8 8 8 d.c",
+        ],
+    )
+
+    assert get_changed_ids(old_cmds_file, new_cmds_file) == {2, 7, 8, 9}
+    assert get_changed_ids(old_cmds_file, old_cmds_file) == set()
+
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="test doesn't work on macOS")
+def test_intercept_fingerprints(tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    shutil.copytree(test_project, project, ignore=shutil.ignore_patterns("clade"))
+
+    cmds_files = []
+    for build in ["old", "new"]:
+        cmds_file = os.path.join(str(tmpdir), build, "cmds.txt")
+        os.makedirs(os.path.dirname(cmds_file))
+        cmds_files.append(cmds_file)
+
+        assert not intercept(
+            command=["make", "-C", project],
+            output=cmds_file,
+            use_wrappers=False,
+            conf={"Intercept.fingerprints": True},
+        )
+
+        with open(os.path.join(project, "zero.c"), "a") as fh:
+            fh.write("\n")
+
+    cmds = list(iter_cmds(cmds_files[1]))
+    fingerprints = list(iter_fingerprints(get_fingerprints_file(cmds_files[1])))
+    assert len(cmds) == len(fingerprints)
+
+    for cmd, fingerprint in zip(cmds, fingerprints):
+        paths = [f["path"] for f in fingerprint["fingerprints"]]
+
+        if cmd["which"].endswith("/make"):
+            assert paths == [cmd["which"]]
+        elif "zero.c" in cmd["command"]:
+            assert "zero.c" in paths
+
+        # Outputs from the previous build are not inputs
+        if "-o" in cmd["command"]:
+            assert cmd["command"][cmd["command"].index("-o") + 1] not in paths
+
+    changed_ids = get_changed_ids(*cmds_files)
+
+    for cmd in cmds:
+        if cmd["which"].endswith("/make"):
+            assert cmd["id"] not in changed_ids
+        elif "zero.c" in cmd["command"]:
+            assert cmd["id"] in changed_ids
+
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="test doesn't work on macOS")
+def test_intercept_fingerprints_read_files(tmpdir):
+    project = os.path.join(str(tmpdir), "project")
+    shutil.copytree(test_project, project, ignore=shutil.ignore_patterns("clade"))
+
+    cmds_files = []
+    for build in ["old", "new"]:
+        cmds_file = os.path.join(str(tmpdir), build, "cmds.txt")
+        os.makedirs(os.path.dirname(cmds_file))
+        cmds_files.append(cmds_file)
+
+        assert not intercept(
+            command=["make", "-C", project],
+            output=cmds_file,
+            use_wrappers=False,
+            intercept_open=True,
+            conf={"Intercept.fingerprints": True},
+        )
+        assert os.path.exists(get_open_fingerprints_file(cmds_file))
+
+        # Header is not an argument of any command
+        with open(os.path.join(project, "zero.h"), "a") as fh:
+            fh.write("\n")
+
+    changed_ids = get_changed_ids(*cmds_files)
+    cmds = list(iter_cmds(cmds_files[1]))
+
+    assert any("main.c" in cmd["command"] for cmd in cmds)
+
+    for cmd in cmds:
+        if cmd["which"].endswith("gcc") and "main.c" in cmd["command"]:
+            assert cmd["id"] in changed_ids
+        elif cmd["which"].endswith("/as") and "empty.s" in cmd["command"]:
+            assert cmd["id"] not in changed_ids
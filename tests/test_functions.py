@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import pytest
 
 from clade import Clade
@@ -92,3 +93,17 @@ def test_functions(tmpdir, cmds_file):
     funcs_by_file_are_ok(funcs_by_file)
     funcs_are_consistent(funcs, funcs_by_file)
     filtered_funcs_by_file_are_ok(funcs_by_file, funcs_by_main_c)
+
+
+@pytest.mark.cif
+def test_functions_export_json(tmpdir, cmds_file):
+    conf = {"CmdGraph.requires": ["CC", "MV"], "Functions.export_json": True}
+
+    c = Clade(tmpdir, cmds_file, conf)
+    e = c.parse("Functions")
+
+    assert os.path.isdir(os.path.join(e.work_dir, e.funcs_folder))
+    assert e.load_functions() == e.load_data_by_key(e.funcs_folder)
+    assert e.function_exists("main")
+    assert not e.function_exists("function_that_does_not_exist")
+    assert e.load_definitions("main") == e.load_functions(["main"])["main"]
@@ -13,9 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import pytest
 
 from clade import Clade
+from clade.extensions.info import Info
 
 
 @pytest.mark.cif
@@ -34,3 +36,28 @@ def test_info(tmpdir, cmds_file):
     assert list(e.iter_macros_definitions())
     assert list(e.iter_macros_expansions())
     assert list(e.iter_typedefs())
+
+
+@pytest.mark.parametrize("relative", [True, False])
+def test_info_check_cif(tmpdir, monkeypatch, relative):
+    bin_dir = os.path.join(str(tmpdir), "bin")
+    os.makedirs(bin_dir)
+
+    cif = os.path.join(bin_dir, "cif")
+    with open(cif, "w") as fh:
+        fh.write("#!/bin/sh\n")
+    os.chmod(cif, 0o755)
+
+    monkeypatch.chdir(str(tmpdir))
+    monkeypatch.setenv("PATH", "bin" if relative else bin_dir)
+
+    e = Info(os.path.join(str(tmpdir), "clade"))
+
+    if relative:
+        with pytest.raises(RuntimeError, match="must be absolute"):
+            e._Info__check_cif()
+    else:
+        e._Info__check_cif()
+
+    # Working directory is shared by extensions executed in parallel threads
+    assert os.getcwd() == str(tmpdir)
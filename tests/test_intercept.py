@@ -14,11 +14,15 @@
 # limitations under the License.
 
 import os
+import pytest
+import re
 import shutil
 import sys
 
+from clade.cmds import iter_cmds
+from clade.envs import iter_envs
 from clade.intercept import intercept
-
+from clade.utils import get_which_list, merge_preset_to_conf
 
 test_project = os.path.join(os.path.dirname(__file__), "test_project")
 test_project_make = ["make", "-C", test_project]
@@ -65,6 +69,131 @@ def test_fallback(tmpdir):
     assert calculate_loc(output) > 1
 
 
+def test_no_fallback_with_filtered_cmds(tmpdir):
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    conf = merge_preset_to_conf("base", dict())
+    conf["Intercept.filter_cmds"] = True
+    conf["Intercept.deny_list"] = ["/mv$"]
+
+    assert not intercept(
+        command=test_project_make,
+        output=output,
+        use_wrappers=False,
+        intercept_open=True,
+        intercept_envs=True,
+        conf=conf,
+    )
+
+    cmds = list(iter_cmds(output))
+    stubs = {cmd["id"] for cmd in cmds if not cmd["which"]}
+    ids = {cmd["id"] for cmd in cmds} | {0}
+
+    # make and mv are stored as stubs that keep the pid graph
+    assert stubs and len(stubs) < len(cmds)
+    for cmd in cmds:
+        assert cmd["pid"] in ids and cmd["pid"] < cmd["id"]
+
+        if cmd["id"] in stubs:
+            assert not cmd["command"]
+        else:
+            assert any(re.search(w, cmd["which"]) for w in get_which_list(conf))
+            assert not re.search("/mv$", cmd["which"])
+
+    with open(os.path.join(str(tmpdir), "open.txt")) as fh:
+        assert not {int(line.split(" ", 1)[0]) for line in fh} & stubs
+
+    for envs in iter_envs(os.path.join(str(tmpdir), "envs.txt")):
+        assert bool(envs["envs"]) != (envs["id"] in stubs)
+        assert envs["id"] in stubs or "PATH" in envs["envs"]
+
+
+def test_no_fallback_which_cache(tmpdir):
+    whiches = []
+
+    for which_cache in [False, True]:
+        output = os.path.join(str(tmpdir), "cmds{}.txt".format(int(which_cache)))
+        conf = {"Intercept.which_cache": which_cache}
+
+        assert not intercept(
+            command=test_project_make, output=output, use_wrappers=False, conf=conf
+        )
+
+        whiches.append([cmd["which"] for cmd in iter_cmds(output)])
+
+    assert whiches[0] == whiches[1]
+
+
+@pytest.mark.skipif(not shutil.which("gcc"), reason="gcc is not installed")
+def test_which_cache_relative_path(tmpdir, monkeypatch):
+    # Executables from relative PATH directories depend on the working directory
+    monkeypatch.setenv("PATH", ".:" + os.environ["PATH"])
+
+    for d in ["A", "B"]:
+        os.makedirs(os.path.join(str(tmpdir), d))
+
+    fake_gcc = os.path.join(str(tmpdir), "B", "gcc")
+    with open(fake_gcc, "w") as fh:
+        fh.write("#!/bin/sh\ntouch fake_gcc_was_executed\n")
+    os.chmod(fake_gcc, 0o755)
+
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    command = [
+        "sh",
+        "-c",
+        "cd {0}/A && gcc --version; cd {0}/B && gcc --version".format(tmpdir),
+    ]
+
+    assert not intercept(
+        command=command,
+        output=output,
+        use_wrappers=True,
+        conf={"Intercept.which_cache": True},
+    )
+
+    assert os.path.exists(os.path.join(str(tmpdir), "B", "fake_gcc_was_executed"))
+
+
+# Missing configuration is treated as the default one
+@pytest.mark.parametrize("with_conf", [True, False])
+def test_fallback_with_filtered_wrappers(tmpdir, with_conf):
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    conf = merge_preset_to_conf("base", dict())
+
+    assert not intercept(
+        command=test_project_make,
+        output=output,
+        use_wrappers=True,
+        conf=conf if with_conf else None,
+    )
+
+    which_list = [w for k in conf if k.endswith(".which_list") for w in conf[k]] + [
+        "ccache$"
+    ]
+    cmds = list(iter_cmds(output))
+
+    assert cmds
+    # Build command itself is always wrapped, so its cwd is the build dir
+    assert cmds[0]["command"][0] == "make"
+    assert cmds[0]["cwd"] == os.getcwd()
+
+    # Other executables are wrapped only if their commands can be parsed
+    for cmd in cmds[1:]:
+        assert any(re.search(w, cmd["which"]) for w in which_list)
+
+
+def test_fallback_with_cached_wrappers(tmpdir):
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    conf = {"Wrapper.cache_dir": cache_dir}
+
+    for _ in range(2):
+        assert not intercept(
+            command=test_project_make, output=output, use_wrappers=True, conf=conf
+        )
+        assert calculate_loc(output) > 1
+        assert len(os.listdir(cache_dir)) == 1
+
+
 def test_fallback_with_exe_wrappers(tmpdir):
     output = os.path.join(str(tmpdir), "cmds.txt")
     cc_path = shutil.which("cc")
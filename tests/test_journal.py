@@ -0,0 +1,63 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from clade.journal import Journal
+
+
+def test_journal(tmpdir):
+    path = os.path.join(str(tmpdir), "cmds.txt.journal")
+    output = os.path.join(str(tmpdir), "cmds.txt")
+
+    journal = Journal(path, output)
+
+    with open(path, "wb") as fh:
+        fh.write(b"2 b\n3 c\n")
+
+    assert journal.collect() == 0
+    assert not os.path.exists(output)
+
+    with open(path, "ab") as fh:
+        fh.write(b"1 a\n5 e\n4 d")
+
+    assert journal.collect() == 3
+
+    with open(output, "rb") as fh:
+        assert fh.read() == b"a\nb\nc\n"
+
+    with open(path, "ab") as fh:
+        fh.write(b"\n")
+
+    journal.collect()
+
+    with open(output, "rb") as fh:
+        assert fh.read() == b"a\nb\nc\nd\ne\n"
+
+
+def test_journal_missing_records(tmpdir):
+    path = os.path.join(str(tmpdir), "envs.txt.journal")
+    output = os.path.join(str(tmpdir), "envs.txt")
+
+    with open(path, "wb") as fh:
+        fh.write(b"4 D=4\n\n2 B=2\nC=2\n\n")
+
+    journal = Journal(path, output, last_id=1, terminator=b"\n\n", placeholder=b"\n")
+    journal.close()
+
+    with open(output, "rb") as fh:
+        assert fh.read() == b"B=2\nC=2\n\n\nD=4\n\n"
+
+    assert not os.path.exists(path)
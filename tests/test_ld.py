@@ -13,9 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import re
 
 from clade import Clade
+from clade.extensions import linker
+from clade.extensions.ld import LD
 
 
 def test_ld(tmpdir, cmds_file):
@@ -36,3 +39,55 @@ def test_ld(tmpdir, cmds_file):
     assert len(target_cmd["out"]) == 1
     assert len(target_cmd["opts"]) == 7
     assert len(target_cmd["command"]) == 11
+
+
+def test_ld_searchdirs_cache(tmpdir, cmds_file, monkeypatch):
+    c = Clade(tmpdir, cmds_file)
+    e = c.parse("LD")
+
+    searchdirs_file = os.path.join(e.work_dir, e.searchdirs_file)
+    stored = e.load_data(searchdirs_file)
+    assert stored
+
+    for linker_path, cached in stored.items():
+        assert os.path.isabs(linker_path)
+        assert len(cached["signature"]) == 2
+
+    # Default search dirs are loaded from the file by new processes
+    # and are not computed again
+    def get_default_searchdirs(which):
+        raise AssertionError("Search dirs are not cached")
+
+    linker._default_searchdirs.clear()
+    monkeypatch.setattr(LD, "_get_default_searchdirs", get_default_searchdirs)
+
+    # Archive is found in the same way
+    for cmd in e.load_all_cmds(with_opts=True):
+        parsed_cmd = dict(cmd, **{"in": [i for i in cmd["in"] if i.endswith(".o")]})
+
+        for linker_path in stored:
+            e._parse_linker_opts(linker_path, parsed_cmd)
+
+        assert parsed_cmd["in"] == cmd["in"]
+
+
+def test_ld_listdir(tmpdir):
+    searchdir = os.path.join(str(tmpdir), "lib")
+
+    # Missing dirs are not cached as empty ones
+    assert not linker._listdir(searchdir)
+    os.makedirs(searchdir)
+    assert not linker._listdir(searchdir)
+
+    with open(os.path.join(searchdir, "libzero.a"), "w"):
+        pass
+
+    # Force change of mtime even on file systems with coarse timestamps
+    os.utime(searchdir, ns=(0, 0))
+    assert linker._listdir(searchdir) == {"libzero.a"}
+
+    with open(os.path.join(searchdir, "libone.a"), "w"):
+        pass
+
+    os.utime(searchdir, ns=(1, 1))
+    assert linker._listdir(searchdir) == {"libzero.a", "libone.a"}
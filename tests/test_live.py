@@ -0,0 +1,102 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+import re
+import shlex
+import sys
+import time
+
+from clade import Clade
+from clade.intercept import intercept
+from clade.live import LiveParser
+from tests.test_intercept import test_project_make
+
+
+def load_cmds(c, ext_name):
+    cmds = []
+
+    for cmd in c.parse(ext_name).load_all_cmds(with_opts=True, with_raw=True):
+        # Names of temporary files differ between builds
+        cmds.append(re.sub(r"/tmp/cc\w+", "TMP", repr(sorted(cmd.items()))))
+
+    return sorted(cmds)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+def test_collect_during_build(tmpdir):
+    output = os.path.join(str(tmpdir), "cmds.txt")
+    snapshot = os.path.join(str(tmpdir), "snapshot.txt")
+
+    command = "true && sleep 1 && cp {} {}".format(output, snapshot)
+    conf = {"Intercept.collect_interval": 0.1}
+
+    intercept(["sh", "-c", command], output=output, use_wrappers=False, conf=conf)
+
+    with open(snapshot, "r") as fh:
+        assert "true" in fh.read()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+def test_live_parsing(tmpdir, monkeypatch):
+    monkeypatch.setattr(LiveParser, "interval", 0.1)
+
+    # Build continues for a while, so the last commands are parsed live
+    command = "{} >/dev/null 2>&1; sleep 1".format(shlex.join(test_project_make))
+    ext_names = ["CC", "LD", "AS", "MV"]
+    cmds = dict()
+
+    for live in [False, True]:
+        work_dir = os.path.join(str(tmpdir), str(live))
+        c = Clade(work_dir)
+        c.intercept(
+            ["sh", "-c", command],
+            use_wrappers=False,
+            live_extensions=ext_names if live else None,
+        )
+
+        if live:
+            assert c.are_parsed("CC")
+            assert not os.path.exists(os.path.join(work_dir, "live"))
+
+        c.parse_list(ext_names)
+        cmds[live] = {e: load_cmds(c, e) for e in ext_names}
+
+    assert cmds[False]["CC"]
+    assert cmds[True] == cmds[False]
+
+
+def test_live_completed_cmds(tmpdir):
+    cmds_file = os.path.join(str(tmpdir), "cmds.txt")
+    src = os.path.join(str(tmpdir), "src")
+
+    with open(cmds_file, "w") as fh:
+        fh.write("{}||0||/usr/bin/gcc||gcc||-c||a.c||-o||a.o\n".format(src))
+        fh.write("{}||0||/usr/bin/gcc||gcc||-c||data.c||-o||data.o\n".format(src))
+
+    live = LiveParser(Clade(os.path.join(str(tmpdir), "clade"), cmds_file), ["CC"])
+    live.start_time = time.time()
+    os.makedirs(live.live_dir)
+
+    # Output files do not exist, and data.o is not a.o
+    assert not live._LiveParser__copy_completed_cmds()
+
+    # Output file of the first command is moved by the next one
+    with open(cmds_file, "a") as fh:
+        fh.write("{}||0||/bin/mv||mv||a.o||b.o\n".format(src))
+
+    assert live._LiveParser__copy_completed_cmds() == 1
+    assert live.copied == 1
@@ -0,0 +1,69 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+import sys
+
+from clade import Clade
+from clade.intercept import intercept
+from tests.test_intercept import test_project_make
+
+
+@pytest.fixture(scope="module")
+def open_cmds_file(tmpdir_factory):
+    output = os.path.join(str(tmpdir_factory.mktemp("open")), "cmds.txt")
+    intercept(
+        command=test_project_make,
+        output=output,
+        use_wrappers=False,
+        intercept_open=True,
+    )
+    yield output
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+def test_open_files(tmpdir, open_cmds_file):
+    c = Clade(tmpdir, open_cmds_file)
+    e = c.parse("OpenFiles")
+
+    for cmd in c.parse("CC").load_all_cmds(compile_only=True):
+        files = e.load_files_by_id(cmd["id"])
+
+        for cmd_in in cmd["in"]:
+            assert os.path.join(cmd["cwd"], cmd_in) in files
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="tests only for Linux")
+@pytest.mark.parametrize("with_system_header_files", [True, False])
+def test_cc_intercepted_deps(tmpdir, open_cmds_file, with_system_header_files):
+    deps = dict()
+
+    for deps_source in ["compiler", "intercepted_open"]:
+        conf = {
+            "CC.deps_source": deps_source,
+            "CC.with_system_header_files": with_system_header_files,
+        }
+
+        c = Clade(os.path.join(str(tmpdir), deps_source), open_cmds_file, conf)
+        e = c.parse("CC")
+
+        deps[deps_source] = {
+            cmd["id"]: sorted(cmd["deps"])
+            for cmd in e.load_all_cmds(with_deps=True, compile_only=True)
+        }
+
+    assert deps["compiler"]
+    assert deps["compiler"] == deps["intercepted_open"]
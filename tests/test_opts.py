@@ -13,8 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pytest
+
+from benchmarks.opts_parser import (
+    generate_cmds,
+    legacy_filter_opts_for_clang,
+    legacy_parse,
+)
 from clade import Clade
-from clade.extensions.opts import filter_opts
+from clade.extensions.opts import (
+    OptionTable,
+    filter_opts,
+    filter_opts_for_clang,
+    get_option_table,
+)
 
 
 def test_isysroot(tmpdir):
@@ -50,3 +62,54 @@ def test_bad_opt():
     opts = ["-ABC", "-Dtest"]
 
     assert filter_opts(opts) == ["-Dtest"]
+
+
+def test_option_table_match():
+    table = OptionTable(prefixes=["-I", "-include", "-O$", "-f(no-)?pic", "-c"])
+
+    assert table.match("-I/usr/include") == "-I"
+    assert table.match("-include") == "-include"
+    assert table.match("-O") == "-O"
+    assert table.match("-O2") is None
+    assert table.match("-fno-pic") == "-fno-pic"
+    assert table.match("-cc1") == "-c"
+    assert table.match("main.c") is None
+
+    assert table.split_joined("-I=/usr/include") == ("-I", "/usr/include")
+    assert table.split_joined("-include") == ("-include", "")
+    assert table.split_joined("-x") == (None, None)
+
+
+def test_option_table_parse():
+    table = get_option_table("CC")
+    assert table is get_option_table("CC")
+
+    assert table.parse(
+        ["-c", "-I", "include", "-Iinclude", "-o", "./main.o", "main.c"]
+    ) == {
+        "in": ["main.c"],
+        "out": ["main.o"],
+        "opts": ["-c", "-I", "include", "-Iinclude"],
+    }
+
+    assert get_option_table("LD").parse(
+        ["-platform_version", "macos", "10", "11", "main.o"]
+    ) == {
+        "in": ["main.o"],
+        "out": [],
+        "opts": ["-platform_version", "macos", "10", "11"],
+    }
+
+    with pytest.raises(RuntimeError):
+        get_option_table("unsupported")
+
+
+@pytest.mark.parametrize("cmd_type", ["CC", "CXX", "LD", "AS", "Objcopy"])
+def test_option_table_legacy(cmd_type):
+    for _, command in generate_cmds(100):
+        assert get_option_table(cmd_type).parse(command[1:]) == legacy_parse(
+            command[1:], cmd_type
+        )
+        assert filter_opts_for_clang(command[1:]) == legacy_filter_opts_for_clang(
+            command[1:]
+        )
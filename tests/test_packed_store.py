@@ -0,0 +1,68 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import array
+import os
+import pickle
+import pytest
+
+from clade.types.packed_store import PackedStore
+
+
+def test_packed_store(tmpdir):
+    data = {
+        "main": [{"file": "main.c", "compiled_in": array.array("L", [1, 2])}],
+        "zero": [],
+        "юникод": {"line": 1},
+    }
+
+    store = PackedStore(os.path.join(str(tmpdir), "store", "data.pack"))
+    assert not store.exists()
+    assert "main" not in store
+    assert not len(store)
+
+    store.dump(data)
+    assert store.exists()
+
+    assert len(store) == 3
+    assert "main" in store
+    assert store["main"] == [{"file": "main.c", "compiled_in": [1, 2]}]
+    assert store["zero"] == []
+    assert store["юникод"] == {"line": 1}
+    assert store.get("do_not_exist") is None
+    assert store.get("do_not_exist", []) == []
+    assert sorted(store.keys()) == sorted(data.keys())
+    assert dict(store.items())["zero"] == []
+
+    # Store can be reopened in another process
+    store = pickle.loads(pickle.dumps(store))
+    assert store["zero"] == []
+
+    store.dump({"zero": 0})
+    assert store.keys() == ["zero"]
+    assert store["zero"] == 0
+    store.close()
+
+
+def test_packed_store_bad_file(tmpdir):
+    path = os.path.join(str(tmpdir), "data.pack")
+
+    with open(path, "w") as fh:
+        fh.write("not a packed store at all")
+
+    store = PackedStore(path)
+
+    with pytest.raises(RuntimeError):
+        store.get("main")
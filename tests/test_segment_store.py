@@ -0,0 +1,103 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import pickle
+
+from clade.types.segment_store import SegmentStore
+
+
+def add_cmds(store, ids):
+    for cmd_id in ids:
+        store.add("cmds", cmd_id, {"id": cmd_id})
+
+
+def test_segment_store(tmpdir):
+    store = SegmentStore(os.path.join(str(tmpdir), "store"), ["cmds", "opts"])
+    assert store.get("cmds", 1) is None
+    assert store.keys("cmds") == []
+
+    store.add("cmds", 1, {"id": 1, "in": ["main.c"]})
+    store.add("opts", 1, ["-O2"])
+    store.add("cmds", 2, {"id": 2})
+
+    # Records can be read before merge
+    assert store.get("cmds", 1) == {"id": 1, "in": ["main.c"]}
+    assert store.get("opts", 1) == ["-O2"]
+    assert store.get("opts", 2, []) == []
+
+    store.merge()
+    assert os.path.exists(store.index_file)
+    assert store.keys("cmds") == [1, 2]
+    assert store.contains("opts", 1)
+    assert not store.contains("opts", 2)
+
+    # Later records replace earlier ones
+    store.add("opts", 1, ["-O3"])
+    assert store.get("opts", 1) == ["-O3"]
+    store.close()
+
+
+def test_segment_store_processes(tmpdir):
+    store = SegmentStore(os.path.join(str(tmpdir), "store"), ["cmds"])
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=add_cmds, args=(pickle.loads(pickle.dumps(store)), ids))
+        for ids in (range(1, 51), range(51, 101))
+    ]
+
+    for p in processes:
+        p.start()
+
+    for p in processes:
+        p.join()
+
+    store.merge()
+    assert store.keys("cmds") == list(range(1, 101))
+    assert dict(store.items("cmds"))[77] == {"id": 77}
+    assert len([f for f in os.listdir(store.path) if f.endswith(".seg")]) == 2
+
+
+def test_segment_store_new_segments(tmpdir):
+    store = SegmentStore(os.path.join(str(tmpdir), "store"), ["cmds"])
+    store.add("cmds", 1, {"id": 1})
+    assert store.get("cmds", 1) == {"id": 1}
+
+    segments = set(os.listdir(store.path))
+
+    ctx = multiprocessing.get_context("spawn")
+    p = ctx.Process(target=add_cmds, args=(pickle.loads(pickle.dumps(store)), [2]))
+    p.start()
+    p.join()
+
+    # Segment of another process may precede already opened ones,
+    # since its name is taken before the segment is opened
+    [segment] = [
+        f for f in set(os.listdir(store.path)) - segments if f.endswith(".seg")
+    ]
+    for ext in ("", ".idx"):
+        os.rename(
+            os.path.join(store.path, segment + ext),
+            os.path.join(store.path, "{:020d}-early.seg{}".format(0, ext)),
+        )
+
+    store.add("cmds", 3, {"id": 3})
+
+    assert store.get("cmds", 1) == {"id": 1}
+    assert store.get("cmds", 2) == {"id": 2}
+    assert store.get("cmds", 3) == {"id": 3}
+    store.close()
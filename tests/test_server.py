@@ -0,0 +1,80 @@
+# Copyright (c) 2026 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+import socket
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+
+from clade.cmds import join_cmd
+from clade.server import PreprocessServer
+
+
+def send(conf, data):
+    if "Server.address" in conf:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(conf["Server.address"])
+    else:
+        sock = socket.create_connection((conf["Server.host"], int(conf["Server.port"])))
+
+    with sock:
+        sock.sendall(data.encode("utf-8"))
+
+        # Server closes connection after the command is written
+        while sock.recv(1024):
+            pass
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="tests only for Linux and macOS")
+def test_server_stress(tmpdir):
+    output = os.path.join(str(tmpdir), "cmds.txt.journal")
+    number_of_clients = 2000
+
+    conf = {"work_dir": str(tmpdir)}
+    server = PreprocessServer(conf, output, with_ids=True)
+    server.start()
+
+    cmds = dict()
+    for i in range(1, number_of_clients + 1):
+        cmd = {
+            "cwd": "/work",
+            "pid": i - 1,
+            "which": "/usr/bin/gcc",
+            "command": ["gcc", "-c", "{}.c".format(i)],
+        }
+        cmds[i] = join_cmd(cmd)
+
+    try:
+        with ThreadPoolExecutor(max_workers=200) as executor:
+            futures = [
+                executor.submit(send, conf, "{} {}\n".format(i, cmd))
+                for i, cmd in cmds.items()
+            ]
+
+            for future in futures:
+                future.result()
+    finally:
+        server.terminate()
+
+    with open(output) as fh:
+        records = [line.rstrip("\n").split(" ", 1) for line in fh]
+
+    assert len(records) == number_of_clients
+    assert {int(i): cmd for i, cmd in records} == cmds
+
+    assert server.stats["requests"] == number_of_clients
+    assert server.stats["max"] >= server.stats["p99"] >= server.stats["p50"]
@@ -13,8 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 import itertools
+import os
+import pytest
+import shutil
 
 from clade import Clade
 
@@ -50,3 +52,52 @@ def test_src_graph_empty_conf(tmpdir, cmds_file):
     src_graph = e.load_src_graph()
     assert src_graph
     assert len(list(itertools.chain(*src_graph[test_file].values()))) >= 1
+
+
+@pytest.mark.parametrize("parsed_cmds", [1, 5, 12])
+def test_src_graph_incremental(tmpdir, cmds_file, parsed_cmds):
+    conf = {"CmdGraph.requires": ["CC", "LD", "MV"]}
+
+    c = Clade(os.path.join(str(tmpdir), "full"), cmds_file, conf)
+    e = c.parse("SrcGraph")
+
+    with open(cmds_file, "r") as fh:
+        lines = fh.readlines()
+
+    tmp_cmds_file = os.path.join(str(tmpdir), "cmds.txt")
+    with open(tmp_cmds_file, "w") as fh:
+        fh.writelines(lines[:parsed_cmds])
+
+    work_dir = os.path.join(str(tmpdir), "incremental")
+
+    # Graphs may be empty, since there are too few commands
+    try:
+        Clade(work_dir, tmp_cmds_file, conf).parse("SrcGraph")
+    except RuntimeError:
+        for ext_name in ["CmdGraph", "SrcGraph"]:
+            shutil.rmtree(os.path.join(work_dir, ext_name), ignore_errors=True)
+
+    with open(tmp_cmds_file, "a") as fh:
+        fh.writelines(lines[parsed_cmds:])
+
+    c2 = Clade(work_dir, tmp_cmds_file, conf)
+    e2 = c2.parse("SrcGraph")
+
+    assert c2.pid_by_id == c.pid_by_id
+    assert c2.cmd_graph == c.cmd_graph
+    assert sorted(c2.get_all_cmds_by_type("CC"), key=lambda x: x["id"]) == sorted(
+        c.get_all_cmds_by_type("CC"), key=lambda x: x["id"]
+    )
+    assert e2.load_src_graph() == e.load_src_graph()
+    assert e2.load_src_info() == e.load_src_info()
+
+
+def test_src_graph_packed_storage(tmpdir, cmds_file):
+    c = Clade(tmpdir, cmds_file)
+    c.parse("CC")
+    c.Storage.pack()
+
+    assert not os.path.exists(c.get_storage_path(test_file))
+
+    e = c.parse("SrcGraph")
+    assert e.load_src_info()[test_file]["loc"] == 11
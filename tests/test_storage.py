@@ -20,6 +20,8 @@ import stat
 import unittest.mock
 
 from clade import Clade
+from clade.extensions.storage import Storage
+from clade.scripts.storage import main as storage_main
 
 test_file = os.path.abspath("tests/test_project/main.c")
 
@@ -89,3 +91,139 @@ def test_storage_permissions(tmpdir, convert):
     c = Clade(tmpdir, conf={"Storage.convert_to_utf8": convert})
     storage_path = c.add_file_to_storage(__file__)
     assert os.stat(storage_path)[stat.ST_MODE] == os.stat(__file__)[stat.ST_MODE]
+
+
+def create_identical_files(tmpdir, number, content=b"int x;\n"):
+    files = []
+
+    for i in range(number):
+        file = os.path.join(str(tmpdir), "src", str(i), "x.h")
+        os.makedirs(os.path.dirname(file))
+
+        with open(file, "wb") as fh:
+            fh.write(content)
+
+        files.append(file)
+
+    return files
+
+
+@pytest.mark.parametrize("dedup", ["hardlink", "reflink"])
+@pytest.mark.parametrize("convert", [False, True])
+def test_storage_dedup(tmpdir, dedup, convert):
+    c = Clade(
+        os.path.join(str(tmpdir), "clade"),
+        conf={"Storage.dedup": dedup, "Storage.convert_to_utf8": convert},
+    )
+
+    files = create_identical_files(tmpdir, 3)
+    storage_paths = [c.add_file_to_storage(file) for file in files]
+
+    for file, storage_path in zip(files, storage_paths):
+        assert storage_path == c.get_storage_path(file)
+
+        with open(storage_path, "rb") as fh:
+            assert fh.read() == b"int x;\n"
+
+    blobs = [
+        os.path.join(root, f)
+        for root, _, filenames in os.walk(c.Storage.blobs_dir)
+        for f in filenames
+    ]
+    assert len(blobs) == 1
+
+    files_number, saved = c.Storage.get_dedup_stats()
+
+    if dedup == "hardlink":
+        assert len({os.stat(p).st_ino for p in storage_paths + blobs}) == 1
+        # The first file is stored as a blob, and others are linked to it
+        assert (files_number, saved) == (2, 2 * len(b"int x;\n"))
+    else:
+        # Reflinks are not supported by all filesystems
+        assert (files_number, saved) in [(0, 0), (2, 2 * len(b"int x;\n"))]
+
+
+def test_storage_shared_blobs(tmpdir):
+    conf = {
+        "Storage.dedup": "hardlink",
+        "Storage.blobs_dir": os.path.join(str(tmpdir), "blobs"),
+    }
+    file = create_identical_files(tmpdir, 1)[0]
+
+    storage_paths = []
+    for work_dir in ["clade1", "clade2"]:
+        c = Clade(os.path.join(str(tmpdir), work_dir), conf=conf)
+        storage_paths.append(c.add_file_to_storage(file))
+
+    assert os.stat(storage_paths[0]).st_ino == os.stat(storage_paths[1]).st_ino
+    assert c.Storage.get_dedup_stats() == (1, len(b"int x;\n"))
+    assert not os.path.exists(os.path.join(c.storage_dir, Storage.blobs_dir_name))
+
+
+def test_storage_bad_dedup(tmpdir):
+    c = Clade(tmpdir, conf={"Storage.dedup": "symlink"})
+
+    with pytest.raises(RuntimeError):
+        c.Storage
+
+
+@pytest.mark.parametrize("remove", [True, False])
+def test_storage_pack(tmpdir, remove):
+    c = Clade(tmpdir)
+    storage_path = c.add_file_to_storage(test_file)
+
+    with open(test_file, "rb") as fh:
+        content = fh.read()
+
+    assert not c.Storage.is_packed()
+    c.Storage.pack(remove=remove)
+    assert c.Storage.is_packed()
+    assert os.path.exists(storage_path) != remove
+
+    # Path in the storage is not changed
+    assert c.get_storage_path(test_file) == storage_path
+    assert c.Storage.stored_file_exists(test_file)
+    assert not c.Storage.stored_file_exists("do_not_exist.c")
+
+    with c.Storage.open_stored_file(test_file) as fh:
+        assert fh.read() == content
+
+    with c.Storage.open_stored_file(test_file, "r", encoding="utf-8") as fh:
+        assert fh.read() == content.decode("utf-8")
+
+    with pytest.raises(FileNotFoundError):
+        c.Storage.open_stored_file("do_not_exist.c")
+
+    with pytest.raises(ValueError):
+        c.Storage.open_stored_file(test_file, "w")
+
+    # Packed files are not added again, and new files are packed
+    # together with already packed ones
+    assert not c.add_file_to_storage(test_file)
+    c.add_file_to_storage(__file__)
+    c.Storage.pack()
+
+    assert len(os.listdir(c.storage_dir)) == 1
+    assert c.Storage.stored_file_exists(__file__)
+    assert c.Storage.stored_file_exists(test_file)
+
+    c.Storage.unpack()
+    assert not c.Storage.is_packed()
+
+    with open(storage_path, "rb") as fh:
+        assert fh.read() == content
+
+
+def test_storage_script(tmpdir, cmds_file):
+    c = Clade(tmpdir, cmds_file)
+    c.parse("CC")
+
+    storage_path = c.get_storage_path(test_file)
+    assert os.path.exists(storage_path)
+
+    storage_main(["pack", str(tmpdir)])
+    assert not os.path.exists(storage_path)
+    assert c.Storage.stored_file_exists(test_file)
+
+    storage_main(["unpack", str(tmpdir)])
+    assert os.path.exists(storage_path)